@@ -10,6 +10,12 @@ class Thread(models.Model):
     def __str__(self):
         return f"{self.title[:50]} - by {self.user.username}"
 
+    class Meta:
+        indexes = [
+            # Dipakai cursor pagination feed thread: (-date_created, id)
+            models.Index(fields=['-date_created', 'id'], name='thread_feed_idx'),
+        ]
+
 class Reply(models.Model):
     thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name='replies')
     content = models.TextField()
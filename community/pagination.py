@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ThreadCursorPagination(CursorPagination):
+    """
+    Keyset pagination untuk feed thread, diurutkan (-date_created, id).
+    Ukuran halaman bisa diatur lewat ?page_size= (dibatasi max_page_size).
+    """
+    ordering = ('-date_created', 'id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
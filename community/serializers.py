@@ -4,14 +4,19 @@ from .models import Thread
 class ThreadSerializer(serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='user.username')
     is_mine = serializers.SerializerMethodField()
+    reply_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Thread
-        fields = ('id', 'title', 'content', 'user', 'author_username', 'date_created', 'is_mine')
+        fields = ('id', 'title', 'content', 'user', 'author_username', 'date_created', 'is_mine', 'reply_count')
         read_only_fields = ('user',)
 
     def get_is_mine(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.user == request.user
-        return False
\ No newline at end of file
+            return obj.user_id == request.user.id
+        return False
+
+    def get_reply_count(self, obj):
+        # Thread yang baru dibuat tidak punya anotasi reply_count
+        return getattr(obj, 'reply_count', 0)
@@ -237,3 +237,91 @@ class ThreadViewsTest(TestCase):
         
         self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN) # Views mengembalikan 403
         self.assertEqual(Thread.objects.count(), initial_count)
+
+
+# ====================================================================
+# C. TEST API THREAD DETAIL (REPLY TREE)
+# ====================================================================
+
+class ThreadDetailAPITest(TestCase):
+    """Menguji api_thread_detail: struktur pohon reply dan jumlah query yang konstan."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='poster', password='password')
+        self.thread = Thread.objects.create(title='Tree', content='Isi', user=self.user)
+        self.url = reverse('community:api_thread_detail', args=[self.thread.id])
+
+    def _add_replies(self, count):
+        parent = None
+        for i in range(count):
+            # Setiap reply ketiga dimulai sebagai top-level, sisanya nested
+            parent = Reply.objects.create(
+                thread=self.thread, user=self.user, content=f'Reply {i}',
+                parent=None if i % 3 == 0 else parent,
+            )
+
+    def test_reply_tree_structure(self):
+        root = Reply.objects.create(thread=self.thread, user=self.user, content='Root')
+        child = Reply.objects.create(thread=self.thread, user=self.user, content='Child', parent=root)
+        Reply.objects.create(thread=self.thread, user=self.user, content='Grandchild', parent=child)
+
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['status'], 'success')
+        self.assertEqual(len(data['replies']), 1)
+        self.assertEqual(data['replies'][0]['content'], 'Root')
+        self.assertEqual(data['replies'][0]['children'][0]['content'], 'Child')
+        self.assertEqual(data['replies'][0]['children'][0]['children'][0]['content'], 'Grandchild')
+        self.assertEqual(data['replies'][0]['user']['username'], 'poster')
+
+    def test_query_count_constant_as_tree_grows(self):
+        self._add_replies(6)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+        self._add_replies(60)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.json()['replies']), 2 + 20)
+
+
+# ====================================================================
+# D. TEST API THREAD LIST (CURSOR PAGINATION)
+# ====================================================================
+
+class ThreadListAPITest(TestCase):
+    """Menguji ThreadListCreateAPIView: cursor pagination, reply_count, dan jumlah query."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='feeder', password='password')
+        self.threads = [
+            Thread.objects.create(title=f'Thread {i}', content='Isi', user=self.user)
+            for i in range(5)
+        ]
+        Reply.objects.create(thread=self.threads[0], user=self.user, content='R1')
+        Reply.objects.create(thread=self.threads[0], user=self.user, content='R2')
+        self.url = reverse('community:api_thread_list_create')
+
+    def test_cursor_pagination_walks_all_threads_once(self):
+        seen = []
+        url = f'{self.url}?page_size=2'
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 2)
+            seen.extend(item['id'] for item in data['results'])
+            url = data['next']
+        self.assertEqual(sorted(seen), sorted(t.id for t in self.threads))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_reply_count_annotation(self):
+        data = self.client.get(self.url).json()
+        counts = {item['id']: item['reply_count'] for item in data['results']}
+        self.assertEqual(counts[self.threads[0].id], 2)
+        self.assertEqual(counts[self.threads[1].id], 0)
+
+    def test_query_count_does_not_grow_with_page(self):
+        with self.assertNumQueries(1):
+            self.client.get(f'{self.url}?page_size=2')
+        with self.assertNumQueries(1):
+            self.client.get(f'{self.url}?page_size=5')
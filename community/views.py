@@ -14,41 +14,63 @@ from django.views.decorators.http import require_POST
 from rest_framework import generics 
 from rest_framework.permissions import IsAuthenticated 
 from .serializers import ThreadSerializer
+from .pagination import ThreadCursorPagination
 from django.utils.decorators import method_decorator
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 
-def serialize_reply(reply, current_user):
+DEFAULT_AVATAR_URL = "https://thumbs.dreamstime.com/b/default-avatar-profile-trendy-style-social-media-user-icon-187599373.jpg"
+
+def serialize_author(user, date_created, date_format):
+    profile = getattr(user, 'user_profile', None)
+    return {
+        "username": user.username,
+        "display_name": profile.display_name if profile else user.username,
+        "profile_picture": getattr(profile.profile_picture, 'url', None) if profile and profile.profile_picture else DEFAULT_AVATAR_URL,
+        "time_ago": date_created.strftime(date_format)
+    }
+
+def serialize_reply(reply, current_user, children_map):
     return {
         "id": reply.id,
         "content": reply.content,
         "timestamp": reply.date_created.strftime("%Y-%m-%d %H:%M:%S"),
-        "is_mine": reply.user == current_user,
-        "user": {
-            "username": reply.user.username,
-            "display_name": getattr(reply.user, 'user_profile', None).display_name if hasattr(reply.user, 'user_profile') else reply.user.username,
-            "profile_picture": getattr(reply.user.user_profile.profile_picture, 'url', None) if hasattr(reply.user, 'user_profile') and reply.user.user_profile.profile_picture else "https://thumbs.dreamstime.com/b/default-avatar-profile-trendy-style-social-media-user-icon-187599373.jpg",
-            "time_ago": reply.date_created.strftime("%d %b %Y %H:%M")
-        },
-        "children": [serialize_reply(child, current_user) for child in reply.children.all().order_by('-date_created')]
+        "is_mine": reply.user_id == current_user.pk,
+        "user": serialize_author(reply.user, reply.date_created, "%d %b %Y %H:%M"),
+        "children": [serialize_reply(child, current_user, children_map) for child in children_map.get(reply.id, [])]
     }
 
+def build_reply_tree(thread):
+    """
+    Ambil seluruh reply sebuah thread dalam satu query (user + profile di-join),
+    lalu susun pohonnya di memori. Mengembalikan (top_level_replies, children_map).
+    """
+    replies = (
+        Reply.objects.filter(thread=thread)
+        .select_related('user', 'user__user_profile')
+        .order_by('-date_created', '-id')
+    )
+
+    top_level = []
+    children_map = {}
+    for reply in replies:
+        if reply.parent_id is None:
+            top_level.append(reply)
+        else:
+            children_map.setdefault(reply.parent_id, []).append(reply)
+    return top_level, children_map
+
 def api_thread_detail(request, id):
-    thread = get_object_or_404(Thread, pk=id)
-    top_level_replies = thread.replies.filter(parent__isnull=True).order_by('-date_created')
+    thread = get_object_or_404(Thread.objects.select_related('user', 'user__user_profile'), pk=id)
+    top_level_replies, children_map = build_reply_tree(thread)
 
     thread_data = {
         "id": thread.id,
         "title": thread.title,
         "content": thread.content,
-        "user": {
-            "username": thread.user.username,
-            "display_name": getattr(thread.user, 'user_profile', None).display_name if hasattr(thread.user, 'user_profile') else thread.user.username,
-            "profile_picture": getattr(thread.user.user_profile.profile_picture, 'url', None) if hasattr(thread.user, 'user_profile') and thread.user.user_profile.profile_picture else "https://thumbs.dreamstime.com/b/default-avatar-profile-trendy-style-social-media-user-icon-187599373.jpg",
-            "time_ago": thread.date_created.strftime("%d %B %Y %H:%M")
-        }
+        "user": serialize_author(thread.user, thread.date_created, "%d %B %Y %H:%M")
     }
 
-    replies_data = [serialize_reply(r, request.user) for r in top_level_replies]
+    replies_data = [serialize_reply(r, request.user, children_map) for r in top_level_replies]
 
     return JsonResponse({
         "status": "success",
@@ -285,8 +307,9 @@ class CsrfExemptSessionAuthentication(SessionAuthentication):
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ThreadListCreateAPIView(generics.ListCreateAPIView):
-    queryset = Thread.objects.all().order_by('-date_created')
+    queryset = Thread.objects.select_related('user').annotate(reply_count=Count('replies'))
     serializer_class = ThreadSerializer
+    pagination_class = ThreadCursorPagination
     permission_classes = []  
     authentication_classes = (CsrfExemptSessionAuthentication, BasicAuthentication)
     # Cek login manual
@@ -13,4 +13,11 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gymbuddy.settings')
 
-application = get_asgi_application()
\ No newline at end of file
+application = get_asgi_application()
+# View async (mis. user_profile.views.proxy_image_async) berbagi connection pool dan
+# request coalescing per event loop, jadi jalankan dengan worker ASGI, contoh:
+#   gunicorn gymbuddy.asgi:application -k uvicorn.workers.UvicornWorker
+
+# Index pencarian exercise tidak di-warm di sini: server ASGI meng-import modul ini di dalam
+# event loop, sehingga query ORM gagal (SynchronousOnlyOperation). Index dibangun saat
+# pencarian pertama (howto/search_index.get_index).
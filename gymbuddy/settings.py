@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
@@ -190,6 +191,44 @@ else:
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# Default local-memory (per proses); set REDIS_URL untuk cache bersama antar worker
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gymbuddy',
+        }
+    }
+
+# Cache katalog exercise (howto/catalog_cache.py)
+# Detik sebelum versi katalog dihitung ulang dari database (menangkap perubahan dari proses lain)
+CATALOG_VERSION_TTL = 300
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+# Exercise search (howto/search.py)
+# True: typeahead dijawab dari index n-gram in-memory; False: index database (pg_trgm / FTS5)
+EXERCISE_SEARCH_IN_MEMORY = True
+# Detik sebelum index in-memory dibangun ulang (menangkap perubahan dari proses lain)
+EXERCISE_SEARCH_INDEX_TTL = 300
+
+# Proxy gambar profil (user_profile/image_proxy.py)
+IMAGE_PROXY_CACHE_DIR = os.getenv('IMAGE_PROXY_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'gymbuddy-image-proxy'))
+IMAGE_PROXY_CACHE_MAX_BYTES = 200 * 1024 * 1024
+# Batas ukuran satu gambar dari upstream
+IMAGE_PROXY_MAX_BYTES = 5 * 1024 * 1024
+# Detik sebelum gambar di cache direvalidasi ke upstream
+IMAGE_PROXY_FRESH_SECONDS = 60 * 60
+# (connect, read) timeout ke upstream
+IMAGE_PROXY_TIMEOUT = (3.05, 10)
+
 # Auth URL
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = '/'
@@ -13,4 +13,11 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gymbuddy.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Bangun index pencarian exercise sekali per worker (howto/search_index.py)
+from django.db import connections  # noqa: E402
+from howto.search_index import warm_index  # noqa: E402
+warm_index()
+# Dengan --preload modul ini dimuat di master; jangan wariskan koneksi DB ke worker hasil fork
+connections.close_all()
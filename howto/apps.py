@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HowtoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'howto'
+
+    def ready(self):
+        from . import signals  # noqa: F401
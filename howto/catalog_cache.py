@@ -0,0 +1,61 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse
+
+from .models import Exercise
+
+CATALOG_VERSION_KEY = 'howto:catalog_version'
+
+
+# --- VERSI KATALOG ---
+def _catalog_fingerprint():
+    # Sama di semua worker untuk data yang sama, sehingga ETag konsisten antar proses
+    stats = Exercise.objects.aggregate(count=Count('id'), max_id=Max('id'), last_update=Max('updated_at'))
+    raw = f"{stats['count']}:{stats['max_id']}:{stats['last_update'].isoformat() if stats['last_update'] else ''}"
+    return hashlib.md5(raw.encode()).hexdigest()[:12]
+
+def get_catalog_version():
+    """
+    Versi katalog Exercise saat ini. Disimpan di cache; dengan cache local-memory
+    versi kedaluwarsa setelah CATALOG_VERSION_TTL agar perubahan dari proses lain
+    (mis. manage.py import_exercises) ikut terbaca.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = _catalog_fingerprint()
+        cache.set(CATALOG_VERSION_KEY, version, getattr(settings, 'CATALOG_VERSION_TTL', 300))
+    return version
+
+def bump_catalog_version():
+    """Dipanggil saat katalog berubah (save/delete Exercise, import)."""
+    cache.delete(CATALOG_VERSION_KEY)
+
+
+# --- CACHE RESPONSE ---
+def _request_key(request):
+    return hashlib.md5(request.get_full_path().encode()).hexdigest()[:12]
+
+def catalog_etag(request, *args, **kwargs):
+    """ETag untuk django.views.decorators.http.etag: versi katalog + URL (termasuk filter)."""
+    return f"{get_catalog_version()}-{_request_key(request)}"
+
+def cache_catalog_response(view_func):
+    """Simpan body JSON view katalog di cache, dengan key berisi versi katalog."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = f"howto:response:{get_catalog_version()}:{_request_key(request)}"
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, (response.content, response['Content-Type']),
+                      getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 60))
+        return response
+    return wrapper
@@ -0,0 +1,93 @@
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+# Thumbnail kotak (crop tengah) untuk list, dan lebar-lebar WebP untuk srcset
+THUMBNAIL_SIZE = (320, 320)
+SRCSET_WIDTHS = (480, 960)
+WEBP_QUALITY = 80
+
+
+# --- NAMA FILE VARIAN (disimpan di samping file asli) ---
+def variant_name(name, suffix):
+    """howto/images/squat.jpg -> howto/images/squat.<suffix>.webp"""
+    root, _ = os.path.splitext(name)
+    return f"{root}.{suffix}.webp"
+
+def thumbnail_name(name):
+    return variant_name(name, "thumb")
+
+def width_name(name, width):
+    return variant_name(name, f"w{width}")
+
+def variant_names(name):
+    return [thumbnail_name(name), *(width_name(name, w) for w in SRCSET_WIDTHS)]
+
+
+# --- URL ---
+def thumbnail_url(name, storage=default_storage):
+    return storage.url(thumbnail_name(name)) if name else None
+
+def srcset(name, storage=default_storage):
+    if not name:
+        return None
+    return ", ".join(f"{storage.url(width_name(name, w))} {w}w" for w in SRCSET_WIDTHS)
+
+
+# --- GENERATE ---
+def _save_webp(image, name, storage):
+    buffer = BytesIO()
+    image.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(buffer.getvalue()))
+
+def generate_variants(name, storage=default_storage):
+    """
+    Buat thumbnail + varian WebP untuk sebuah gambar di storage.
+    Gambar tidak pernah diperbesar; mengembalikan list nama file yang ditulis.
+    """
+    from PIL import Image, ImageOps
+
+    with storage.open(name, "rb") as f:
+        original = Image.open(f)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    if original.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in original.getbands() or "transparency" in original.info
+        original = original.convert("RGBA" if has_alpha else "RGB")
+
+    thumb = ImageOps.fit(original, THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    _save_webp(thumb, thumbnail_name(name), storage)
+    written = [thumbnail_name(name)]
+
+    for width in SRCSET_WIDTHS:
+        resized = original.copy()
+        resized.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+        _save_webp(resized, width_name(name, width), storage)
+        written.append(width_name(name, width))
+    return written
+
+def variants_exist(name, storage=default_storage):
+    return all(storage.exists(n) for n in variant_names(name))
+
+def ensure_variants(name, storage=default_storage, force=False):
+    """Dipanggil saat upload (signal) dan oleh backfill; gambar rusak hanya dicatat di log."""
+    if not name or (not force and variants_exist(name, storage)):
+        return []
+    try:
+        return generate_variants(name, storage)
+    except (OSError, ValueError) as e:
+        # PIL.UnidentifiedImageError turunan OSError
+        logger.warning("Could not generate image variants for %s: %s", name, e)
+        return []
+
+def has_variants(name, written, storage=default_storage):
+    """Apakah semua varian tersedia setelah ensure_variants (written = hasilnya)."""
+    return bool(written) or variants_exist(name, storage)
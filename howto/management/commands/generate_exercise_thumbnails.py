@@ -0,0 +1,57 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+from django.core.management.base import BaseCommand
+from howto.images import ensure_variants, has_variants
+from howto.models import Exercise
+
+
+def _init_worker():
+    # Untuk start method "spawn" (macOS/Windows); no-op jika proses di-fork
+    django.setup()
+
+def _generate(args):
+    name, force = args
+    written = ensure_variants(name, force=force)
+    return name, len(written), has_variants(name, written)
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail and WebP variants for existing Exercise images using a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerate variants even if they already exist')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        names = sorted(set(
+            Exercise.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True)
+        ))
+        jobs = [(name, options['force']) for name in names]
+
+        if options['workers'] > 1 and len(jobs) > 1:
+            # Worker hanya membaca/menulis file; koneksi database tidak ikut diwariskan
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                results = list(pool.map(_generate, jobs, chunksize=8))
+        else:
+            results = [_generate(job) for job in jobs]
+
+        generated = sum(1 for _, written, _ in results if written)
+        # Tandai exercise yang variannya tersedia agar URL thumbnail/srcset dipakai
+        available = [name for name, _, ok in results if ok]
+        Exercise.objects.filter(image__in=available).exclude(image_variants=True).update(image_variants=True)
+        Exercise.objects.exclude(image__in=available).exclude(image_variants=False).update(image_variants=False)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Generated variants for {generated} of {len(names)} images in {elapsed:.2f}s"
+            )
+        )
+#untuk jalanin:
+#python manage.py generate_exercise_thumbnails [--workers 4] [--force]
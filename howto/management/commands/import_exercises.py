@@ -1,34 +1,87 @@
+import time
+
 from django.core.management.base import BaseCommand
-from howto.utils.data_processor import load_dataset
+from django.db import transaction
+from django.utils import timezone
+from howto.utils.data_processor import BUNDLED_DATASETS, iter_exercises
 from howto.models import Exercise
+from howto.search import rebuild_search_index
+from howto.search_index import invalidate_index
+from howto.recommender import invalidate_recommender
+from howto.catalog_cache import bump_catalog_version
+
+IMPORT_FIELDS = ('main_muscle', 'equipment', 'instructions')
+NORMALIZED_FIELDS = ('normalized_muscle', 'equipment_category')
 
 class Command(BaseCommand):
-    help = 'Import exercise data from gym_exercises.csv into the database'
+    help = 'Import exercise data from the bundled CSV datasets into the database (bulk upsert by exercise name)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', action='append', dest='files',
+                            help='CSV file to import instead of the bundled datasets (can be repeated)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def read_rows(self, paths):
+        """Gabungkan semua CSV; nama yang muncul lebih dari sekali memakai baris pertama."""
+        rows = {}
+        total = 0
+        for path in paths:
+            for record in iter_exercises(str(path)):
+                total += 1
+                rows.setdefault(record['exercise_name'], {
+                    field: record.get(field) for field in IMPORT_FIELDS
+                })
+        return rows, total
 
     def handle(self, *args, **options):
-        df = load_dataset("howto/utils/gym_exercises.csv")
-
-        imported = 0
-        skipped = 0
-
-        for _, row in df.iterrows():
-            obj, created = Exercise.objects.get_or_create(
-                exercise_name=row['exercise_name'],
-                defaults={
-                    'main_muscle': row['main_muscle'],
-                    'equipment': row['equipment'],
-                    'instructions': row['instructions'],
-                }
-            )
-            if created:
-                imported += 1
-            else:
-                skipped += 1
+        started = time.perf_counter()
+        paths = options['files'] or BUNDLED_DATASETS
+        batch_size = options['batch_size']
+
+        rows, total = self.read_rows(paths)
+
+        existing = {
+            ex.exercise_name: ex
+            for ex in Exercise.objects.only('id', 'exercise_name', *IMPORT_FIELDS)
+        }
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        for name, values in rows.items():
+            ex = existing.get(name)
+            if ex is None:
+                ex = Exercise(exercise_name=name, **values)
+                # bulk_create tidak memicu pre_save
+                ex.fill_normalized_fields()
+                to_create.append(ex)
+            elif any(getattr(ex, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(ex, field, value)
+                ex.fill_normalized_fields()
+                # bulk_update tidak mengisi auto_now, padahal versi katalog membaca updated_at
+                ex.updated_at = now
+                to_update.append(ex)
+
+        with transaction.atomic():
+            Exercise.objects.bulk_create(to_create, batch_size=batch_size)
+            Exercise.objects.bulk_update(to_update, [*IMPORT_FIELDS, *NORMALIZED_FIELDS, 'updated_at'], batch_size=batch_size)
+
+        # bulk_create/bulk_update tidak memicu signal Exercise
+        if to_create or to_update:
+            rebuild_search_index()
+            invalidate_index()
+            invalidate_recommender()
+            bump_catalog_version()
 
+        elapsed = time.perf_counter() - started
+        unchanged = len(rows) - len(to_create) - len(to_update)
         self.stdout.write(
             self.style.SUCCESS(
-                f"✅ Imported {imported} new exercises, skipped {skipped} duplicates (total: {len(df)})"
+                f"✅ Imported {len(to_create)} new, updated {len(to_update)}, unchanged {unchanged} "
+                f"(unique: {len(rows)}, rows read: {total}) in {elapsed:.2f}s "
+                f"({total / elapsed if elapsed else 0:.0f} rows/s)"
             )
         )
 #untuk jalanin:
 #python manage.py import_exercises (lewat terminal)
+#python manage.py import_exercises --file path/ke/katalog.csv --batch-size 2000
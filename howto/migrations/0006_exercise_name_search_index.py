@@ -0,0 +1,61 @@
+from django.db import migrations, transaction
+from django.db.utils import DatabaseError
+
+# PostgreSQL: index GIN trigram untuk ILIKE '%q%' + ranking similarity.
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS howto_exercise_name_trgm_idx "
+    "ON howto_exercise USING gin (exercise_name gin_trgm_ops)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS howto_exercise_name_trgm_idx",
+]
+
+# SQLite: tabel FTS5 (tokenizer trigram), rowid = id Exercise, disinkronkan oleh signal Exercise (howto/signals.py) dan di-rebuild oleh import_exercises.
+# Sengaja tanpa trigger: SQLite schema editor Django membuat ulang tabel saat AlterField
+# sehingga trigger akan hilang diam-diam.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS howto_exercise_fts USING fts5(exercise_name, tokenize='trigram')",
+    "INSERT INTO howto_exercise_fts(rowid, exercise_name) SELECT id, exercise_name FROM howto_exercise",
+]
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS howto_exercise_fts",
+]
+
+
+def _run(schema_editor, statements):
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            for sql in statements:
+                schema_editor.execute(sql)
+    except DatabaseError:
+        # Mis. SQLite tanpa FTS5/trigram atau user DB tanpa izin CREATE EXTENSION:
+        # howto.search otomatis fallback ke icontains.
+        pass
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('howto', '0005_rename_bookmark_exercisefavorite_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:32
+
+from django.db import migrations, models
+
+from howto.utils.normalize import clean_text, equipment_category
+
+
+def fill_normalized_fields(apps, schema_editor):
+    Exercise = apps.get_model('howto', 'Exercise')
+    exercises = list(Exercise.objects.only('id', 'main_muscle', 'equipment'))
+    for ex in exercises:
+        ex.normalized_muscle = clean_text(ex.main_muscle)
+        ex.equipment_category = equipment_category(ex.equipment)
+    Exercise.objects.bulk_update(exercises, ['normalized_muscle', 'equipment_category'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('howto', '0006_exercise_name_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='equipment_category',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='normalized_muscle',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['normalized_muscle', 'equipment_category'], name='exercise_muscle_equip_idx'),
+        ),
+        migrations.RunPython(fill_normalized_fields, migrations.RunPython.noop),
+    ]
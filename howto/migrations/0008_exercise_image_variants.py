@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+from howto.images import variants_exist
+
+
+def mark_existing_variants(apps, schema_editor):
+    Exercise = apps.get_model('howto', 'Exercise')
+    names = set(Exercise.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True))
+    available = [name for name in names if variants_exist(name)]
+    Exercise.objects.filter(image__in=available).update(image_variants=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('howto', '0007_exercise_normalized_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='image_variants',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_existing_variants, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
 from django.conf import settings
 
+from . import images
+from .utils.normalize import clean_text, equipment_category
+
 class Exercise(models.Model):
     exercise_name = models.CharField(max_length=120)
     main_muscle = models.CharField(max_length=100)
@@ -9,12 +12,39 @@ class Exercise(models.Model):
     image = models.ImageField(upload_to='howto/images/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Diturunkan dari main_muscle / equipment saat disimpan (lihat signals.fill_normalized_fields)
+    normalized_muscle = models.CharField(max_length=100, blank=True, default='', editable=False)
+    equipment_category = models.CharField(max_length=100, blank=True, default='', editable=False, db_index=True)
+    # True jika thumbnail/WebP untuk image sudah dibuat (diisi signal & generate_exercise_thumbnails)
+    image_variants = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return self.exercise_name
 
+    @property
+    def thumbnail_url(self):
+        # Tanpa varian (belum di-generate / gagal) pakai gambar asli
+        if not self.image:
+            return None
+        if not self.image_variants:
+            return self.image.url
+        return images.thumbnail_url(self.image.name, self.image.storage)
+
+    @property
+    def image_srcset(self):
+        if not self.image or not self.image_variants:
+            return None
+        return images.srcset(self.image.name, self.image.storage)
+
+    def fill_normalized_fields(self):
+        self.normalized_muscle = clean_text(self.main_muscle)
+        self.equipment_category = equipment_category(self.equipment)
+
     class Meta:
         ordering = ['main_muscle', 'exercise_name']
+        indexes = [
+            models.Index(fields=['normalized_muscle', 'equipment_category'], name='exercise_muscle_equip_idx'),
+        ]
 
 
 class ExerciseFavorite(models.Model):
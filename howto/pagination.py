@@ -0,0 +1,84 @@
+import base64
+import json
+
+from django.db.models import Q
+
+# Urutan stabil untuk paginasi katalog (ordering Meta Exercise + id sebagai tie-breaker)
+EXERCISE_ORDERING = ('main_muscle', 'exercise_name', 'id')
+MAX_LIMIT = 100
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def _page_url(request, **params):
+    query = request.GET.copy()
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+def parse_limit(request, default=None):
+    value = request.GET.get('limit')
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise PaginationError("Invalid limit")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+# --- LIMIT / OFFSET ---
+def paginate_offset(request, qs, limit):
+    """Halaman ?limit=&offset=; mengembalikan (rows, meta) dengan count, next, previous."""
+    try:
+        offset = max(0, int(request.GET.get('offset', 0)))
+    except ValueError:
+        raise PaginationError("Invalid offset")
+
+    count = qs.count()
+    rows = list(qs.order_by(*EXERCISE_ORDERING)[offset:offset + limit])
+    meta = {
+        "count": count,
+        "next": _page_url(request, offset=offset + limit) if offset + limit < count else None,
+        "previous": _page_url(request, offset=max(0, offset - limit)) if offset > 0 else None,
+    }
+    return rows, meta
+
+
+# --- CURSOR (KEYSET) ---
+def encode_cursor(ex):
+    raw = json.dumps([ex.main_muscle, ex.exercise_name, ex.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(value):
+    try:
+        main_muscle, exercise_name, pk = json.loads(base64.urlsafe_b64decode(value.encode()))
+        return str(main_muscle), str(exercise_name), int(pk)
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+def paginate_cursor(request, qs, limit):
+    """
+    Halaman ?cursor= (kosong untuk halaman pertama). Tanpa COUNT/OFFSET: baris diambil
+    setelah posisi (main_muscle, exercise_name, id) terakhir halaman sebelumnya.
+    """
+    cursor = request.GET.get('cursor')
+    if cursor:
+        main_muscle, exercise_name, pk = decode_cursor(cursor)
+        qs = qs.filter(
+            Q(main_muscle__gt=main_muscle)
+            | Q(main_muscle=main_muscle, exercise_name__gt=exercise_name)
+            | Q(main_muscle=main_muscle, exercise_name=exercise_name, id__gt=pk)
+        )
+
+    # Ambil satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+    rows = list(qs.order_by(*EXERCISE_ORDERING)[:limit + 1])
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    meta = {"next": _page_url(request, cursor=encode_cursor(rows[-1])) if has_next else None}
+    return rows, meta
@@ -0,0 +1,92 @@
+import itertools
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+
+from .models import Exercise
+from .utils.data_processor import BUNDLED_DATASETS, MuscleIndex, iter_exercises, muscle_tokens
+
+# Jumlah hasil rekomendasi (query, limit) yang disimpan per proses
+RESULT_CACHE_SIZE = 512
+
+
+def _dataset_muscles():
+    # Target/synergist muscle hanya ada di CSV, tidak disimpan di model Exercise
+    muscles = {}
+    for path in BUNDLED_DATASETS:
+        if not path.exists():
+            continue
+        for row in iter_exercises(str(path)):
+            muscles.setdefault(row['exercise_name'], (row.get('target_muscle'), row.get('synergist_muscle')))
+    return muscles
+
+
+def catalog_rows():
+    """Baris katalog untuk MuscleIndex: data Exercise + target/synergist dari dataset (cocok per nama)."""
+    muscles = _dataset_muscles()
+    rows = []
+    for row in Exercise.objects.order_by('id').values('id', 'exercise_name', 'main_muscle', 'equipment'):
+        row['target_muscle'], row['synergist_muscle'] = muscles.get(row['exercise_name'], ('', ''))
+        rows.append(row)
+    return rows
+
+
+# --- INDEX PER PROSES ---
+_build_lock = threading.Lock()
+_generation = itertools.count()
+_index = None
+_built_at = 0.0
+_index_generation = None
+
+def _expired(built_at):
+    max_age = getattr(settings, 'EXERCISE_SEARCH_INDEX_TTL', 300)
+    return time.monotonic() - built_at > max_age
+
+def build_recommender():
+    global _index, _built_at, _index_generation
+    index = MuscleIndex(catalog_rows())
+    _index, _built_at, _index_generation = index, time.monotonic(), next(_generation)
+    _cached_recommend.cache_clear()
+    return index, _index_generation
+
+def get_recommender():
+    """(MuscleIndex, generation); generation berubah setiap index dibangun ulang."""
+    index, built_at, generation = _index, _built_at, _index_generation
+    if index is None or _expired(built_at):
+        with _build_lock:
+            index, built_at, generation = _index, _built_at, _index_generation
+            if index is None or _expired(built_at):
+                index, generation = build_recommender()
+    return index, generation
+
+def invalidate_recommender():
+    global _index
+    _index = None
+    _cached_recommend.cache_clear()
+
+
+# --- REKOMENDASI ---
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _cached_recommend(index, generation, tokens, limit):
+    # index diberikan pemanggil (bukan diambil ulang di sini), jadi hasil selalu dari index yang
+    # sama dengan generation di key; hasil dari index lama tidak pernah terpakai lagi
+    return tuple(
+        {
+            "id": index.rows[pos]['id'],
+            "exercise_name": index.rows[pos]['exercise_name'],
+            "main_muscle": index.rows[pos]['main_muscle'],
+            "equipment": index.rows[pos]['equipment'],
+            "score": score,
+        }
+        for pos, score in index.recommend(" ".join(tokens), limit)
+    )
+
+def recommend_for_muscle(muscle_query, limit=10):
+    """Rekomendasi exercise untuk sebuah otot (nama umum atau ilmiah), terurut berdasarkan skor peran."""
+    tokens = tuple(sorted(set(muscle_tokens(muscle_query))))
+    if not tokens:
+        return []
+    index, generation = get_recommender()
+    return [dict(item) for item in _cached_recommend(index, generation, tokens, limit)]
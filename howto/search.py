@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Length
+
+from .models import Exercise
+from .search_index import get_index
+
+# Tabel FTS5 SQLite (lihat migration 0006_exercise_name_search_index)
+FTS_TABLE = 'howto_exercise_fts'
+# Tokenizer trigram FTS5 hanya bisa mencocokkan query minimal 3 karakter
+FTS_MIN_LENGTH = 3
+
+
+# --- BACKEND PENCARIAN ---
+def _icontains_search(query, limit):
+    # Fallback: nama yang diawali query di atas, lalu nama terpendek
+    return list(
+        Exercise.objects.filter(exercise_name__icontains=query)
+        .annotate(prefix_rank=Case(
+            When(exercise_name__istartswith=query, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+        .order_by('prefix_rank', Length('exercise_name'), 'exercise_name')
+        .values_list('id', 'exercise_name')[:limit]
+    )
+
+def _postgres_search(query, limit):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    # ILIKE '%q%' dilayani index GIN gin_trgm_ops, ranking dengan similarity pg_trgm
+    return list(
+        Exercise.objects.filter(exercise_name__icontains=query)
+        .annotate(rank=TrigramWordSimilarity(query, 'exercise_name'))
+        .order_by('-rank', Length('exercise_name'), 'exercise_name')
+        .values_list('id', 'exercise_name')[:limit]
+    )
+
+def _sqlite_search(query, limit):
+    if len(query) < FTS_MIN_LENGTH:
+        return _icontains_search(query, limit)
+
+    phrase = '"%s"' % query.replace('"', '""')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, exercise_name FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            "ORDER BY rank, length(exercise_name) LIMIT %s",
+            [phrase, limit],
+        )
+        return [tuple(row) for row in cursor.fetchall()]
+
+BACKENDS = {
+    'postgresql': _postgres_search,
+    'sqlite': _sqlite_search,
+}
+
+def search_exercises_db(query, limit=10):
+    """Pencarian lewat index database (pg_trgm / FTS5), untuk katalog yang terlalu besar di memori."""
+    backend = BACKENDS.get(connection.vendor, _icontains_search)
+    try:
+        with transaction.atomic():
+            return backend(query, limit)
+    except DatabaseError:
+        # Index pencarian belum tersedia (mis. pg_trgm / FTS5 tidak terpasang)
+        return _icontains_search(query, limit)
+
+def search_exercises(query, limit=10):
+    """
+    Cari exercise berdasarkan nama, terurut dari yang paling relevan.
+    Mengembalikan list (id, exercise_name).
+    """
+    if getattr(settings, 'EXERCISE_SEARCH_IN_MEMORY', True):
+        return get_index().search(query, limit)
+    return search_exercises_db(query, limit)
+
+
+# --- SINKRONISASI INDEX FTS (SQLite) ---
+def _execute_fts(statements):
+    if connection.vendor != 'sqlite':
+        return
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql, params in statements:
+                cursor.execute(sql, params)
+    except DatabaseError:
+        pass
+
+def index_exercise(exercise):
+    _execute_fts([
+        (f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [exercise.pk]),
+        (f"INSERT INTO {FTS_TABLE}(rowid, exercise_name) VALUES (%s, %s)", [exercise.pk, exercise.exercise_name]),
+    ])
+
+def unindex_exercise(exercise_id):
+    _execute_fts([
+        (f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [exercise_id]),
+    ])
+
+def rebuild_search_index():
+    """Bangun ulang index FTS dari tabel Exercise (dipanggil setelah import_exercises)."""
+    _execute_fts([
+        (f"DELETE FROM {FTS_TABLE}", []),
+        (f"INSERT INTO {FTS_TABLE}(rowid, exercise_name) SELECT id, exercise_name FROM {Exercise._meta.db_table}", []),
+    ])
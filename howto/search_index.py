@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from .models import Exercise
+
+logger = logging.getLogger(__name__)
+
+# Panjang n-gram yang di-index: 2 untuk query pendek typeahead, 3 untuk sisanya
+NGRAM_SIZES = (2, 3)
+EMPTY = frozenset()
+
+
+def _ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class ExerciseNameIndex:
+    """
+    Index n-gram in-memory untuk nama exercise. Katalog kecil dan hampir read-only
+    (admin tidak bisa add/change/delete), jadi typeahead dijawab tanpa query ke database.
+    """
+
+    def __init__(self, rows):
+        # Diurutkan (panjang, nama) sekali di sini, sehingga urutan posisi = urutan ranking
+        self.entries = sorted(
+            ((exercise_id, name, name.lower()) for exercise_id, name in rows),
+            key=lambda entry: (len(entry[1]), entry[1]),
+        )
+        postings = defaultdict(list)
+        for pos, (_, _, lowered) in enumerate(self.entries):
+            for n in NGRAM_SIZES:
+                for gram in _ngrams(lowered, n):
+                    postings[gram].append(pos)
+        self.postings = {gram: frozenset(positions) for gram, positions in postings.items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _candidates(self, query):
+        if len(query) < NGRAM_SIZES[0]:
+            return range(len(self.entries))
+        n = min(len(query), NGRAM_SIZES[-1])
+        postings = sorted((self.postings.get(gram, EMPTY) for gram in _ngrams(query, n)), key=len)
+        return sorted(postings[0].intersection(*postings[1:]))
+
+    def search(self, query, limit=10):
+        """List (id, exercise_name) yang mengandung query; diawali query dulu, lalu nama terpendek."""
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        prefix, other = [], []
+        for pos in self._candidates(query):
+            exercise_id, name, lowered = self.entries[pos]
+            if lowered.startswith(query):
+                prefix.append((exercise_id, name))
+                if len(prefix) == limit:
+                    break
+            elif len(other) < limit and query in lowered:
+                other.append((exercise_id, name))
+        return (prefix + other)[:limit]
+
+
+# --- INDEX PER PROSES ---
+_build_lock = threading.Lock()
+_index = None
+_built_at = 0.0
+
+def _expired(built_at):
+    # Worker lain tidak menerima signal dari proses ini, jadi index juga kedaluwarsa berkala
+    max_age = getattr(settings, 'EXERCISE_SEARCH_INDEX_TTL', 300)
+    return time.monotonic() - built_at > max_age
+
+def build_index():
+    global _index, _built_at
+    index = ExerciseNameIndex(Exercise.objects.order_by().values_list('id', 'exercise_name'))
+    _index, _built_at = index, time.monotonic()
+    return index
+
+def get_index():
+    index, built_at = _index, _built_at
+    if index is None or _expired(built_at):
+        with _build_lock:
+            index, built_at = _index, _built_at
+            if index is None or _expired(built_at):
+                index = build_index()
+    return index
+
+def invalidate_index():
+    """Tandai index usang; dibangun ulang pada pencarian berikutnya."""
+    global _index
+    _index = None
+
+def warm_index():
+    """Bangun index saat worker start agar request pertama tidak menanggung biayanya."""
+    try:
+        build_index()
+    except DatabaseError:
+        # Mis. migrate belum dijalankan; index dibangun saat pencarian pertama
+        logger.warning("Exercise search index not warmed: database not ready")
@@ -1,11 +1,35 @@
 from .models import Exercise
 
-def exercise_to_dict(ex: Exercise):
-    return {
-        "id": ex.id,
-        "exercise_name": ex.exercise_name,
-        "main_muscle": ex.main_muscle,
-        "equipment": ex.equipment,
-        "instructions": ex.instructions,
-        "image": ex.image.url if ex.image else None,
-    }
+# Field yang bisa dipilih lewat ?fields= (urutan = urutan di JSON)
+EXERCISE_FIELDS = ("id", "exercise_name", "main_muscle", "equipment", "instructions", "image", "thumbnail", "srcset")
+# Kolom model yang dibutuhkan field turunan
+FIELD_COLUMNS = {"thumbnail": ("image", "image_variants"), "srcset": ("image", "image_variants")}
+
+def _field_value(ex: Exercise, field):
+    if field == "image":
+        return ex.image.url if ex.image else None
+    if field == "thumbnail":
+        return ex.thumbnail_url
+    if field == "srcset":
+        return ex.image_srcset
+    return getattr(ex, field)
+
+def exercise_columns(fields):
+    """Kolom model untuk .only() dari daftar field serializer."""
+    return {column for f in fields if f != "id" for column in FIELD_COLUMNS.get(f, (f,))}
+
+def exercise_to_dict(ex: Exercise, fields=EXERCISE_FIELDS):
+    return {field: _field_value(ex, field) for field in fields}
+
+def parse_exercise_fields(value):
+    """
+    Parse parameter ?fields=id,exercise_name. Mengembalikan tuple field
+    (urutan EXERCISE_FIELDS), atau raise ValueError untuk field yang tidak dikenal.
+    """
+    if not value:
+        return EXERCISE_FIELDS
+    requested = {f.strip() for f in value.split(",") if f.strip()}
+    unknown = requested - set(EXERCISE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return tuple(f for f in EXERCISE_FIELDS if f in requested)
@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Exercise
+from . import search
+from .search_index import invalidate_index
+from .recommender import invalidate_recommender
+from .catalog_cache import bump_catalog_version
+from .images import ensure_variants, has_variants
+
+
+def _invalidate_catalog():
+    invalidate_index()
+    invalidate_recommender()
+    bump_catalog_version()
+    # Sekali lagi setelah commit, agar rebuild bersamaan tidak menyimpan data sebelum commit
+    transaction.on_commit(invalidate_index)
+    transaction.on_commit(invalidate_recommender)
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(pre_save, sender=Exercise)
+def fill_normalized_fields(sender, instance, **kwargs):
+    instance.fill_normalized_fields()
+
+
+@receiver(post_save, sender=Exercise)
+def sync_exercise_search(sender, instance, **kwargs):
+    search.index_exercise(instance)
+    _invalidate_catalog()
+
+
+@receiver(post_save, sender=Exercise)
+def generate_image_variants(sender, instance, **kwargs):
+    # Thumbnail/WebP dibuat sekali saat gambar di-upload; yang lama diisi lewat generate_exercise_thumbnails
+    available = False
+    if instance.image:
+        written = ensure_variants(instance.image.name, instance.image.storage)
+        available = has_variants(instance.image.name, written, instance.image.storage)
+    if instance.image_variants != available:
+        # update() agar tidak memicu signal post_save lagi
+        Exercise.objects.filter(pk=instance.pk).update(image_variants=available)
+        instance.image_variants = available
+
+
+@receiver(post_delete, sender=Exercise)
+def remove_exercise_search(sender, instance, **kwargs):
+    search.unindex_exercise(instance.pk)
+    _invalidate_catalog()
@@ -1,6 +1,27 @@
-from django.test import TestCase, Client
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from .models import Exercise
+from .catalog_cache import get_catalog_version
+from .images import thumbnail_name, variant_names, width_name
+from .search import rebuild_search_index, search_exercises
+from .search_index import ExerciseNameIndex, build_index, get_index
+from .recommender import _cached_recommend, invalidate_recommender, recommend_for_muscle
+from .utils.data_processor import BUNDLED_DATASETS, MuscleIndex, iter_exercises, recommend_exercises
+from .utils.normalize import clean_text, equipment_category, match_prefix
 
 
 class ExerciseViewsTest(TestCase):
@@ -57,3 +78,641 @@ class ExerciseViewsTest(TestCase):
         url = reverse('howto:exercise_detail', args=[9999])  # id fiktif
         response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
+
+
+class ExerciseSearchTest(TestCase):
+    def setUp(self):
+        for name in ["Barbell Bench Press", "Bench Dip", "Incline Dumbbell Bench Press", "Squat"]:
+            Exercise.objects.create(exercise_name=name, main_muscle="Chest")
+
+    def _names(self, query, limit=10):
+        return [name for _, name in search_exercises(query, limit)]
+
+    def test_search_matches_substring_case_insensitive(self):
+        names = self._names("bench")
+        self.assertEqual(len(names), 3)
+        self.assertNotIn("Squat", names)
+
+    def test_search_respects_limit(self):
+        self.assertEqual(len(self._names("bench", limit=2)), 2)
+
+    def test_short_query_uses_fallback(self):
+        """Query 2 karakter tetap bisa dicari (di bawah batas tokenizer trigram)."""
+        self.assertEqual(self._names("sq"), ["Squat"])
+
+    def test_index_follows_save_and_delete(self):
+        """Index pencarian ikut berubah saat Exercise disimpan atau dihapus."""
+        squat = Exercise.objects.get(exercise_name="Squat")
+        squat.exercise_name = "Goblet Squat"
+        squat.save()
+        self.assertEqual(self._names("goblet"), ["Goblet Squat"])
+
+        squat.delete()
+        self.assertEqual(self._names("squat"), [])
+
+    def test_rebuild_search_index(self):
+        rebuild_search_index()
+        self.assertEqual(len(self._names("press")), 2)
+
+
+@override_settings(EXERCISE_SEARCH_IN_MEMORY=False)
+class DatabaseExerciseSearchTest(ExerciseSearchTest):
+    """Test yang sama untuk backend index database (pg_trgm / FTS5)."""
+
+
+class ExerciseNameIndexTest(TestCase):
+    def setUp(self):
+        for name in ["Bench Press", "Barbell Bench Press", "Dips", "Squat"]:
+            Exercise.objects.create(exercise_name=name, main_muscle="Chest")
+
+    def test_typeahead_does_not_query_database(self):
+        build_index()
+        with self.assertNumQueries(0):
+            results = search_exercises("bench")
+        self.assertEqual([name for _, name in results], ["Bench Press", "Barbell Bench Press"])
+
+    def test_two_character_query(self):
+        index = ExerciseNameIndex([(1, "Dips"), (2, "Squat"), (3, "Lat Pulldown")])
+        self.assertEqual(index.search("ip"), [(1, "Dips")])
+        self.assertEqual(index.search("xx"), [])
+
+    def test_save_signal_invalidates_index(self):
+        build_index()
+        Exercise.objects.create(exercise_name="Bench Dip", main_muscle="Triceps")
+        self.assertIn("Bench Dip", [name for _, name in search_exercises("bench dip")])
+
+    @override_settings(EXERCISE_SEARCH_INDEX_TTL=0)
+    def test_expired_index_is_rebuilt(self):
+        index = get_index()
+        time.sleep(0.01)
+        self.assertIsNot(get_index(), index)
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), "Set RUN_BENCHMARKS=1 untuk menjalankan benchmark.")
+class BenchmarkExerciseSearch(TestCase):
+    """Membandingkan typeahead index in-memory dengan query icontains."""
+
+    EXERCISE_COUNT = 20_000
+    QUERIES = ["be", "bench", "press", "curl", "barbell row", "xyz"]
+
+    @classmethod
+    def setUpTestData(cls):
+        words = ["Barbell", "Dumbbell", "Cable", "Lever", "Incline", "Decline", "Bench", "Press",
+                 "Curl", "Row", "Fly", "Squat", "Lunge", "Raise", "Pulldown", "Extension"]
+        Exercise.objects.bulk_create([
+            Exercise(
+                exercise_name=f"{words[i % 16]} {words[(i // 16) % 16]} {words[(i // 256) % 16]} {i}",
+                main_muscle="Chest",
+            )
+            for i in range(cls.EXERCISE_COUNT)
+        ], batch_size=1000)
+
+    def _time(self, func, rounds=20):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for query in self.QUERIES:
+                func(query)
+        return (time.perf_counter() - started) / (rounds * len(self.QUERIES))
+
+    def test_compare_index_and_icontains(self):
+        index = build_index()
+        icontains = lambda q: list(Exercise.objects.filter(exercise_name__icontains=q).values_list('id', 'exercise_name')[:10])
+        index_time = self._time(lambda q: index.search(q, 10))
+        db_time = self._time(icontains)
+        print(
+            f"\n[benchmark] {self.EXERCISE_COUNT} exercises: in-memory {index_time * 1000:.3f} ms/query, "
+            f"icontains {db_time * 1000:.3f} ms/query ({db_time / index_time:.1f}x)"
+        )
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        Exercise.objects.create(exercise_name="Push-Up", main_muscle="Chest", equipment="Body Weight")
+        self.urls = [
+            reverse('howto:exercise_list_api'),
+            reverse('howto:exercise_options_api'),
+            reverse('howto:muscle_list_api'),
+            reverse('howto:equipment_list_api'),
+            reverse('user_profile:favorite_workouts_api'),
+        ]
+
+    def test_etag_and_not_modified(self):
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn('ETag', response)
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response.content, b'')
+
+    def test_cached_response_skips_database(self):
+        url = reverse('howto:exercise_list_api')
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.content, second.content)
+
+    def test_filters_have_separate_etags(self):
+        url = reverse('howto:exercise_list_api')
+        self.assertNotEqual(self.client.get(url)['ETag'], self.client.get(url, {'muscle': 'Legs'})['ETag'])
+
+    def test_catalog_change_bumps_version(self):
+        url = reverse('howto:exercise_list_api')
+        before = self.client.get(url)
+        Exercise.objects.create(exercise_name="Squat", main_muscle="Legs", equipment="Barbell")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], before['ETag'])
+        self.assertEqual(len(response.json()), 2)
+
+    def test_version_is_deterministic(self):
+        version = get_catalog_version()
+        cache.clear()
+        self.assertEqual(get_catalog_version(), version)
+
+
+class ExerciseFilterAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        Exercise.objects.create(exercise_name="Lever Row", main_muscle="Back\u200b ", equipment="Lever (Plate Loaded)")
+        Exercise.objects.create(exercise_name="Assisted Dip", main_muscle="Chest", equipment="Assisted (Machine)")
+        Exercise.objects.create(exercise_name="Self-Assisted Dip", main_muscle="Chest", equipment="Self-Assisted")
+        Exercise.objects.create(exercise_name="Neck Stretch", main_muscle="Neck", equipment="Stretch")
+
+    def names(self, **params):
+        response = self.client.get(reverse('howto:exercise_list_api'), params)
+        return sorted(row['exercise_name'] for row in response.json())
+
+    def test_normalized_fields_are_stored(self):
+        ex = Exercise.objects.get(exercise_name="Lever Row")
+        self.assertEqual((ex.normalized_muscle, ex.equipment_category), ("Back", "Lever"))
+
+        ex.equipment = "Cable (pull side)"
+        ex.save()
+        ex.refresh_from_db()
+        self.assertEqual(ex.equipment_category, "Cable")
+
+    def test_filters_use_equality_lookups(self):
+        self.assertEqual(self.names(equipment="lever"), ["Lever Row"])
+        self.assertEqual(self.names(equipment="Assisted"), ["Assisted Dip"])
+        self.assertEqual(self.names(equipment="Stretch"), ["Neck Stretch"])
+        self.assertEqual(self.names(equipment="stretch"), ["Neck Stretch"])
+        self.assertEqual(self.names(muscle="Back"), ["Lever Row"])
+        self.assertEqual(self.names(muscle="Chest", equipment="Self-Assisted"), ["Self-Assisted Dip"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.names(muscle="Chest", equipment="Assisted")
+        sql = " ".join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn("LIKE", sql.upper())
+
+    def test_options_are_distinct_categories(self):
+        get_catalog_version()
+        # Satu DISTINCT untuk otot, satu untuk kategori equipment
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('howto:exercise_options_api'))
+        self.assertEqual(response.json(), {
+            "muscles": ["Back", "Chest", "Neck"],
+            "equipments": ["Assisted", "Lever", "Self-Assisted", "Stretch"],
+        })
+
+
+class ExerciseListPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('howto:exercise_list_api')
+        for i in range(25):
+            Exercise.objects.create(
+                exercise_name=f"Move {i % 5}", main_muscle=["Back", "Chest", "Legs"][i % 3],
+                equipment="Cable", instructions="Long instructions " * 20,
+            )
+        self.expected_ids = list(
+            Exercise.objects.order_by('main_muscle', 'exercise_name', 'id').values_list('id', flat=True)
+        )
+
+    def test_without_params_returns_full_array(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(len(data), 25)
+        self.assertIn("instructions", data[0])
+
+    def test_fields_selection(self):
+        data = self.client.get(self.url, {'fields': 'id,exercise_name,main_muscle'}).json()
+        self.assertEqual(set(data[0]), {"id", "exercise_name", "main_muscle"})
+        self.assertEqual(self.client.get(self.url, {'fields': 'id,password'}).status_code, 400)
+
+    def test_limit_offset(self):
+        data = self.client.get(self.url, {'limit': 10, 'offset': 20, 'fields': 'id'}).json()
+        self.assertEqual(data['count'], 25)
+        self.assertEqual([row['id'] for row in data['results']], self.expected_ids[20:])
+        self.assertIsNone(data['next'])
+        self.assertIn("offset=10", data['previous'])
+
+    def test_cursor_walks_all_pages(self):
+        ids, url, params = [], self.url, {'cursor': '', 'limit': 7, 'fields': 'id,exercise_name'}
+        while url:
+            data = self.client.get(url, params).json()
+            self.assertNotIn("count", data)
+            ids += [row['id'] for row in data['results']]
+            url, params = data['next'], None
+        self.assertEqual(ids, self.expected_ids)
+
+    def test_cursor_pages_respect_filters(self):
+        data = self.client.get(self.url, {'cursor': '', 'limit': 3, 'muscle': 'Chest'}).json()
+        data = self.client.get(data['next']).json()
+        self.assertTrue(all(row['main_muscle'] == "Chest" for row in data['results']))
+
+    def test_invalid_params(self):
+        for params in ({'limit': 'x'}, {'limit': 5, 'offset': 'y'}, {'cursor': 'not-a-cursor'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+
+class ExerciseListPageTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('howto:exercise_list')
+        for i in range(30):
+            Exercise.objects.create(exercise_name=f"Row {i:02d}", main_muscle="Back", equipment="Cable")
+        Exercise.objects.create(exercise_name="Bench Press", main_muscle="Chest", equipment="Barbell")
+
+    def test_paginates_with_filters(self):
+        response = self.client.get(self.url, {'muscle': 'Back'})
+        self.assertContains(response, "Row 00")
+        self.assertNotContains(response, "Row 24")
+        self.assertContains(response, "Page 1 of 2")
+        self.assertContains(response, "?muscle=Back&amp;page=2")
+
+        response = self.client.get(self.url, {'muscle': 'Back', 'page': 2})
+        self.assertContains(response, "Row 29")
+        self.assertNotContains(response, "Row 00")
+        self.assertNotContains(response, "Bench Press")
+
+    def test_cached_fragments_skip_catalog_queries(self):
+        self.client.get(self.url, {'page': 2})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'page': 2})
+        self.assertContains(response, "Page 2 of 2")
+        self.assertFalse([q for q in ctx.captured_queries if 'howto_exercise' in q['sql']])
+
+    def test_catalog_change_invalidates_fragments(self):
+        self.assertNotContains(self.client.get(self.url, {'muscle': 'Chest'}), "Incline Press")
+        Exercise.objects.create(exercise_name="Incline Press", main_muscle="Chest", equipment="Dumbbell")
+
+        response = self.client.get(self.url, {'muscle': 'Chest'})
+        self.assertContains(response, "Incline Press")
+        self.assertContains(response, '<option value="Dumbbell"')
+
+
+class ImportExercisesCommandTest(TestCase):
+    HEADER = "Exercise Name,Equipment,Preparation,Execution,Target_Muscles,Synergist_Muscles,Main_muscle\n"
+
+    def write_csv(self, rows):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8')
+        handle.write(self.HEADER + "".join(rows))
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def run_import(self, *paths):
+        out = StringIO()
+        call_command('import_exercises', *[f'--file={path}' for path in paths], stdout=out)
+        return out.getvalue()
+
+    def test_import_is_idempotent(self):
+        path = self.write_csv([
+            "Squat,Barbell,Stand.,Squat down.,Quads,Glutes,Legs\n",
+            "Push Up,Body Weight,Lie down.,Push.,Chest,Triceps,Chest\n",
+            "Squat,Dumbbell,Stand.,Squat down.,Quads,Glutes,Legs\n",
+        ])
+        self.assertIn("Imported 2 new, updated 0, unchanged 0", self.run_import(path))
+        self.assertEqual(Exercise.objects.count(), 2)
+        # Nama duplikat: baris pertama yang dipakai
+        self.assertEqual(Exercise.objects.get(exercise_name="Squat").equipment, "Barbell")
+
+        self.assertIn("Imported 0 new, updated 0, unchanged 2", self.run_import(path))
+        self.assertEqual(Exercise.objects.count(), 2)
+
+    def test_changed_rows_are_updated(self):
+        path = self.write_csv(["Squat,Barbell,Stand.,Squat down.,Quads,Glutes,Legs\n"])
+        self.run_import(path)
+        version = get_catalog_version()
+        search_exercises("squ")
+
+        changed = self.write_csv([
+            "Squat,Smith Machine,Stand.,Squat down.,Quads,Glutes,Legs\n",
+            "Lunge,Body Weight,Stand.,Step forward.,Quads,Glutes,Legs\n",
+        ])
+        self.assertIn("Imported 1 new, updated 0, unchanged 1", self.run_import(path, changed))
+        self.assertEqual(Exercise.objects.get(exercise_name="Squat").equipment, "Barbell")
+
+        self.assertIn("Imported 0 new, updated 1, unchanged 1", self.run_import(changed))
+        squat = Exercise.objects.get(exercise_name="Squat")
+        self.assertEqual((squat.equipment, squat.equipment_category), ("Smith Machine", "Smith"))
+        self.assertEqual(Exercise.objects.get(exercise_name="Lunge").equipment_category, "Body Weight")
+        self.assertNotEqual(get_catalog_version(), version)
+        self.assertEqual([name for _, name in search_exercises("lung")], ["Lunge"])
+
+    def test_imports_bundled_datasets(self):
+        self.run_import()
+        self.assertTrue(Exercise.objects.filter(equipment="Stretch").exists())
+        self.assertFalse(Exercise.objects.filter(exercise_name__in=["nan", "Nan", ""]).exists())
+        count = Exercise.objects.count()
+        self.run_import()
+        self.assertEqual(Exercise.objects.count(), count)
+
+
+class StreamingLoaderTest(TestCase):
+    def test_rows_are_normalized(self):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8')
+        handle.write(
+            "Exercise Name,Equipment,Variation,Preparation,Execution,Target_Muscles,Synergist_Muscles,Main_muscle\n"
+            "barbell squat,barbell,No,Stand.,Squat down.,quadriceps,,legs\n"
+            ",,,,,,,\n"
+        )
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+
+        rows = list(iter_exercises(handle.name))
+        self.assertEqual(rows, [{
+            'exercise_name': 'Barbell Squat',
+            'equipment': 'Barbell',
+            'preparation': 'Stand.',
+            'execution': 'Squat down.',
+            'target_muscle': 'Quadriceps',
+            'synergist_muscle': '',
+            'main_muscle': 'Legs',
+            'instructions': 'Stand. Squat down.',
+        }])
+
+    def test_module_does_not_import_pandas(self):
+        code = "import sys, howto.utils.data_processor; print('pandas' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.stdout.strip(), 'False', result.stderr)
+
+
+class MuscleIndexTest(TestCase):
+    rows = [
+        {'exercise_name': 'Lat Pulldown', 'main_muscle': 'Back', 'target_muscle': 'Latissimus Dorsi,', 'synergist_muscle': 'Biceps Brachii, Brachialis,'},
+        {'exercise_name': 'Biceps Curl', 'main_muscle': 'Upper Arms', 'target_muscle': 'Biceps Brachii,', 'synergist_muscle': 'Brachialis, Brachioradialis,'},
+        {'exercise_name': 'Hammer Curl', 'main_muscle': 'Forearm', 'target_muscle': 'Brachioradialis,', 'synergist_muscle': 'Biceps Brachii, Brachialis,'},
+        {'exercise_name': 'Neck Flexion', 'main_muscle': 'Neck', 'target_muscle': 'Sternocleidomastoid,', 'synergist_muscle': 'None,'},
+    ]
+
+    def test_scores_by_role(self):
+        index = MuscleIndex(self.rows)
+        # target (2) di atas synergist (1), seri diurutkan sesuai urutan baris
+        self.assertEqual(index.recommend("biceps brachii"), [(1, 2), (0, 1), (2, 1)])
+        self.assertEqual(index.recommend("Upper Arms"), [(1, 3)])
+        self.assertEqual(index.recommend("biceps brachii", limit=1), [(1, 2)])
+
+    def test_all_query_tokens_must_match(self):
+        index = MuscleIndex(self.rows)
+        self.assertEqual(index.recommend("biceps femoris"), [])
+        self.assertEqual(index.recommend("none"), [])
+        self.assertEqual(index.recommend(""), [])
+
+    def test_recommend_exercises_without_pandas(self):
+        result = recommend_exercises(self.rows, "brachioradialis")
+        self.assertEqual([row['exercise_name'] for row in result], ['Hammer Curl', 'Biceps Curl'])
+
+
+class RecommendAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_recommender()
+        self.client = Client()
+        self.url = reverse('howto:recommend_api')
+        # Target/synergist "Lateral Neck Flexion" diambil dari gym_exercises.csv
+        self.neck = Exercise.objects.create(exercise_name="Lateral Neck Flexion", main_muscle="Neck", equipment="Lever (Plate Loaded)")
+        self.shrug = Exercise.objects.create(exercise_name="Custom Shrug", main_muscle="Trapezius", equipment="Barbell")
+
+    def test_ranks_main_before_synergist(self):
+        response = self.client.get(self.url, {'muscle': 'trapezius'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['id'], row['score']) for row in response.json()],
+            [(self.shrug.id, 3), (self.neck.id, 1)],
+        )
+
+        response = self.client.get(self.url, {'muscle': 'Sternocleidomastoid'})
+        self.assertEqual([row['exercise_name'] for row in response.json()], ["Lateral Neck Flexion"])
+
+    def test_requires_muscle(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'muscle': 'neck', 'limit': 'x'}).status_code, 400)
+
+    def test_results_are_cached_until_catalog_changes(self):
+        recommend_for_muscle("trapezius")
+        hits = _cached_recommend.cache_info().hits
+        with self.assertNumQueries(0):
+            recommend_for_muscle("Trapezius ")
+        self.assertEqual(_cached_recommend.cache_info().hits, hits + 1)
+
+        Exercise.objects.create(exercise_name="Upright Row", main_muscle="Trapezius", equipment="Cable")
+        self.assertEqual(len(recommend_for_muscle("trapezius")), 3)
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), "Set RUN_BENCHMARKS=1 untuk menjalankan benchmark.")
+class BenchmarkMuscleRecommender(TestCase):
+    def test_index_vs_str_contains(self):
+        import random
+        mains = ['Back', 'Chest', 'Thighs', 'Hips', 'Shoulder', 'Upper Arms', 'Forearm', 'Calves', 'Neck']
+        muscles = ['Latissimus Dorsi', 'Biceps Brachii', 'Brachialis', 'Gluteus Maximus', 'Quadriceps',
+                   'Hamstrings', 'Deltoid Anterior', 'Pectoralis Major Sternal', 'Triceps Brachii',
+                   'Trapezius Upper', 'Soleus', 'Gastrocnemius', 'Erector Spinae', 'Obliques']
+        rng = random.Random(0)
+        rows = [{
+            'exercise_name': f"Exercise {i}",
+            'main_muscle': rng.choice(mains),
+            'target_muscle': ", ".join(rng.sample(muscles, 1)) + ",",
+            'synergist_muscle': ", ".join(rng.sample(muscles, 3)) + ",",
+        } for i in range(100_000)]
+        queries = ['chest', 'biceps brachii', 'soleus', 'erector spinae', 'hips', 'obliques']
+
+        started = time.perf_counter()
+        index = MuscleIndex(rows)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for query in queries:
+            index.recommend(query, 10)
+        index_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        print(f"\n[benchmark] muscle index 100k: build {build_ms:.0f}ms, query {index_ms:.2f}ms")
+
+        try:
+            import pandas as pd
+        except ImportError:
+            return
+        df = pd.DataFrame(rows)
+        started = time.perf_counter()
+        for query in queries:
+            mask = (
+                df['main_muscle'].str.contains(query, case=False, na=False) |
+                df['target_muscle'].str.contains(query, case=False, na=False) |
+                df['synergist_muscle'].str.contains(query, case=False, na=False)
+            )
+            df[mask].head(10)
+        contains_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        print(f"[benchmark] pandas str.contains 100k: query {contains_ms:.2f}ms")
+
+
+class TextNormalizationTest(TestCase):
+    def test_clean_text(self):
+        self.assertEqual(clean_text(" Upper\u200b  Arms\n"), "Upper Arms")
+        self.assertEqual(clean_text(None), "")
+
+    def test_equipment_category_uses_longest_prefix(self):
+        self.assertEqual(equipment_category("Self-Assisted (Machine)"), "Self-Assisted")
+        self.assertEqual(equipment_category("assisted"), "Assisted")
+        self.assertEqual(equipment_category("Suspended"), "Suspension")
+        self.assertEqual(equipment_category("\u200bBody  Weight"), "Body Weight")
+        self.assertEqual(equipment_category("Stretch  (Iliopsoas)"), "Stretch (Iliopsoas)")
+        self.assertEqual(equipment_category(""), "")
+        self.assertIsNone(match_prefix("self"))
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), "Set RUN_BENCHMARKS=1 untuk menjalankan benchmark.")
+class BenchmarkTextNormalization(TestCase):
+    """Micro-benchmark helper normalisasi teks terhadap versi sebelumnya (regex + rantai startswith)."""
+
+    ROUNDS = 200
+
+    @staticmethod
+    def legacy_clean_text(s):
+        import re
+        if not s:
+            return ""
+        s = re.sub(r"[\u200B-\u200D\uFEFF]", "", s)
+        return re.sub(r"\s+", " ", s).strip()
+
+    @classmethod
+    def legacy_equipment_category(cls, raw):
+        s = cls.legacy_clean_text(raw)
+        low = s.lower()
+        for prefix, category in [
+            ("self-assisted", "Self-Assisted"), ("assisted", "Assisted"), ("band", "Band"),
+            ("body", "Body Weight"), ("cable", "Cable"), ("barbell", "Barbell"),
+            ("dumbbell", "Dumbbell"), ("lever", "Lever"), ("sled", "Sled"), ("smith", "Smith"),
+            ("plyometric", "Plyometric"), ("isometric", "Isometric"), ("suspension", "Suspension"),
+            ("suspended", "Suspension"), ("weighted", "Weighted"),
+        ]:
+            if low.startswith(prefix):
+                return category
+        return s
+
+    def setUp(self):
+        self.values = [
+            row[col]
+            for path in BUNDLED_DATASETS
+            for row in iter_exercises(str(path))
+            for col in ('equipment', 'main_muscle')
+        ]
+
+    def timed(self, func):
+        started = time.perf_counter()
+        for _ in range(self.ROUNDS):
+            for value in self.values:
+                func(value)
+        return (time.perf_counter() - started) * 1e6 / (self.ROUNDS * len(self.values))
+
+    def test_normalization_helpers(self):
+        for name, legacy, current in [
+            ("clean_text", self.legacy_clean_text, clean_text),
+            ("equipment_category", self.legacy_equipment_category, equipment_category),
+        ]:
+            legacy_us = self.timed(legacy)
+            # __wrapped__: fungsi tanpa lru_cache (regex terkompilasi + trie)
+            compiled_us = self.timed(current.__wrapped__)
+            warm_us = self.timed(current)
+            print(f"\n[benchmark] {name} ({len(self.values)} values): legacy {legacy_us:.2f}us, "
+                  f"compiled {compiled_us:.2f}us, memoized {warm_us:.2f}us per call")
+
+
+def make_image(size=(1200, 800), fmt="PNG", mode="RGB"):
+    from PIL import Image
+    buffer = BytesIO()
+    Image.new(mode, size, "red").save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class ExerciseImageVariantsTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root, MEDIA_URL="/media/")
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+
+    def create(self, name="Squat", content=None, filename="squat.png"):
+        image = SimpleUploadedFile(filename, content or make_image(), content_type="image/png")
+        return Exercise.objects.create(exercise_name=name, main_muscle="Legs", equipment="Barbell", image=image)
+
+    def image_size(self, name):
+        from PIL import Image
+        with default_storage.open(name, "rb") as f:
+            img = Image.open(f)
+            return img.format, img.size
+
+    def test_upload_generates_variants(self):
+        ex = self.create()
+        name = ex.image.name
+        self.assertEqual(self.image_size(thumbnail_name(name)), ("WEBP", (320, 320)))
+        self.assertEqual(self.image_size(width_name(name, 480)), ("WEBP", (480, 320)))
+        self.assertEqual(self.image_size(width_name(name, 960)), ("WEBP", (960, 640)))
+
+    def test_small_images_are_not_upscaled(self):
+        ex = self.create(content=make_image((300, 200), mode="P"))
+        self.assertEqual(self.image_size(width_name(ex.image.name, 960)), ("WEBP", (300, 200)))
+
+    def test_serializer_exposes_thumbnail_and_srcset(self):
+        ex = self.create()
+        data = self.client.get(reverse('howto:exercise_detail_api', args=[ex.pk])).json()
+        self.assertTrue(data['thumbnail'].endswith(".thumb.webp"))
+        self.assertRegex(data['srcset'], r"\.w480\.webp 480w, .*\.w960\.webp 960w$")
+
+        data = self.client.get(reverse('howto:exercise_list_api'), {'fields': 'id,thumbnail'}).json()
+        self.assertEqual(data, [{"id": ex.pk, "thumbnail": ex.thumbnail_url}])
+
+    def test_invalid_image_does_not_break_save(self):
+        with self.assertLogs('howto.images', level='WARNING'):
+            ex = self.create(content=b"not an image")
+        self.assertFalse(default_storage.exists(thumbnail_name(ex.image.name)))
+        self.assertFalse(Exercise.objects.get(pk=ex.pk).image_variants)
+
+    def test_missing_variants_fall_back_to_original(self):
+        ex = self.create()
+        self.assertTrue(Exercise.objects.get(pk=ex.pk).image_variants)
+        Exercise.objects.filter(pk=ex.pk).update(image_variants=False)
+        ex.refresh_from_db()
+
+        data = self.client.get(reverse('howto:exercise_detail_api', args=[ex.pk])).json()
+        self.assertEqual(data['thumbnail'], ex.image.url)
+        self.assertIsNone(data['srcset'])
+
+        html = self.client.get(reverse('howto:exercise_detail', args=[ex.pk])).content.decode()
+        self.assertIn(ex.image.url, html)
+        self.assertNotIn('srcset', html)
+
+    def test_backfill_command(self):
+        names = [self.create(f"Move {i}", filename=f"move{i}.png").image.name for i in range(3)]
+        for name in names:
+            for variant in variant_names(name):
+                default_storage.delete(variant)
+
+        Exercise.objects.update(image_variants=False)
+        out = StringIO()
+        call_command('generate_exercise_thumbnails', workers=2, stdout=out)
+        self.assertIn("Generated variants for 3 of 3 images", out.getvalue())
+        self.assertTrue(all(default_storage.exists(v) for name in names for v in variant_names(name)))
+        self.assertFalse(Exercise.objects.filter(image_variants=False).exists())
+
+        out = StringIO()
+        call_command('generate_exercise_thumbnails', workers=1, stdout=out)
+        self.assertIn("Generated variants for 0 of 3 images", out.getvalue())
@@ -11,6 +11,7 @@ urlpatterns = [
     path('api/muscles/', views.muscle_list_api, name='muscle_list_api'),
     path('api/equipments/', views.equipment_list_api, name='equipment_list_api'),
     path("api/options/", views.exercise_options_api, name="exercise_options_api"),
+    path("api/recommend/", views.recommend_api, name="recommend_api"),
 
     path("api/favorites/", views.favorite_ids_api, name="favorite_ids_api"),
     path("api/favorites/toggle/<int:pk>/", views.toggle_favorite_api, name="toggle_favorite_api"),
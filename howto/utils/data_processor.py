@@ -1,63 +1,149 @@
-import pandas as pd
+import csv
+import heapq
+import re
+from collections import defaultdict
+from pathlib import Path
 
-def load_dataset(path: str) -> pd.DataFrame:
+DATASET_DIR = Path(__file__).resolve().parent
+BUNDLED_DATASETS = [
+    DATASET_DIR / 'gym_exercises.csv',
+    DATASET_DIR / 'stretch_exercises.csv',
+]
+
+# Rename kolom utama biar konsisten (nama kolom CSV sudah di-strip + lowercase)
+RENAME_MAP = {
+    'exercise name': 'exercise_name',
+    'equipment': 'equipment',
+    'main_muscle': 'main_muscle',
+    'target_muscles': 'target_muscle',
+    'synergist_muscles': 'synergist_muscle',
+    'preparation': 'preparation',
+    'execution': 'execution'
+}
+# Kolom teks yang dinormalisasi ke Title Case
+TITLE_COLUMNS = ['exercise_name', 'main_muscle', 'target_muscle', 'synergist_muscle', 'equipment']
+
+
+def _normalize_row(raw):
+    row = {}
+    for column, value in raw.items():
+        if column is None:
+            # Kolom lebih banyak dari header
+            continue
+        name = RENAME_MAP.get(column.strip().lower())
+        if name:
+            row[name] = value or ''
+
+    # Gabungkan preparation + execution jadi satu kolom
+    if 'preparation' in row and 'execution' in row:
+        row['instructions'] = row['preparation'] + " " + row['execution']
+
+    # Normalisasi teks (biar konsisten)
+    for col in TITLE_COLUMNS:
+        if col in row:
+            row[col] = row[col].title()
+    return row
+
+
+def iter_exercises(path: str):
     """
-    Memuat dan membersihkan dataset gym_exercise_dataset.csv
+    Membaca dataset CSV exercise (gym_exercises.csv / stretch_exercises.csv) baris per baris.
     - Gunakan kolom 'Main_muscle' sebagai otot utama (nama umum)
     - Gabungkan Preparation + Execution jadi 'instructions'
+    - Baris tanpa nama exercise dilewati
+    Memori yang dipakai hanya sebesar satu baris, tanpa pandas.
     """
-    df = pd.read_csv(path)
-    df.columns = df.columns.str.strip().str.lower()
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for raw in csv.DictReader(f):
+            row = _normalize_row(raw)
+            if row.get('exercise_name'):
+                yield row
 
-    # Hapus kolom tidak diperlukan
-    drop_cols = [
-        'variation', 'utility', 'mechanics', 'force',
-        'stabilizer_muscles', 'antagonist_muscles',
-        'dynamic_stabilizer_muscles', 'difficulty (1-5)',
-        'secondary muscles', 'parent_id'
-    ]
-    df = df.drop(columns=[c for c in drop_cols if c in df.columns], errors='ignore')
-
-    # Rename kolom utama biar konsisten
-    rename_map = {
-        'exercise name': 'exercise_name',
-        'equipment': 'equipment',
-        'main_muscle': 'main_muscle',
-        'target_muscles': 'target_muscle',
-        'synergist_muscles': 'synergist_muscle',
-        'preparation': 'preparation',
-        'execution': 'execution'
-    }
-    df = df.rename(columns=rename_map)
 
-    # Gabungkan preparation + execution jadi satu kolom
-    if 'preparation' in df.columns and 'execution' in df.columns:
-        df['instructions'] = df['preparation'].fillna('') + " " + df['execution'].fillna('')
+def _import_pandas():
+    # pandas opsional: hanya dibutuhkan untuk analisis DataFrame di bawah
+    try:
+        import pandas as pd
+    except ImportError as exc:
+        raise ImportError("pandas is required for DataFrame helpers in howto.utils.data_processor") from exc
+    return pd
 
-    # Normalisasi teks (biar konsisten)
-    for col in ['exercise_name', 'main_muscle', 'target_muscle', 'synergist_muscle', 'equipment']:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.title()
 
+def load_dataset(path: str):
+    """
+    Memuat dataset ke DataFrame pandas (untuk eksplorasi data, lihat data_explore.py).
+    Untuk import ke database gunakan iter_exercises.
+    """
+    pd = _import_pandas()
+    df = pd.DataFrame(iter_exercises(path))
     print(f"✅ Dataset loaded: {len(df)} rows with {len(df.columns)} columns")
     return df
 
 
-def recommend_exercises(df: pd.DataFrame, muscle_query: str, limit: int = 10) -> pd.DataFrame:
+# --- REKOMENDASI BERDASARKAN OTOT ---
+# Bobot per peran otot: otot utama paling relevan, synergist paling rendah
+ROLE_WEIGHTS = {'main_muscle': 3, 'target_muscle': 2, 'synergist_muscle': 1}
+MUSCLE_TOKEN = re.compile(r"[a-z0-9]+")
+# Dataset menulis "None," untuk kolom otot yang kosong
+IGNORED_TOKENS = frozenset({'none', 'nan'})
+EMPTY = frozenset()
+
+
+def muscle_tokens(text):
+    return [t for t in MUSCLE_TOKEN.findall((text or '').lower()) if t not in IGNORED_TOKENS]
+
+
+class MuscleIndex:
     """
-    Mengembalikan rekomendasi latihan berdasarkan 'Main_muscle' (nama umum)
-    atau 'Target_Muscles' (nama ilmiah)
+    Inverted index token otot -> posisi baris, terpisah per peran (main/target/synergist).
+    Query cocok dengan sebuah peran jika semua token query ada di kolom itu;
+    skor = jumlah bobot peran yang cocok.
     """
-    muscle_query = muscle_query.strip().title()
 
-    mask = (
-        df['main_muscle'].str.contains(muscle_query, case=False, na=False) |
-        df['target_muscle'].str.contains(muscle_query, case=False, na=False) |
-        df['synergist_muscle'].str.contains(muscle_query, case=False, na=False)
-    )
+    def __init__(self, rows):
+        self.rows = list(rows)
+        postings = {role: defaultdict(list) for role in ROLE_WEIGHTS}
+        for pos, row in enumerate(self.rows):
+            for role, role_postings in postings.items():
+                for token in set(muscle_tokens(row.get(role))):
+                    role_postings[token].append(pos)
+        self.postings = {
+            role: {token: frozenset(positions) for token, positions in role_postings.items()}
+            for role, role_postings in postings.items()
+        }
+
+    def __len__(self):
+        return len(self.rows)
+
+    def recommend(self, muscle_query, limit=10):
+        """List (posisi, skor) terurut dari skor tertinggi, lalu urutan baris."""
+        tokens = set(muscle_tokens(muscle_query))
+        if not tokens or limit <= 0:
+            return []
 
-    result = df[mask].copy()
+        scores = defaultdict(int)
+        for role, weight in ROLE_WEIGHTS.items():
+            postings = sorted((self.postings[role].get(t, EMPTY) for t in tokens), key=len)
+            for pos in postings[0].intersection(*postings[1:]):
+                scores[pos] += weight
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def recommend_exercises(df, muscle_query: str, limit: int = 10):
+    """
+    Mengembalikan rekomendasi latihan berdasarkan 'Main_muscle' (nama umum)
+    atau 'Target_Muscles' / 'Synergist_Muscles' (nama ilmiah), diurutkan per peran otot.
+    df boleh DataFrame (hasil DataFrame juga) atau iterable baris dari iter_exercises
+    (hasil list dict, tanpa pandas).
+    """
     keep_cols = ['exercise_name', 'main_muscle', 'target_muscle', 'synergist_muscle', 'equipment', 'instructions']
-    result = result[[c for c in keep_cols if c in result.columns]]
+    if hasattr(df, 'iloc'):
+        index = MuscleIndex(df.to_dict('records'))
+        positions = [pos for pos, _ in index.recommend(muscle_query, limit)]
+        return df.iloc[positions][[c for c in keep_cols if c in df.columns]]
 
-    return result.head(limit)
+    index = MuscleIndex(df)
+    return [
+        {c: index.rows[pos][c] for c in keep_cols if c in index.rows[pos]}
+        for pos, _ in index.recommend(muscle_query, limit)
+    ]
@@ -0,0 +1,66 @@
+import re
+from functools import lru_cache
+
+ZERO_WIDTH = re.compile(r"[\u200B-\u200D\uFEFF]")
+WHITESPACE = re.compile(r"\s+")
+
+# Kategori equipment berdasarkan awalan (lowercase). Dicocokkan awalan terpanjang,
+# jadi "self-assisted" tidak ketangkep "assisted".
+EQUIPMENT_CATEGORY_RULES = (
+    ("self-assisted", "Self-Assisted"),
+    ("assisted", "Assisted"),
+    ("band", "Band"),
+    ("body", "Body Weight"),
+    ("cable", "Cable"),
+    ("barbell", "Barbell"),
+    ("dumbbell", "Dumbbell"),
+    ("lever", "Lever"),
+    ("sled", "Sled"),
+    ("smith", "Smith"),
+    ("plyometric", "Plyometric"),
+    ("isometric", "Isometric"),
+    ("suspension", "Suspension"),
+    ("suspended", "Suspension"),
+    ("weighted", "Weighted"),
+)
+# Hasil normalisasi di-memo; nilai equipment/otot di katalog hanya beberapa ratus
+CACHE_SIZE = 4096
+
+_CATEGORY = object()  # key penanda kategori di node trie
+
+
+def _build_trie(rules):
+    root = {}
+    for prefix, category in rules:
+        node = root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[_CATEGORY] = category
+    return root
+
+_EQUIPMENT_TRIE = _build_trie(EQUIPMENT_CATEGORY_RULES)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def clean_text(s: str) -> str:
+    if not s:
+        return ""
+    s = ZERO_WIDTH.sub("", s)            # buang zero-width chars
+    s = WHITESPACE.sub(" ", s).strip()   # rapihin spasi
+    return s
+
+def match_prefix(text: str, trie=_EQUIPMENT_TRIE):
+    """Kategori dari awalan terpanjang di trie yang cocok dengan text (lowercase), atau None."""
+    node, category = trie, None
+    for char in text:
+        node = node.get(char)
+        if node is None:
+            break
+        category = node.get(_CATEGORY, category)
+    return category
+
+@lru_cache(maxsize=CACHE_SIZE)
+def equipment_category(raw: str) -> str:
+    s = clean_text(raw)
+    # fallback: kembalikan versi yang sudah dibersihin
+    return match_prefix(s.lower()) or s
@@ -1,16 +1,22 @@
+from django.conf import settings
+from django.core.paginator import Paginator
 from django.http import JsonResponse
 from .models import Exercise, ExerciseFavorite
-from .serializers import exercise_to_dict
+from .serializers import exercise_columns, exercise_to_dict, parse_exercise_fields
 from django.shortcuts import render, get_object_or_404
 from django.http import HttpResponse
-import re
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_GET, require_POST
+from django.views.decorators.http import etag, require_GET, require_POST
+from .catalog_cache import cache_catalog_response, catalog_etag, get_catalog_version
+from .pagination import EXERCISE_ORDERING, PaginationError, paginate_cursor, paginate_offset, parse_limit
+from .recommender import recommend_for_muscle
+from .utils.normalize import clean_text, equipment_category, match_prefix
 
 
 
+EXERCISES_PER_PAGE = 24
+
 def exercise_list(request):
     # Ambil semua data exercise
     exercises = Exercise.objects.all()
@@ -24,14 +30,34 @@ def exercise_list(request):
     if selected_equipment:
         exercises = exercises.filter(equipment=selected_equipment)
 
-    # Ambil hanya nilai unik untuk dropdown
-    muscles = Exercise.objects.values_list('main_muscle', flat=True).distinct().order_by('main_muscle')
-    equipments = Exercise.objects.values_list('equipment', flat=True).distinct().order_by('equipment')
+    try:
+        page_number = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page_number = 1
+
+    # Dropdown & halaman dibungkus fungsi: template hanya memanggilnya saat fragment cache miss
+    def dropdown_options():
+        # Ambil hanya nilai unik untuk dropdown, satu query untuk dua dropdown
+        pairs = Exercise.objects.order_by().values_list('main_muscle', 'equipment').distinct()
+        muscles, equipments = set(), set()
+        for muscle, equipment in pairs:
+            muscles.add(muscle)
+            equipments.add(equipment)
+        return {
+            'muscles': sorted(m for m in muscles if m),
+            'equipments': sorted(e for e in equipments if e),
+        }
+
+    def page():
+        paginator = Paginator(exercises.order_by(*EXERCISE_ORDERING), EXERCISES_PER_PAGE)
+        return paginator.get_page(page_number)
 
     return render(request, 'howto/exercise_list.html', {
-        'exercises': exercises,
-        'muscles': muscles,
-        'equipments': equipments,
+        'dropdown_options': dropdown_options,
+        'page': page,
+        'page_number': page_number,
+        'catalog_version': get_catalog_version(),
+        'cache_timeout': getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 60),
         'selected_muscle': selected_muscle,
         'selected_equipment': selected_equipment,
     })
@@ -45,6 +71,8 @@ def exercise_detail(request, pk):
 
 
 # API untuk daftar otot dan peralatan unik
+@etag(catalog_etag)
+@cache_catalog_response
 def muscle_list_api(request):
     muscles = (
         Exercise.objects.values_list('main_muscle', flat=True)
@@ -53,6 +81,8 @@ def muscle_list_api(request):
     )
     return JsonResponse(list(muscles), safe=False)
 
+@etag(catalog_etag)
+@cache_catalog_response
 def equipment_list_api(request):
     equipments = (
         Exercise.objects.values_list('equipment', flat=True)
@@ -66,109 +96,95 @@ def equipment_list_api(request):
 
 
 
-ZERO_WIDTH = r"[\u200B-\u200D\uFEFF]"
-
-def _clean_text(s: str) -> str:
-    if not s:
-        return ""
-    s = re.sub(ZERO_WIDTH, "", s)          # buang zero-width chars
-    s = re.sub(r"\s+", " ", s).strip()     # rapihin spasi
-    return s
-
-def _equipment_category(raw: str) -> str:
-    s = _clean_text(raw)
-    low = s.lower()
-
-    # urutan penting (Self-Assisted jangan ketangkep Assisted)
-    if low.startswith("self-assisted"):
-        return "Self-Assisted"
-    if low.startswith("assisted"):
-        return "Assisted"
-    if low.startswith("band"):
-        return "Band"
-    if low.startswith("body"):
-        return "Body Weight"
-    if low.startswith("cable"):
-        return "Cable"
-    if low.startswith("barbell"):
-        return "Barbell"
-    if low.startswith("dumbbell"):
-        return "Dumbbell"
-    if low.startswith("lever"):
-        return "Lever"
-    if low.startswith("sled"):
-        return "Sled"
-    if low.startswith("smith"):
-        return "Smith"
-    if low.startswith("plyometric"):
-        return "Plyometric"
-    if low.startswith("isometric"):
-        return "Isometric"
-    if low.startswith("suspension") or low.startswith("suspended"):
-        return "Suspension"
-    if low.startswith("weighted"):
-        return "Weighted"
-
-    # fallback: kembalikan versi yang sudah dibersihin
-    return s
-
-def _apply_equipment_filter(qs, equipment_param: str):
-    cat = _equipment_category(equipment_param)
-
-    # Group filter ke semua varian di DB
-    if cat == "Assisted":
-        # Assisted* tapi bukan Self-Assisted*
-        return qs.filter(equipment__istartswith="Assisted").exclude(equipment__istartswith="Self-Assisted")
-    if cat == "Self-Assisted":
-        return qs.filter(equipment__istartswith="Self-Assisted")
-    if cat == "Band":
-        return qs.filter(equipment__icontains="Band")
-    if cat == "Body Weight":
-        return qs.filter(Q(equipment__icontains="Body") | Q(equipment__icontains="Body Weight"))
-    if cat == "Cable":
-        return qs.filter(equipment__icontains="Cable")
-    if cat == "Lever":
-        return qs.filter(equipment__icontains="Lever")
-    if cat == "Sled":
-        return qs.filter(equipment__icontains="Sled")
-    if cat == "Smith":
-        return qs.filter(equipment__icontains="Smith")
-    if cat == "Suspension":
-        return qs.filter(Q(equipment__icontains="Suspension") | Q(equipment__icontains="Suspended"))
-    if cat in {"Barbell", "Dumbbell", "Plyometric", "Isometric", "Weighted"}:
-        return qs.filter(equipment__icontains=cat)
-
-    # kalau user kirim value spesifik, coba exact match juga
-    return qs.filter(equipment__iexact=_clean_text(equipment_param))
-
 @require_GET
+@etag(catalog_etag)
+@cache_catalog_response
 def exercise_options_api(request):
-    muscles_raw = Exercise.objects.values_list("main_muscle", flat=True).distinct()
-    equipments_raw = Exercise.objects.values_list("equipment", flat=True).distinct()
-
-    muscles = sorted({ _clean_text(m) for m in muscles_raw if m })
-    equipment_categories = sorted({ _equipment_category(e) for e in equipments_raw if e })
+    # Kolom normalized_muscle & equipment_category sudah dibersihkan saat disimpan
+    muscles = (
+        Exercise.objects.exclude(normalized_muscle="")
+        .order_by("normalized_muscle")
+        .values_list("normalized_muscle", flat=True)
+        .distinct()
+    )
+    equipment_categories = (
+        Exercise.objects.exclude(equipment_category="")
+        .order_by("equipment_category")
+        .values_list("equipment_category", flat=True)
+        .distinct()
+    )
 
     return JsonResponse({
-        "muscles": muscles,
-        "equipments": equipment_categories,  # << unik (kategori)
+        "muscles": list(muscles),
+        "equipments": list(equipment_categories),  # << unik (kategori)
     })
 
+DEFAULT_PAGE_SIZE = 20
+
 @require_GET
+@etag(catalog_etag)
+@cache_catalog_response
 def exercise_list_api(request):
-    qs = Exercise.objects.all()
+    """
+    Daftar exercise. Tanpa parameter paginasi mengembalikan semua data (array JSON).
+    - ?fields=id,exercise_name,main_muscle -> hanya field tersebut (instructions/image via detail API)
+    - ?limit=&offset=                      -> {"count", "next", "previous", "results"}
+    - ?cursor= (kosong = halaman pertama)  -> {"next", "results"}, tanpa COUNT
+    """
+    try:
+        fields = parse_exercise_fields(request.GET.get("fields"))
+        limit = parse_limit(request, default=DEFAULT_PAGE_SIZE if "cursor" in request.GET else None)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+
+    # Kolom urutan selalu dimuat karena dipakai untuk paginasi
+    qs = Exercise.objects.only(*exercise_columns(fields), *EXERCISE_ORDERING[:2])
 
     muscle = request.GET.get("muscle")
     equipment = request.GET.get("equipment")
 
+    # Filter equality pada kolom ter-index (lihat migration 0007)
     if muscle:
-        qs = qs.filter(main_muscle=_clean_text(muscle))
+        qs = qs.filter(normalized_muscle=clean_text(muscle))
 
     if equipment:
-        qs = _apply_equipment_filter(qs, equipment)
+        category = equipment_category(equipment)
+        if match_prefix(category.lower()):
+            qs = qs.filter(equipment_category=category)
+        else:
+            # Fallback (bukan kategori dikenal) disimpan dengan huruf aslinya, mis. "Stretch"
+            qs = qs.filter(equipment_category__iexact=category)
+
+    if limit is None:
+        return JsonResponse([exercise_to_dict(ex, fields) for ex in qs], safe=False)
+
+    try:
+        if "cursor" in request.GET:
+            rows, meta = paginate_cursor(request, qs, limit)
+        else:
+            rows, meta = paginate_offset(request, qs, limit)
+    except PaginationError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
 
-    data = [exercise_to_dict(ex) for ex in qs]
-    return JsonResponse(data, safe=False)
+    return JsonResponse({**meta, "results": [exercise_to_dict(ex, fields) for ex in rows]})
+
+# Rekomendasi exercise per otot (main/target/synergist), hasil di-cache LRU per proses
+RECOMMEND_MAX_LIMIT = 50
+
+@require_GET
+@etag(catalog_etag)
+def recommend_api(request):
+    muscle = clean_text(request.GET.get("muscle", ""))
+    if not muscle:
+        return JsonResponse({"detail": "Parameter 'muscle' is required"}, status=400)
+
+    try:
+        limit = int(request.GET.get("limit", 10))
+    except ValueError:
+        return JsonResponse({"detail": "Invalid limit"}, status=400)
+    limit = max(1, min(limit, RECOMMEND_MAX_LIMIT))
+
+    return JsonResponse(recommend_for_muscle(muscle, limit), safe=False)
 
 @csrf_exempt
 def exercise_detail_api(request, pk):
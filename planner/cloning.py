@@ -0,0 +1,90 @@
+import calendar
+import datetime
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import WorkoutPlan
+from .stats import record_plans_created_on
+
+PERIOD_WEEK = 'week'
+PERIOD_MONTH = 'month'
+
+
+# --- RENTANG SUMBER & TARGET ---
+def copy_ranges(period, source, target):
+    """
+    ((source_start, source_end), target_start) untuk menyalin sebuah minggu atau bulan.
+    Minggu: 7 hari mulai dari source (nilai 'value' dari get_weeks_in_month).
+    Bulan: tanggal dipertahankan; hari yang tidak ada di bulan target (mis. 31 -> Februari) dilewati.
+    """
+    if period == PERIOD_WEEK:
+        return (source, source + datetime.timedelta(days=6)), target
+    if period == PERIOD_MONTH:
+        source_start, target_start = source.replace(day=1), target.replace(day=1)
+        days = min(
+            calendar.monthrange(source_start.year, source_start.month)[1],
+            calendar.monthrange(target_start.year, target_start.month)[1],
+        )
+        return (source_start, source_start.replace(day=days)), target_start
+    raise ValueError(f"Unknown period: {period}")
+
+
+# --- INSERT ... SELECT PER BACKEND ---
+def _shifted_date_sql(days):
+    if connection.vendor == 'sqlite':
+        return 'date(plan_date, %s)', [f'{days:+d} days']
+    # PostgreSQL: date + integer = date
+    return 'plan_date + %s', [days]
+
+def _copy_with_sql(user, start, end, days):
+    table = connection.ops.quote_name(WorkoutPlan._meta.db_table)
+    shifted, shift_params = _shifted_date_sql(days)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    # Salinan selalu berupa rencana baru: catatan & status selesai tidak ikut.
+    # updated_at diisi manual (auto_now hanya berlaku lewat ORM) agar salinan ikut delta sync
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, exercise_id, sets, reps, plan_date, description, is_completed, completed_at, updated_at) "
+            f"SELECT user_id, exercise_id, sets, reps, {shifted}, NULL, %s, NULL, %s FROM {table} "
+            "WHERE user_id = %s AND plan_date BETWEEN %s AND %s",
+            [*shift_params, False, now, user.pk, start, end],
+        )
+        return cursor.rowcount
+
+def _copy_with_orm(user, start, end, days):
+    offset = datetime.timedelta(days=days)
+    plans = [
+        WorkoutPlan(user_id=user.pk, exercise_id=exercise_id, sets=sets, reps=reps, plan_date=plan_date + offset)
+        for exercise_id, sets, reps, plan_date in WorkoutPlan.objects.filter(
+            user=user, plan_date__range=[start, end]
+        ).values_list('exercise_id', 'sets', 'reps', 'plan_date').iterator(chunk_size=2000)
+    ]
+    WorkoutPlan.objects.bulk_create(plans, batch_size=500)
+    return len(plans)
+
+def copy_plans(user, period, source, target):
+    """
+    Salin semua plan user dari periode sumber ke periode target dengan satu statement
+    INSERT ... SELECT (ditambah satu query GROUP BY untuk update WorkoutStats).
+    Mengembalikan (jumlah plan yang disalin, (target_start, target_end)).
+    """
+    (start, end), target_start = copy_ranges(period, source, target)
+    days = (target_start - start).days
+    target_range = (target_start, end + datetime.timedelta(days=days))
+
+    with transaction.atomic():
+        date_counts = {
+            row['plan_date'] + datetime.timedelta(days=days): row['total']
+            for row in WorkoutPlan.objects.filter(user=user, plan_date__range=[start, end])
+            .order_by().values('plan_date').annotate(total=Count('id'))
+        }
+        if not date_counts:
+            return 0, target_range
+        if connection.vendor in ('sqlite', 'postgresql'):
+            copied = _copy_with_sql(user, start, end, days)
+        else:
+            copied = _copy_with_orm(user, start, end, days)
+        record_plans_created_on(user, date_counts)
+    return copied, target_range
@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from planner.stats import rebuild_stats
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized per-user monthly/weekly WorkoutStats table from WorkoutPlan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames',
+                            help='Only rebuild stats for this username (can be repeated)')
+
+    def handle(self, *args, **options):
+        users = None
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+
+        rows = rebuild_stats(users)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Rebuilt {rows} workout stats rows")
+        )
+#untuk jalanin:
+#python manage.py rebuild_workout_stats [--user <username>]
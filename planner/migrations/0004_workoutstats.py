@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0003_alter_workoutplan_options_workoutplan_completed_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('month', 'Month'), ('week', 'Week')], max_length=5)),
+                ('month_start', models.DateField(help_text='Tanggal 1 dari bulan yang dicakup.')),
+                ('period_start', models.DateField(help_text='Sama dengan month_start untuk periode bulan, hari Minggu awal pekan untuk periode minggu.')),
+                ('total_plans', models.PositiveIntegerField(default=0)),
+                ('completed_plans', models.PositiveIntegerField(default=0)),
+                ('on_time_completed', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workout_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'month_start', 'period_start'), name='unique_workout_stats_period')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('howto', '0005_rename_bookmark_exercisefavorite_and_more'),
+        ('planner', '0004_workoutstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(fields=['user', 'plan_date'], name='plan_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(fields=['user', 'is_completed', 'plan_date'], name='plan_user_done_date_idx'),
+        ),
+    ]
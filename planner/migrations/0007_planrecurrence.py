@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('howto', '0007_exercise_normalized_fields'),
+        ('planner', '0006_planbatch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanRecurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sets', models.PositiveIntegerField()),
+                ('reps', models.PositiveIntegerField()),
+                ('weekdays', models.PositiveSmallIntegerField(help_text='Bitmask hari: bit 0 = Senin ... bit 6 = Minggu (sama dengan date.weekday()).')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, help_text='Kosong = berulang tanpa batas.', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurrences', to='howto.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plan_recurrences', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='workoutplan',
+            name='recurrence',
+            field=models.ForeignKey(blank=True, help_text='Rutinitas asal, jika plan ini occurrence yang sudah disimpan (selesai/diedit).', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='planner.planrecurrence'),
+        ),
+        migrations.AddConstraint(
+            model_name='workoutplan',
+            constraint=models.UniqueConstraint(fields=('recurrence', 'plan_date'), name='unique_recurrence_occurrence'),
+        ),
+        migrations.AddIndex(
+            model_name='planrecurrence',
+            index=models.Index(fields=['user', 'start_date'], name='recurrence_user_start_idx'),
+        ),
+    ]
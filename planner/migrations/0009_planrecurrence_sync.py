@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('howto', '0008_exercise_image_variants'),
+        ('planner', '0008_workoutplan_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planrecurrence',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Waktu perubahan terakhir; dipakai endpoint sync agar client ikut mengekspansi rutinitas.'),
+        ),
+        migrations.AddField(
+            model_name='plantombstone',
+            name='recurrence_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='plantombstone',
+            name='plan_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='planrecurrence',
+            index=models.Index(fields=['user', 'updated_at'], name='recurrence_user_updated_idx'),
+        ),
+    ]
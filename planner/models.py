@@ -4,6 +4,54 @@ from howto.models import Exercise
 import datetime
 from django.utils import timezone 
 
+class PlanRecurrence(models.Model):
+    """
+    Rutinitas berulang (mis. "setiap Sen/Rab/Jum, bench 4x8"). Occurrence tidak disimpan
+    sebagai WorkoutPlan; endpoint baca planner mengekspansinya untuk rentang yang diminta
+    (lihat planner/recurrence.py). Hanya occurrence yang diselesaikan/diedit yang disimpan.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="plan_recurrences",
+    )
+    exercise = models.ForeignKey(
+        Exercise,
+        on_delete=models.CASCADE,
+        related_name="recurrences",
+    )
+    sets = models.PositiveIntegerField()
+    reps = models.PositiveIntegerField()
+    weekdays = models.PositiveSmallIntegerField(
+        help_text="Bitmask hari: bit 0 = Senin ... bit 6 = Minggu (sama dengan date.weekday())."
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(
+        blank=True, null=True,
+        help_text="Kosong = berulang tanpa batas."
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Waktu perubahan terakhir; dipakai endpoint sync agar client ikut mengekspansi rutinitas."
+    )
+
+    def occurs_on(self, day):
+        return (
+            self.start_date <= day
+            and (self.end_date is None or day <= self.end_date)
+            and bool(self.weekdays & (1 << day.weekday()))
+        )
+
+    def __str__(self):
+        return f"{self.user.username} - {self.exercise.exercise_name} ({self.sets} sets x {self.reps} reps) every {self.weekdays:07b}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_date'], name='recurrence_user_start_idx'),
+            models.Index(fields=['user', 'updated_at'], name='recurrence_user_updated_idx'),
+        ]
+
 class WorkoutPlan(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -36,10 +84,134 @@ class WorkoutPlan(models.Model):
         blank=True, null=True, 
         help_text="Waktu ketika latihan ditandai selesai."
     )
+    recurrence = models.ForeignKey(
+        PlanRecurrence,
+        on_delete=models.SET_NULL,
+        blank=True, null=True,
+        related_name="occurrences",
+        help_text="Rutinitas asal, jika plan ini occurrence yang sudah disimpan (selesai/diedit)."
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Waktu perubahan terakhir; dipakai endpoint sync untuk delta ke client."
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status selesai saat dimuat, untuk mendeteksi completion yang dibatalkan (lihat signals)
+        instance._loaded_completion = (
+            instance.__dict__.get('is_completed'), instance.__dict__.get('completed_at')
+        )
+        return instance
 
     def __str__(self):
         status = "COMPLETED" if self.is_completed else "PLANNED"
         return f"{self.user.username} - {self.exercise.exercise_name} ({self.sets} sets x {self.reps} reps) on {self.plan_date} [{status}]"
 
     class Meta:
-        ordering = ['-plan_date', 'is_completed', 'id']
\ No newline at end of file
+        ordering = ['-plan_date', 'is_completed', 'id']
+        indexes = [
+            # Semua query planner memfilter user lalu rentang/tanggal plan_date
+            models.Index(fields=['user', 'plan_date'], name='plan_user_date_idx'),
+            models.Index(fields=['user', 'is_completed', 'plan_date'], name='plan_user_done_date_idx'),
+            # Delta sync: plan user yang berubah sejak token terakhir
+            models.Index(fields=['user', 'updated_at'], name='plan_user_updated_idx'),
+        ]
+        constraints = [
+            # Satu occurrence tersimpan per rutinitas per tanggal
+            models.UniqueConstraint(fields=['recurrence', 'plan_date'], name='unique_recurrence_occurrence'),
+        ]
+
+class PlanTombstone(models.Model):
+    """
+    Penanda WorkoutPlan atau PlanRecurrence yang sudah dihapus (ditulis oleh signal post_delete),
+    agar client offline bisa ikut menghapusnya lewat endpoint sync. Tepat satu dari plan_id /
+    recurrence_id terisi; keduanya bukan FK karena barisnya sudah tidak ada.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="plan_tombstones",
+    )
+    plan_id = models.BigIntegerField(blank=True, null=True)
+    recurrence_id = models.BigIntegerField(blank=True, null=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        if self.recurrence_id is not None:
+            return f"{self.user_id} - recurrence {self.recurrence_id} deleted {self.deleted_at}"
+        return f"{self.user_id} - plan {self.plan_id} deleted {self.deleted_at}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+class WorkoutStats(models.Model):
+    """
+    Statistik log yang disimpan per user per bulan (dan per minggu di dalam bulan),
+    di-update secara inkremental oleh view planner. Lihat planner/stats.py.
+    """
+    PERIOD_MONTH = 'month'
+    PERIOD_WEEK = 'week'
+    PERIOD_CHOICES = [
+        (PERIOD_MONTH, 'Month'),
+        (PERIOD_WEEK, 'Week'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="workout_stats",
+    )
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    month_start = models.DateField(
+        help_text="Tanggal 1 dari bulan yang dicakup."
+    )
+    period_start = models.DateField(
+        help_text="Sama dengan month_start untuk periode bulan, hari Minggu awal pekan untuk periode minggu."
+    )
+    total_plans = models.PositiveIntegerField(default=0)
+    completed_plans = models.PositiveIntegerField(default=0)
+    on_time_completed = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.period} {self.period_start} ({self.completed_plans}/{self.total_plans})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'period', 'month_start', 'period_start'],
+                name='unique_workout_stats_period',
+            ),
+        ]
+
+class PlanBatch(models.Model):
+    """
+    Catatan upload bulk plan per Idempotency-Key. Request ulang dengan key yang sama
+    (mis. retry dari koneksi mobile yang putus) mendapat response yang tersimpan
+    tanpa membuat plan baru.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="plan_batches",
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(
+        max_length=64,
+        help_text="SHA-256 dari body request, untuk menolak key yang dipakai ulang dengan data berbeda."
+    )
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} - batch {self.key} ({self.status_code})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_plan_batch_key'),
+        ]
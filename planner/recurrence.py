@@ -0,0 +1,135 @@
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import PlanRecurrence, WorkoutPlan
+from .stats import record_plan_created
+
+# Urutan sama dengan date.weekday(): bit 0 = Senin
+WEEKDAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+WEEK = datetime.timedelta(days=7)
+
+
+# --- BITMASK HARI ---
+def parse_weekdays(names):
+    """['mon', 'wed', 'fri'] -> bitmask; ValueError jika kosong atau nama hari tidak dikenal."""
+    if not isinstance(names, (list, tuple)) or not names:
+        raise ValueError("weekdays must be a non-empty list")
+    mask = 0
+    for name in names:
+        if not isinstance(name, str) or name.lower()[:3] not in WEEKDAY_NAMES:
+            raise ValueError(f"Unknown weekday: {name}")
+        mask |= 1 << WEEKDAY_NAMES.index(name.lower()[:3])
+    return mask
+
+def weekday_names(mask):
+    return [name for i, name in enumerate(WEEKDAY_NAMES) if mask & (1 << i)]
+
+
+# --- EKSPANSI ---
+def occurrence_dates(rule, start, end):
+    """Tanggal occurrence rule di rentang [start, end] (inklusif), terurut."""
+    lo = max(start, rule.start_date)
+    hi = end if rule.end_date is None else min(end, rule.end_date)
+    dates = []
+    for weekday in range(7):
+        if not rule.weekdays & (1 << weekday):
+            continue
+        day = lo + datetime.timedelta(days=(weekday - lo.weekday()) % 7)
+        while day <= hi:
+            dates.append(day)
+            day += WEEK
+    return sorted(dates)
+
+def rules_in_range(user, start, end):
+    return PlanRecurrence.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=start),
+        user=user, start_date__lte=end,
+    ).select_related('exercise').order_by('id')
+
+def recurrence_to_dict(rule):
+    return {
+        'id': rule.id,
+        'exercise_id': rule.exercise_id,
+        'exercise_name': rule.exercise.exercise_name,
+        'sets': rule.sets,
+        'reps': rule.reps,
+        'weekdays': weekday_names(rule.weekdays),
+        'start_date': rule.start_date.strftime('%Y-%m-%d'),
+        'end_date': rule.end_date.strftime('%Y-%m-%d') if rule.end_date else None,
+    }
+
+def occurrence_to_dict(rule, day):
+    """Bentuk sama dengan plan_row_to_dict; id None menandakan occurrence belum disimpan."""
+    return {
+        'id': None,
+        'user': rule.user_id,
+        'exercise_id': rule.exercise_id,
+        'exercise_name': rule.exercise.exercise_name,
+        'sets': rule.sets,
+        'reps': rule.reps,
+        'plan_date': day.strftime('%Y-%m-%d'),
+        'description': None,
+        'is_completed': False,
+        'completed_at': None,
+        'recurrence_id': rule.id,
+    }
+
+def expand_recurrences(user, start, end):
+    """
+    Occurrence virtual semua rutinitas user di [start, end], terurut per tanggal.
+    Tanggal yang sudah punya WorkoutPlan tersimpan untuk rule tersebut dilewati.
+    Dua query: rule yang aktif di rentang, dan (rule, tanggal) yang sudah disimpan.
+    """
+    rules = list(rules_in_range(user, start, end))
+    if not rules:
+        return []
+    stored = set(
+        WorkoutPlan.objects.filter(
+            recurrence__in=rules, plan_date__range=[start, end]
+        ).order_by().values_list('recurrence_id', 'plan_date')
+    )
+    occurrences = [
+        (day, rule.id, rule)
+        for rule in rules
+        for day in occurrence_dates(rule, start, end)
+        if (rule.id, day) not in stored
+    ]
+    occurrences.sort(key=lambda item: item[:2])
+    return [occurrence_to_dict(rule, day) for day, _, rule in occurrences]
+
+def merge_plans(plans, occurrences):
+    """Gabungkan plan tersimpan (sudah terurut) dengan occurrence virtual, per tanggal."""
+    # sort stabil: di tanggal yang sama plan tersimpan tetap di depan dengan urutan aslinya
+    return sorted([*plans, *occurrences], key=lambda plan: plan['plan_date'])
+
+
+# --- SIMPAN OCCURRENCE ---
+def materialize_occurrence(rule, day, **changes):
+    """
+    WorkoutPlan untuk occurrence rule pada tanggal day, dibuat jika belum ada
+    (saat diselesaikan atau diedit). Mengembalikan (plan, created).
+    """
+    if not rule.occurs_on(day):
+        raise ValueError(f"{day} is not an occurrence of recurrence {rule.id}")
+
+    plan = WorkoutPlan.objects.filter(recurrence=rule, plan_date=day).first()
+    if plan is not None:
+        if changes:
+            for field, value in changes.items():
+                setattr(plan, field, value)
+            plan.save(update_fields=[*changes, 'updated_at'])
+        return plan, False
+    try:
+        with transaction.atomic():
+            plan = WorkoutPlan.objects.create(
+                user_id=rule.user_id, exercise_id=rule.exercise_id, recurrence=rule,
+                sets=changes.get('sets', rule.sets), reps=changes.get('reps', rule.reps),
+                plan_date=day,
+            )
+            record_plan_created(plan)
+    except IntegrityError:
+        # Disimpan request lain secara bersamaan
+        return WorkoutPlan.objects.get(recurrence=rule, plan_date=day), False
+    return plan, True
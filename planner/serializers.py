@@ -0,0 +1,25 @@
+# Kolom yang diambil lewat values(); exercise_name di-join langsung dari Exercise
+PLAN_VALUES = (
+    'id', 'user_id', 'exercise_id', 'exercise__exercise_name', 'sets', 'reps',
+    'plan_date', 'description', 'is_completed', 'completed_at', 'recurrence_id',
+)
+
+def plan_row_to_dict(row):
+    return {
+        'id': row['id'],
+        'user': row['user_id'],
+        'exercise_id': row['exercise_id'],
+        'exercise_name': row['exercise__exercise_name'],
+        # Handle NULL di backend agar Flutter tidak crash
+        'sets': row['sets'] or 0,
+        'reps': row['reps'] or 0,
+        'plan_date': row['plan_date'].strftime('%Y-%m-%d'),
+        'description': row['description'],
+        'is_completed': row['is_completed'],
+        'completed_at': row['completed_at'].strftime('%Y-%m-%d %H:%M:%S') if row['completed_at'] else None,
+        'recurrence_id': row['recurrence_id'],
+    }
+
+def serialize_plans(queryset):
+    """Serialisasi WorkoutPlan untuk endpoint web & Flutter dalam satu query (tanpa lazy load relasi)."""
+    return [plan_row_to_dict(row) for row in queryset.values(*PLAN_VALUES)]
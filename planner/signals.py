@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import PlanRecurrence, PlanTombstone, WorkoutPlan
+from .stats import record_plan_deleted, record_plan_uncompleted
+
+
+def _deleted_with_user(origin):
+    # Plan ikut terhapus karena user-nya dihapus: statistik & client user itu ikut hilang
+    return isinstance(origin, get_user_model())
+
+
+@receiver(post_save, sender=WorkoutPlan)
+def update_stats_on_uncomplete(sender, instance, created, **kwargs):
+    was_completed, completed_at = getattr(instance, '_loaded_completion', (None, None))
+    if not created and was_completed and not instance.is_completed:
+        record_plan_uncompleted(instance, completed_at)
+    instance._loaded_completion = (instance.is_completed, instance.completed_at)
+
+
+@receiver(post_delete, sender=WorkoutPlan)
+def update_stats_on_delete(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_user(origin):
+        record_plan_deleted(instance)
+
+
+@receiver(post_delete, sender=WorkoutPlan)
+def record_plan_tombstone(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_user(origin):
+        PlanTombstone.objects.create(user_id=instance.user_id, plan_id=instance.pk)
+
+
+@receiver(post_delete, sender=PlanRecurrence)
+def record_recurrence_tombstone(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_user(origin):
+        PlanTombstone.objects.create(user_id=instance.user_id, recurrence_id=instance.pk)
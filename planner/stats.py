@@ -0,0 +1,177 @@
+import calendar
+import datetime
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import WorkoutPlan, WorkoutStats
+
+STAT_FIELDS = ('total_plans', 'completed_plans', 'on_time_completed')
+
+
+# --- HELPER PERIODE ---
+def month_bounds(month_start):
+    last_day = calendar.monthrange(month_start.year, month_start.month)[1]
+    return month_start, month_start.replace(day=last_day)
+
+def week_start_for(day):
+    # Minggu sebagai awal pekan, sama seperti get_weeks_in_month
+    return day - datetime.timedelta(days=(day.weekday() + 1) % 7)
+
+def period_range(period, month_start, period_start):
+    """Rentang tanggal (inklusif) yang dicakup sebuah baris statistik."""
+    first_day, last_day = month_bounds(month_start)
+    if period == WorkoutStats.PERIOD_MONTH:
+        return first_day, last_day
+    return max(period_start, first_day), min(period_start + datetime.timedelta(days=6), last_day)
+
+def period_keys(plan_date):
+    """Baris statistik (period, month_start, period_start) yang terdampak oleh sebuah plan."""
+    month_start = plan_date.replace(day=1)
+    return [
+        (WorkoutStats.PERIOD_MONTH, month_start, month_start),
+        (WorkoutStats.PERIOD_WEEK, month_start, week_start_for(plan_date)),
+    ]
+
+def is_on_time(plan):
+    # Tanggal selesai dibandingkan dalam TIME_ZONE (Asia/Jakarta), sama seperti completed_at__date di query
+    return bool(
+        plan.is_completed and plan.completed_at
+        and timezone.localdate(plan.completed_at) <= plan.plan_date
+    )
+
+
+# --- HITUNG LANGSUNG DARI WorkoutPlan ---
+def compute_stats(queryset):
+    """Total, selesai, dan selesai tepat waktu dalam satu query agregasi kondisional."""
+    completed = Q(is_completed=True)
+    return queryset.order_by().aggregate(
+        total_plans=Count('id'),
+        completed_plans=Count('id', filter=completed),
+        # completed_at__date memotong tanggal di timezone aktif (Asia/Jakarta)
+        on_time_completed=Count('id', filter=completed & Q(completed_at__date__lte=F('plan_date'))),
+    )
+
+def compute_period_stats(user, period, month_start, period_start):
+    start, end = period_range(period, month_start, period_start)
+    return compute_stats(WorkoutPlan.objects.filter(user=user, plan_date__range=[start, end]))
+
+
+# --- BACA STATISTIK ---
+def get_period_stats(user, year, month, week_start=None):
+    """
+    Statistik satu periode (bulan, atau minggu di dalam bulan) dari tabel WorkoutStats.
+    Jika barisnya belum ada (atau week_start bukan hari Minggu) dihitung langsung.
+    """
+    month_start = datetime.date(year, month, 1)
+    if week_start is None:
+        period, period_start = WorkoutStats.PERIOD_MONTH, month_start
+    else:
+        period, period_start = WorkoutStats.PERIOD_WEEK, week_start
+
+    if period == WorkoutStats.PERIOD_WEEK and week_start_for(week_start) != week_start:
+        return compute_period_stats(user, period, month_start, period_start)
+
+    row = WorkoutStats.objects.filter(
+        user=user, period=period, month_start=month_start, period_start=period_start
+    ).values(*STAT_FIELDS).first()
+    if row is None:
+        return compute_period_stats(user, period, month_start, period_start)
+    return row
+
+
+# --- UPDATE INKREMENTAL ---
+def _apply_period_delta(user, period, month_start, period_start, **deltas):
+    updated = WorkoutStats.objects.filter(
+        user=user, period=period, month_start=month_start, period_start=period_start
+    ).update(**{field: F(field) + value for field, value in deltas.items()})
+    if updated:
+        return
+
+    # Baris belum ada: inisialisasi dari data (plan yang baru disimpan sudah ikut terhitung)
+    stats = compute_period_stats(user, period, month_start, period_start)
+    try:
+        with transaction.atomic():
+            WorkoutStats.objects.create(
+                user=user, period=period, month_start=month_start,
+                period_start=period_start, **stats
+            )
+    except IntegrityError:
+        # Dibuat request lain secara bersamaan, hasil hitungannya sudah termasuk plan ini
+        pass
+
+def _apply_delta(user, plan_date, **deltas):
+    for key in period_keys(plan_date):
+        _apply_period_delta(user, *key, **deltas)
+
+def record_plan_created(plan):
+    _apply_delta(plan.user, plan.plan_date, total_plans=1)
+
+def record_plans_created_on(user, date_counts):
+    """Tambah total_plans untuk {plan_date: jumlah plan baru}, satu update per periode terdampak."""
+    counts = Counter()
+    for plan_date, count in date_counts.items():
+        for key in period_keys(plan_date):
+            counts[key] += count
+    for key, count in counts.items():
+        _apply_period_delta(user, *key, total_plans=count)
+
+def record_plans_created(user, plans):
+    """Versi bulk record_plan_created: satu update per periode terdampak, bukan per plan."""
+    record_plans_created_on(user, Counter(plan.plan_date for plan in plans))
+
+def record_plan_completed(plan):
+    deltas = {'completed_plans': 1}
+    if is_on_time(plan):
+        deltas['on_time_completed'] = 1
+    _apply_delta(plan.user, plan.plan_date, **deltas)
+
+def record_plan_uncompleted(plan, completed_at):
+    """Kebalikan record_plan_completed; completed_at = waktu selesai sebelum dibatalkan."""
+    deltas = {'completed_plans': -1}
+    if completed_at and timezone.localdate(completed_at) <= plan.plan_date:
+        deltas['on_time_completed'] = -1
+    _apply_delta(plan.user, plan.plan_date, **deltas)
+
+def record_plan_deleted(plan):
+    deltas = {'total_plans': -1}
+    if plan.is_completed:
+        deltas['completed_plans'] = -1
+        if is_on_time(plan):
+            deltas['on_time_completed'] = -1
+    _apply_delta(plan.user, plan.plan_date, **deltas)
+
+
+# --- REBUILD ---
+def rebuild_stats(users=None):
+    """Hitung ulang seluruh WorkoutStats (opsional hanya untuk user tertentu) dalam satu pass."""
+    plans = WorkoutPlan.objects.order_by().only('user_id', 'plan_date', 'is_completed', 'completed_at')
+    stats = WorkoutStats.objects.all()
+    if users is not None:
+        plans = plans.filter(user__in=users)
+        stats = stats.filter(user__in=users)
+
+    counters = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    for plan in plans.iterator(chunk_size=2000):
+        on_time = is_on_time(plan)
+        for key in period_keys(plan.plan_date):
+            counter = counters[(plan.user_id, *key)]
+            counter['total_plans'] += 1
+            if plan.is_completed:
+                counter['completed_plans'] += 1
+            if on_time:
+                counter['on_time_completed'] += 1
+
+    rows = [
+        WorkoutStats(
+            user_id=user_id, period=period, month_start=month_start,
+            period_start=period_start, **counter
+        )
+        for (user_id, period, month_start, period_start), counter in counters.items()
+    ]
+    with transaction.atomic():
+        stats.delete()
+        WorkoutStats.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
@@ -0,0 +1,128 @@
+import base64
+import datetime
+import json
+
+from django.utils import timezone
+
+from .models import PlanRecurrence, PlanTombstone, WorkoutPlan
+from .recurrence import materialize_occurrence, recurrence_to_dict
+from .serializers import serialize_plans
+from .stats import record_plan_completed
+
+# Toleransi untuk transaksi yang commit sedikit setelah token dibuat; plan yang
+# terkirim dua kali aman karena client meng-upsert berdasarkan id
+SYNC_OVERLAP = datetime.timedelta(seconds=2)
+
+
+class SyncError(ValueError):
+    pass
+
+
+# --- TOKEN ---
+def encode_token(moment):
+    raw = json.dumps([moment.isoformat()])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_token(value):
+    try:
+        (moment,) = json.loads(base64.urlsafe_b64decode(value.encode()))
+        moment = datetime.datetime.fromisoformat(moment)
+    except (ValueError, TypeError):
+        raise SyncError("Invalid sync token")
+    if timezone.is_naive(moment):
+        raise SyncError("Invalid sync token")
+    return moment
+
+
+# --- DELTA ---
+def changes_since(user, since=None):
+    """
+    Perubahan sejak since, sebagai payload sync:
+    plans / deleted (id plan yang dihapus) dan recurrences / deleted_recurrences (rule rutinitas).
+    Occurrence tidak dikirim satu per satu; client mengekspansi rule sendiri seperti recurrence.py.
+    Tanpa since: semua plan & rule user (sync awal), tanpa tombstone.
+    """
+    plans = WorkoutPlan.objects.filter(user=user)
+    rules = PlanRecurrence.objects.filter(user=user).select_related('exercise')
+    if since is None:
+        return {
+            'plans': serialize_plans(plans.order_by('plan_date', 'id')),
+            'deleted': [],
+            'recurrences': [recurrence_to_dict(rule) for rule in rules.order_by('start_date', 'id')],
+            'deleted_recurrences': [],
+        }
+
+    after = since - SYNC_OVERLAP
+    deleted, deleted_rules = set(), set()
+    for plan_id, recurrence_id in PlanTombstone.objects.filter(
+        user=user, deleted_at__gte=after
+    ).values_list('plan_id', 'recurrence_id'):
+        if recurrence_id is not None:
+            deleted_rules.add(recurrence_id)
+        else:
+            deleted.add(plan_id)
+    return {
+        'plans': serialize_plans(plans.filter(updated_at__gte=after).order_by('updated_at', 'id')),
+        'deleted': sorted(deleted),
+        'recurrences': [
+            recurrence_to_dict(rule) for rule in rules.filter(updated_at__gte=after).order_by('updated_at', 'id')
+        ],
+        'deleted_recurrences': sorted(deleted_rules),
+    }
+
+
+# --- COMPLETION OFFLINE ---
+def _completed_at(value, now):
+    if not value:
+        return now
+    moment = datetime.datetime.fromisoformat(str(value))
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    # Jam perangkat bisa maju; waktu selesai tidak boleh di masa depan
+    return min(moment, now)
+
+def _plan_for_completion(user, item):
+    if item.get('id'):
+        return WorkoutPlan.objects.filter(id=item['id'], user=user).first()
+    if item.get('recurrence_id') and item.get('date'):
+        # Occurrence rutinitas yang diselesaikan offline sebelum pernah disimpan
+        rule = PlanRecurrence.objects.filter(id=item['recurrence_id'], user=user).first()
+        if rule is None:
+            return None
+        plan, _ = materialize_occurrence(rule, datetime.date.fromisoformat(str(item['date'])))
+        return plan
+    return None
+
+def apply_completions(user, items):
+    """
+    Terapkan completion yang dikumpulkan client saat offline, per item:
+    {id | recurrence_id + date, description?, completed_at?}. Hasil per item sesuai urutan input.
+    """
+    now = timezone.now()
+    results = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({'index': index, 'status': 'error', 'error': 'Data tidak lengkap.'})
+            continue
+        try:
+            # completed_at divalidasi dulu: item yang tidak valid tidak boleh sempat menyimpan occurrence
+            completed_at = _completed_at(item.get('completed_at'), now)
+            plan = _plan_for_completion(user, item)
+        except (ValueError, TypeError):
+            results.append({'index': index, 'status': 'error', 'error': 'Data tidak valid.'})
+            continue
+        if plan is None:
+            results.append({'index': index, 'status': 'error', 'error': 'Plan tidak ditemukan.'})
+            continue
+
+        newly_completed = not plan.is_completed
+        if newly_completed:
+            plan.is_completed = True
+            plan.completed_at = completed_at
+        if 'description' in item:
+            plan.description = item['description']
+        plan.save()
+        if newly_completed:
+            record_plan_completed(plan)
+        results.append({'index': index, 'status': 'completed' if newly_completed else 'updated', 'id': plan.id})
+    return results
@@ -2,11 +2,26 @@ import calendar
 import datetime
 from django.utils import timezone
 import json
+import os
+import time
+from io import StringIO
+from unittest import mock, skipUnless
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
 from django.test import Client, SimpleTestCase, TestCase
 from django.urls import reverse, resolve
 from howto.models import Exercise
 from planner.forms import LogCompletionForm
-from planner.models import WorkoutPlan
+from planner.models import PlanBatch, PlanRecurrence, PlanTombstone, WorkoutPlan, WorkoutStats
+from planner.serializers import serialize_plans
+from planner.cloning import copy_plans
+from planner.recurrence import expand_recurrences, occurrence_dates, parse_weekdays
+from planner.sync import encode_token
+from planner.stats import (
+    compute_period_stats, compute_stats, is_on_time, month_bounds, rebuild_stats, record_plan_created, week_start_for
+)
 from planner.views import (
     PlanCreatorView,
     ExerciseSearchJSONView,
@@ -109,7 +124,7 @@ class TestPlannerViews(TestCase):
         cls.exercise1 = Exercise.objects.create(exercise_name='Push Up', main_muscle='Chest')
         cls.exercise2 = Exercise.objects.create(exercise_name='Squat', main_muscle='Legs')
 
-        cls.today = timezone.now().date()
+        cls.today = timezone.localdate()
         cls.yesterday = cls.today - datetime.timedelta(days=1)
         cls.last_month_date = cls.today - datetime.timedelta(days=30)
         
@@ -649,4 +664,836 @@ class TestLogCompletionViews(TestPlannerViews):
         self.assertEqual(response.status_code, 200)
         data = response.json()
         self.assertEqual(data['status'], 'success')
-        self.assertFalse(data['on_time'])
\ No newline at end of file
+        self.assertFalse(data['on_time'])
+
+    def test_complete_log_on_time_uses_local_date(self):
+        """'on_time' dihitung dengan tanggal Asia/Jakarta, sama seperti statistik."""
+        plan = WorkoutPlan.objects.create(
+            user=self.user, exercise=self.exercise1, sets=1, reps=1, plan_date=datetime.date(2025, 1, 10)
+        )
+        # 20:00 UTC tanggal 10 = 03:00 WIB tanggal 11 -> terlambat
+        late = datetime.datetime(2025, 1, 10, 20, 0, tzinfo=datetime.timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=late):
+            response = self.client.post(reverse('planner:ajax_complete_log', args=[plan.id]), {'description': 'Malam'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['on_time'])
+        plan.refresh_from_db()
+        self.assertFalse(is_on_time(plan))
+
+class TestWorkoutStats(TestPlannerViews):
+
+    def setUp(self):
+        super().setUp()
+        self.month_start = self.today.replace(day=1)
+        self.logs_url = reverse('planner:api_get_logs')
+
+    def _month_row(self, day=None):
+        month_start = day.replace(day=1) if day else self.month_start
+        return WorkoutStats.objects.get(
+            user=self.user, period=WorkoutStats.PERIOD_MONTH,
+            month_start=month_start, period_start=month_start
+        )
+
+    def test_add_plan_initializes_and_increments_stats(self):
+        url = reverse('planner:api_add_plan')
+        payload = {'exercise_id': self.exercise1.id, 'sets': 3, 'reps': 10, 'plan_date': self.today.isoformat()}
+
+        self.client.post(url, json.dumps(payload), content_type='application/json')
+        expected = compute_period_stats(self.user, WorkoutStats.PERIOD_MONTH, self.month_start, self.month_start)
+        self.assertEqual(self._month_row().total_plans, expected['total_plans'])
+
+        self.client.post(url, json.dumps(payload), content_type='application/json')
+        self.assertEqual(self._month_row().total_plans, expected['total_plans'] + 1)
+        self.assertTrue(WorkoutStats.objects.filter(
+            user=self.user, period=WorkoutStats.PERIOD_WEEK,
+            month_start=self.month_start, period_start=week_start_for(self.today)
+        ).exists())
+
+    def test_complete_log_increments_completed_and_on_time(self):
+        # Tepat waktu dinilai dengan tanggal Asia/Jakarta
+        local_today = timezone.localdate()
+        plan = WorkoutPlan.objects.create(user=self.user, exercise=self.exercise1, sets=1, reps=1, plan_date=local_today)
+        record_plan_created(plan)
+        before = self._month_row(local_today)
+
+        self.client.post(reverse('planner:ajax_complete_log', args=[plan.id]), {'description': 'Done'})
+        after = self._month_row(local_today)
+        self.assertEqual(after.completed_plans, before.completed_plans + 1)
+        self.assertEqual(after.on_time_completed, before.on_time_completed + 1)
+
+        # Menyimpan ulang log yang sudah selesai tidak menghitung dua kali
+        self.client.post(reverse('planner:api_complete_log', args=[plan.id]), {'description': 'Edit'})
+        self.assertEqual(self._month_row(local_today).completed_plans, after.completed_plans)
+
+    def _assert_rows_match_live(self):
+        rows = WorkoutStats.objects.filter(user=self.user)
+        self.assertTrue(rows.exists())
+        for row in rows:
+            expected = compute_period_stats(self.user, row.period, row.month_start, row.period_start)
+            self.assertEqual(
+                (row.total_plans, row.completed_plans, row.on_time_completed),
+                (expected['total_plans'], expected['completed_plans'], expected['on_time_completed']),
+            )
+
+    def test_delete_decrements_stats(self):
+        rebuild_stats([self.user])
+        self.plan_today_complete.delete()
+        self.plan_last_month.delete()
+        self._assert_rows_match_live()
+
+        # Cascade dari Exercise juga lewat post_delete
+        self.exercise1.delete()
+        self._assert_rows_match_live()
+
+    def test_uncomplete_decrements_stats(self):
+        rebuild_stats([self.user])
+        plan = WorkoutPlan.objects.get(pk=self.plan_today_complete.pk)
+        plan.is_completed = False
+        plan.completed_at = None
+        plan.save()
+        self._assert_rows_match_live()
+
+    def test_user_delete_cascades_cleanly(self):
+        rebuild_stats([self.user])
+        self.user.delete()
+        self.assertFalse(WorkoutStats.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(PlanTombstone.objects.filter(user_id=self.user.pk).exists())
+
+    def test_logs_api_reads_materialized_row(self):
+        WorkoutStats.objects.create(
+            user=self.user, period=WorkoutStats.PERIOD_MONTH, month_start=self.month_start,
+            period_start=self.month_start, total_plans=40, completed_plans=20, on_time_completed=10
+        )
+        data = self.client.get(self.logs_url).json()
+        self.assertEqual(data['total_plans'], 40)
+        self.assertEqual(data['completed_plans'], 20)
+        self.assertEqual(data['on_time_completed'], 10)
+        self.assertEqual(data['percentage'], 25.0)
+
+    def test_workout_log_view_reads_materialized_row(self):
+        WorkoutStats.objects.create(
+            user=self.user, period=WorkoutStats.PERIOD_MONTH, month_start=self.month_start,
+            period_start=self.month_start, total_plans=8, completed_plans=4, on_time_completed=2
+        )
+        response = self.client.get(reverse('workout_log'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_plans_period'], 8)
+        self.assertEqual(response.context['completed_plans_period'], 4)
+        self.assertEqual(response.context['on_time_completed_period'], 2)
+        self.assertEqual(response.context['completion_percentage_period'], 25.0)
+
+    def test_logs_api_falls_back_without_row(self):
+        data = self.client.get(self.logs_url).json()
+        expected = compute_period_stats(self.user, WorkoutStats.PERIOD_MONTH, self.month_start, self.month_start)
+        self.assertEqual(data['total_plans'], expected['total_plans'])
+        self.assertEqual(data['completed_plans'], expected['completed_plans'])
+        self.assertEqual(data['total_plans'], len(data['plans']))
+
+    def test_rebuild_command_matches_live_stats(self):
+        call_command('rebuild_workout_stats', stdout=StringIO())
+
+        for row in WorkoutStats.objects.filter(user=self.user):
+            expected = compute_period_stats(self.user, row.period, row.month_start, row.period_start)
+            self.assertEqual(row.total_plans, expected['total_plans'])
+            self.assertEqual(row.completed_plans, expected['completed_plans'])
+            self.assertEqual(row.on_time_completed, expected['on_time_completed'])
+        self.assertEqual(self._month_row().total_plans, WorkoutPlan.objects.filter(
+            user=self.user, plan_date__year=self.today.year, plan_date__month=self.today.month
+        ).count())
+
+
+class TestStatsAggregate(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='tzuser', password='password123')
+        cls.exercise = Exercise.objects.create(exercise_name='Deadlift', main_muscle='Back')
+        cls.plan_date = datetime.date(2025, 3, 10)
+        jakarta = timezone.get_default_timezone()
+
+        def plan(completed_at):
+            return WorkoutPlan.objects.create(
+                user=cls.user, exercise=cls.exercise, sets=1, reps=1, plan_date=cls.plan_date,
+                is_completed=completed_at is not None, completed_at=completed_at,
+            )
+
+        # 23:30 WIB di hari yang sama -> tepat waktu
+        cls.on_time = plan(datetime.datetime(2025, 3, 10, 23, 30, tzinfo=jakarta))
+        # 00:30 WIB keesokan harinya (masih 10 Maret di UTC) -> terlambat
+        cls.late = plan(datetime.datetime(2025, 3, 11, 0, 30, tzinfo=jakarta))
+        cls.pending = plan(None)
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            compute_stats(WorkoutPlan.objects.filter(user=self.user))
+
+    def test_on_time_uses_jakarta_date(self):
+        stats = compute_stats(WorkoutPlan.objects.filter(user=self.user))
+        self.assertEqual(stats, {'total_plans': 3, 'completed_plans': 2, 'on_time_completed': 1})
+
+    def test_python_and_sql_on_time_agree(self):
+        plans = WorkoutPlan.objects.filter(user=self.user)
+        self.assertEqual(
+            sum(1 for p in plans if is_on_time(p)),
+            compute_stats(plans)['on_time_completed'],
+        )
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), "Set RUN_BENCHMARKS=1 untuk menjalankan benchmark.")
+class BenchmarkStatsAggregate(TestCase):
+    """Membandingkan hitung statistik lama (count + loop Python) dengan satu query agregasi."""
+
+    PLAN_COUNT = 10_000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='benchuser', password='password123')
+        exercise = Exercise.objects.create(exercise_name='Bench Press', main_muscle='Chest')
+        start = datetime.date(2025, 1, 1)
+        now = timezone.now()
+        WorkoutPlan.objects.bulk_create([
+            WorkoutPlan(
+                user=cls.user, exercise=exercise, sets=3, reps=10,
+                plan_date=start + datetime.timedelta(days=i % 28),
+                is_completed=i % 2 == 0, completed_at=now if i % 2 == 0 else None,
+            )
+            for i in range(cls.PLAN_COUNT)
+        ], batch_size=1000)
+
+    @staticmethod
+    def _legacy_stats(queryset):
+        total_plans = queryset.count()
+        completed_plans = queryset.filter(is_completed=True)
+        on_time_completed = sum(1 for plan in completed_plans if is_on_time(plan))
+        return {
+            'total_plans': total_plans,
+            'completed_plans': completed_plans.count(),
+            'on_time_completed': on_time_completed,
+        }
+
+    def _time(self, func, queryset, rounds=5):
+        best = float('inf')
+        for _ in range(rounds):
+            started = time.perf_counter()
+            result = func(queryset)
+            best = min(best, time.perf_counter() - started)
+        return best, result
+
+    def test_compare_paths(self):
+        queryset = WorkoutPlan.objects.filter(user=self.user)
+        legacy_time, legacy = self._time(self._legacy_stats, queryset)
+        aggregate_time, aggregate = self._time(compute_stats, queryset)
+
+        self.assertEqual(legacy, aggregate)
+        print(
+            f"\n[benchmark] {self.PLAN_COUNT} plans: legacy {legacy_time * 1000:.1f} ms, "
+            f"aggregate {aggregate_time * 1000:.1f} ms ({legacy_time / aggregate_time:.1f}x)"
+        )
+
+
+class TestPlannerIndexes(TestPlannerViews):
+    """EXPLAIN memastikan filter rentang tanggal planner memakai index komposit WorkoutPlan."""
+
+    def setUp(self):
+        super().setUp()
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest("EXPLAIN hanya dicek untuk SQLite dan PostgreSQL.")
+        # Setahun plan agar selektivitas plan_date realistis bagi query planner
+        start = self.today - datetime.timedelta(days=365)
+        WorkoutPlan.objects.bulk_create([
+            WorkoutPlan(
+                user=self.user, exercise=self.exercise1, sets=3, reps=10,
+                plan_date=start + datetime.timedelta(days=i), is_completed=i % 2 == 0,
+            )
+            for i in range(365)
+        ])
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Tabel test terlalu kecil, tanpa ini planner PostgreSQL memilih seq scan
+                cursor.execute("SET enable_seqscan = off")
+            else:
+                # Beri statistik ke query planner SQLite (PostgreSQL mendapatkannya dari autovacuum)
+                cursor.execute("ANALYZE")
+        self.month_range = month_bounds(self.today.replace(day=1))
+
+    def test_month_range_uses_user_date_index(self):
+        plan = WorkoutPlan.objects.filter(user=self.user, plan_date__range=self.month_range).explain()
+        self.assertIn('plan_user_date_idx', plan)
+
+    def test_exact_date_uses_user_date_index(self):
+        # Query yang sama dengan GetPlansForDateAPIView
+        plan = WorkoutPlan.objects.filter(user=self.user, plan_date=self.today).order_by('is_completed', 'id').explain()
+        self.assertIn('plan_user_date_idx', plan)
+
+    def test_completed_range_uses_composite_index(self):
+        plan = WorkoutPlan.objects.filter(
+            user=self.user, is_completed=True, plan_date__range=self.month_range
+        ).explain()
+        # Planner boleh memilih salah satu index komposit, keduanya mencakup user + plan_date
+        self.assertRegex(plan, r'plan_user_(done_)?date_idx')
+
+    def test_views_filter_without_date_extraction(self):
+        for url in [reverse('planner:plan_creator'), reverse('workout_log')]:
+            sql = str(self.client.get(url).context['plans'].query)
+            self.assertNotIn('django_date_extract', sql, url)
+            self.assertNotIn('EXTRACT(', sql.upper(), url)
+
+        urls = [
+            reverse('planner:api_get_logs'),
+            f"{reverse('planner:api_get_logs')}?year={self.today.year}&month={self.today.month}"
+            f"&week_start_date={week_start_for(self.today).isoformat()}",
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(url)
+            plan_queries = [q['sql'] for q in ctx.captured_queries if 'planner_workoutplan' in q['sql']]
+            self.assertTrue(plan_queries, url)
+            for sql in plan_queries:
+                self.assertNotIn('django_date_extract', sql, url)
+                self.assertNotIn('EXTRACT(', sql.upper(), url)
+
+
+class TestPlanSerialization(TestPlannerViews):
+    """Jumlah query endpoint plan tidak boleh bertambah seiring jumlah plan."""
+
+    def _add_plans(self, count):
+        WorkoutPlan.objects.bulk_create([
+            WorkoutPlan(user=self.user, exercise=self.exercise2, sets=2, reps=6, plan_date=self.today)
+            for _ in range(count)
+        ])
+
+    def _count_queries(self, url, params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_get_logs_query_count_constant(self):
+        url = reverse('planner:api_get_logs')
+        params = {'year': self.today.year, 'month': self.today.month}
+        small, _ = self._count_queries(url, params)
+        self._add_plans(30)
+        large, data = self._count_queries(url, params)
+        self.assertEqual(small, large)
+        self.assertIn('exercise_name', data['plans'][0])
+        self.assertEqual(data['plans'][0]['user'], self.user.id)
+
+    def test_get_plans_for_date_query_count_constant(self):
+        url = reverse('planner:get_plans_for_date')
+        params = {'date': self.today.isoformat()}
+        small, _ = self._count_queries(url, params)
+        self._add_plans(30)
+        large, data = self._count_queries(url, params)
+        self.assertEqual(small, large)
+        self.assertEqual(len(data['plans']), 32)
+
+    def test_shared_serializer_fields(self):
+        [row] = serialize_plans(WorkoutPlan.objects.filter(pk=self.plan_today_complete.pk))
+        self.assertEqual(row['exercise_name'], 'Squat')
+        self.assertEqual(row['exercise_id'], self.exercise2.id)
+        self.assertEqual(row['plan_date'], self.today.strftime('%Y-%m-%d'))
+        self.assertTrue(row['is_completed'])
+        self.assertIsNotNone(row['completed_at'])
+
+
+class TestPlansForRangeAPI(TestPlannerViews):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('planner:get_plans_for_range')
+        self.params = {'start': self.last_month_date.isoformat(), 'end': self.today.isoformat()}
+
+    def _plan_queries(self, params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        queries = [q['sql'] for q in ctx.captured_queries if 'planner_workoutplan' in q['sql']]
+        return queries, response.json()
+
+    def test_summaries_grouped_by_date(self):
+        queries, data = self._plan_queries(self.params)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(data['days'], {
+            self.last_month_date.isoformat(): {'total': 1, 'completed': 0},
+            self.yesterday.isoformat(): {'total': 1, 'completed': 1},
+            self.today.isoformat(): {'total': 2, 'completed': 1},
+        })
+
+    def test_include_plans(self):
+        queries, data = self._plan_queries({**self.params, 'include_plans': 'true'})
+        self.assertEqual(len(queries), 1)
+        today = data['days'][self.today.isoformat()]
+        self.assertEqual((today['total'], today['completed']), (2, 1))
+        self.assertEqual(
+            [plan['id'] for plan in today['plans']],
+            [self.plan_today_incomplete.id, self.plan_today_complete.id],
+        )
+        self.assertEqual(today['plans'][1]['exercise_name'], 'Squat')
+
+    def test_range_outside_plans(self):
+        start = self.today + datetime.timedelta(days=10)
+        response = self.client.get(self.url, {'start': start.isoformat(), 'end': start.isoformat()})
+        self.assertEqual(response.json()['days'], {})
+
+    def test_invalid_params(self):
+        far = self.today + datetime.timedelta(days=400)
+        for params in (
+            {},
+            {'start': 'x', 'end': self.today.isoformat()},
+            {'start': self.today.isoformat(), 'end': self.yesterday.isoformat()},
+            {'start': self.today.isoformat(), 'end': far.isoformat()},
+        ):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url, self.params).status_code, 401)
+
+    def test_uses_user_date_index(self):
+        queries, _ = self._plan_queries(self.params)
+        self.assertNotIn('django_date_extract', queries[0])
+        plan = WorkoutPlan.objects.filter(
+            user=self.user, plan_date__range=[self.last_month_date, self.today]
+        ).order_by('plan_date').values('plan_date').annotate(total=Count('id')).explain()
+        self.assertRegex(plan, r'plan_user_(done_)?date_idx')
+
+
+class TestBulkAddPlanAPI(TestPlannerViews):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('planner:api_add_plans')
+        self.week = [self.today + datetime.timedelta(days=i) for i in range(7)]
+
+    def _post(self, items, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(self.url, json.dumps({'plans': items}), content_type='application/json', **headers)
+
+    def _week_items(self):
+        return [
+            {'exercise_id': exercise.id, 'sets': 3, 'reps': 10, 'plan_date': day.isoformat()}
+            for day in self.week for exercise in (self.exercise1, self.exercise2)
+        ]
+
+    def test_bulk_create_single_exercise_query(self):
+        before = WorkoutPlan.objects.filter(user=self.user).count()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post(self._week_items())
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data['created'], data['failed']), (14, 0))
+        self.assertEqual(WorkoutPlan.objects.filter(user=self.user).count(), before + 14)
+        self.assertEqual(data['results'][1]['plan']['exercise_name'], 'Squat')
+        exercise_queries = [q for q in ctx.captured_queries if 'FROM "howto_exercise"' in q['sql']]
+        self.assertEqual(len(exercise_queries), 1)
+
+    def test_per_item_errors(self):
+        items = [
+            {'exercise_id': self.exercise1.id, 'sets': 3, 'reps': 10, 'plan_date': self.today.isoformat()},
+            {'exercise_id': 99999, 'sets': 3, 'reps': 10, 'plan_date': self.today.isoformat()},
+            {'exercise_id': self.exercise1.id, 'sets': -1, 'reps': 10, 'plan_date': self.today.isoformat()},
+            {'exercise_id': self.exercise1.id, 'sets': 3, 'reps': 10, 'plan_date': '2024/01/01'},
+            {'exercise_id': self.exercise1.id, 'sets': 3},
+        ]
+        data = self._post(items).json()
+        self.assertEqual((data['created'], data['failed']), (1, 4))
+        self.assertEqual(
+            [(r['index'], r['status']) for r in data['results']],
+            [(0, 'created'), (1, 'error'), (2, 'error'), (3, 'error'), (4, 'error')],
+        )
+        self.assertIn('Latihan tidak ditemukan', data['results'][1]['error'])
+        self.assertIn('Sets dan Reps', data['results'][2]['error'])
+
+        response = self._post(items[1:])
+        self.assertEqual(response.status_code, 400)
+
+    def test_fractional_sets_are_rejected(self):
+        items = [
+            {'exercise_id': self.exercise1.id, 'sets': 3.7, 'reps': 10, 'plan_date': self.today.isoformat()},
+            {'exercise_id': self.exercise1.id, 'sets': 3, 'reps': '8.5', 'plan_date': self.today.isoformat()},
+            {'exercise_id': self.exercise1.id, 'sets': 3.0, 'reps': 10, 'plan_date': self.today.isoformat()},
+        ]
+        data = self._post(items).json()
+        self.assertEqual([r['status'] for r in data['results']], ['error', 'error', 'created'])
+        self.assertIn('Sets dan Reps', data['results'][0]['error'])
+        self.assertEqual(data['results'][2]['plan']['sets'], 3)
+
+    def test_requires_login(self):
+        self.client.logout()
+        before = WorkoutPlan.objects.count()
+        self.assertEqual(self._post(self._week_items(), key='anon').status_code, 401)
+        self.assertEqual(WorkoutPlan.objects.count(), before)
+        self.assertFalse(PlanBatch.objects.exists())
+
+    def test_invalid_payload(self):
+        self.assertEqual(self.client.post(self.url, 'bukan json', content_type='application/json').status_code, 400)
+        self.assertEqual(self._post([]).status_code, 400)
+
+    def test_idempotency_key_replays_response(self):
+        first = self._post(self._week_items(), key='upload-1')
+        count = WorkoutPlan.objects.filter(user=self.user).count()
+        retry = self._post(self._week_items(), key='upload-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(WorkoutPlan.objects.filter(user=self.user).count(), count)
+        self.assertEqual(PlanBatch.objects.filter(user=self.user).count(), 1)
+
+        reused = self._post(self._week_items()[:1], key='upload-1')
+        self.assertEqual(reused.status_code, 422)
+
+    def test_updates_stats_like_single_add(self):
+        # Baris statistik sudah ada (diupdate inkremental) sebelum upload bulk
+        self.client.post(reverse('planner:api_add_plan'), json.dumps(self._week_items()[0]), content_type='application/json')
+        self._post(self._week_items())
+
+        rows = WorkoutStats.objects.filter(user=self.user)
+        self.assertTrue(rows.exists())
+        for row in rows:
+            expected = compute_period_stats(self.user, row.period, row.month_start, row.period_start)
+            self.assertEqual(row.total_plans, expected['total_plans'])
+
+
+class TestCopyPlansAPI(TestPlannerViews):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('planner:api_copy_plans')
+        self.source_week = week_start_for(self.today)
+        self.target_week = self.source_week + datetime.timedelta(days=14)
+
+    def _post(self, payload):
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json')
+
+    def test_copy_week_single_insert(self):
+        source = WorkoutPlan.objects.filter(
+            user=self.user, plan_date__range=[self.source_week, self.source_week + datetime.timedelta(days=6)]
+        )
+        expected = sorted(
+            (exercise_id, sets, reps, plan_date + datetime.timedelta(days=14))
+            for exercise_id, sets, reps, plan_date in source.values_list('exercise_id', 'sets', 'reps', 'plan_date')
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post({'period': 'week', 'source': self.source_week.isoformat(), 'target': self.target_week.isoformat()})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['copied'], len(expected))
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "planner_workoutplan"')]
+        self.assertEqual(len(inserts), 1)
+
+        copies = WorkoutPlan.objects.filter(
+            user=self.user, plan_date__range=[self.target_week, self.target_week + datetime.timedelta(days=6)]
+        )
+        self.assertEqual(sorted(copies.values_list('exercise_id', 'sets', 'reps', 'plan_date')), expected)
+        self.assertFalse(copies.filter(is_completed=True).exists())
+        self.assertFalse(copies.exclude(description=None).exists())
+        self.assertEqual(WorkoutPlan.objects.filter(user=self.other_user).count(), 1)
+
+    def test_copy_month_skips_missing_days(self):
+        for day in (1, 28, 30, 31):
+            WorkoutPlan.objects.create(user=self.user, exercise=self.exercise1, sets=1, reps=1, plan_date=datetime.date(2025, 1, day))
+        copied, target_range = copy_plans(self.user, 'month', datetime.date(2025, 1, 15), datetime.date(2025, 2, 1))
+        self.assertEqual(copied, 2)
+        self.assertEqual(target_range, (datetime.date(2025, 2, 1), datetime.date(2025, 2, 28)))
+        self.assertEqual(
+            sorted(WorkoutPlan.objects.filter(user=self.user, plan_date__month=2, plan_date__year=2025).values_list('plan_date', flat=True)),
+            [datetime.date(2025, 2, 1), datetime.date(2025, 2, 28)],
+        )
+
+    def test_updates_stats(self):
+        month_start = self.target_week.replace(day=1)
+        # Baris bulan target sudah ada sebelum disalin (jalur update inkremental)
+        record_plan_created(WorkoutPlan.objects.create(user=self.user, exercise=self.exercise1, sets=1, reps=1, plan_date=self.target_week))
+        self._post({'period': 'week', 'source': self.source_week.isoformat(), 'target': self.target_week.isoformat()})
+
+        rows = WorkoutStats.objects.filter(user=self.user, month_start__gte=month_start)
+        self.assertTrue(rows.exists())
+        for row in rows:
+            expected = compute_period_stats(self.user, row.period, row.month_start, row.period_start)
+            self.assertEqual(row.total_plans, expected['total_plans'])
+
+    def test_invalid_params(self):
+        for payload in (
+            {'period': 'year', 'source': '2025-01-01', 'target': '2025-02-01'},
+            {'period': 'week', 'source': '2025-01-05'},
+            {'period': 'week', 'source': '05/01/2025', 'target': '2025-01-12'},
+            {'period': 'month', 'source': '2025-01-05', 'target': '2025-01-20'},
+        ):
+            self.assertEqual(self._post(payload).status_code, 400, payload)
+
+    def test_requires_login(self):
+        self.client.logout()
+        before = WorkoutPlan.objects.count()
+        response = self._post({'period': 'week', 'source': self.source_week.isoformat(), 'target': self.target_week.isoformat()})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(WorkoutPlan.objects.count(), before)
+
+    def test_empty_source(self):
+        response = self._post({'period': 'week', 'source': '2020-01-05', 'target': '2020-01-12'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['copied'], 0)
+
+
+@skipUnless(os.environ.get('RUN_BENCHMARKS'), "Set RUN_BENCHMARKS=1 untuk menjalankan benchmark.")
+class BenchmarkCopyPlans(TestCase):
+    """Menyalin satu bulan milik power user: INSERT ... SELECT vs baca + bulk_create di Python."""
+
+    PLAN_COUNT = 5_000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='benchuser', password='password123')
+        exercise = Exercise.objects.create(exercise_name='Bench Press', main_muscle='Chest')
+        WorkoutPlan.objects.bulk_create([
+            WorkoutPlan(user=cls.user, exercise=exercise, sets=3, reps=10, plan_date=datetime.date(2025, 1, 1 + i % 28))
+            for i in range(cls.PLAN_COUNT)
+        ], batch_size=1000)
+
+    def test_compare_paths(self):
+        from planner import cloning
+
+        started = time.perf_counter()
+        copied, _ = copy_plans(self.user, 'month', datetime.date(2025, 1, 1), datetime.date(2025, 3, 1))
+        sql_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        orm_copied = cloning._copy_with_orm(self.user, datetime.date(2025, 1, 1), datetime.date(2025, 1, 28), 31 + 28)
+        orm_time = time.perf_counter() - started
+
+        self.assertEqual(copied, self.PLAN_COUNT)
+        self.assertEqual(orm_copied, self.PLAN_COUNT)
+        print(
+            f"\n[benchmark] copy {self.PLAN_COUNT} plans: INSERT ... SELECT {sql_time * 1000:.1f} ms, "
+            f"ORM bulk_create {orm_time * 1000:.1f} ms ({orm_time / sql_time:.1f}x)"
+        )
+
+
+class TestPlanRecurrence(TestPlannerViews):
+    def setUp(self):
+        super().setUp()
+        # Senin 6 Jan 2025 s/d Minggu 19 Jan 2025
+        self.start = datetime.date(2025, 1, 6)
+        self.rule = PlanRecurrence.objects.create(
+            user=self.user, exercise=self.exercise2, sets=4, reps=8,
+            weekdays=parse_weekdays(['mon', 'wed', 'fri']), start_date=self.start,
+        )
+
+    def test_occurrence_dates(self):
+        days = occurrence_dates(self.rule, datetime.date(2025, 1, 1), datetime.date(2025, 1, 19))
+        self.assertEqual([d.day for d in days], [6, 8, 10, 13, 15, 17])
+        self.rule.end_date = datetime.date(2025, 1, 10)
+        self.assertEqual(len(occurrence_dates(self.rule, datetime.date(2025, 1, 1), datetime.date(2025, 1, 31))), 3)
+        with self.assertRaises(ValueError):
+            parse_weekdays(['someday'])
+
+    def test_nothing_materialized_until_completed(self):
+        url = reverse('planner:get_plans_for_date')
+        data = self.client.get(url, {'date': '2025-01-08'}).json()
+        self.assertEqual(len(data['plans']), 1)
+        self.assertEqual((data['plans'][0]['id'], data['plans'][0]['recurrence_id']), (None, self.rule.id))
+        self.assertEqual(data['plans'][0]['exercise_name'], 'Squat')
+        self.assertFalse(WorkoutPlan.objects.filter(recurrence=self.rule).exists())
+        self.assertEqual(self.client.get(url, {'date': '2025-01-07'}).json()['plans'], [])
+
+    def test_materialize_then_complete(self):
+        url = reverse('planner:api_materialize_occurrence', args=[self.rule.id])
+        response = self.client.post(url, json.dumps({'date': '2025-01-08', 'reps': 6}), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        plan = response.json()['plan']
+        self.assertEqual((plan['sets'], plan['reps'], plan['recurrence_id']), (4, 6, self.rule.id))
+
+        again = self.client.post(url, json.dumps({'date': '2025-01-08'}), content_type='application/json')
+        self.assertEqual((again.status_code, again.json()['plan']['id']), (200, plan['id']))
+        self.client.post(reverse('planner:api_complete_log', args=[plan['id']]), {'description': 'ok'})
+
+        # Occurrence tersimpan menggantikan yang virtual, tanpa duplikat
+        plans = self.client.get(reverse('planner:get_plans_for_date'), {'date': '2025-01-08'}).json()['plans']
+        self.assertEqual([(p['id'], p['is_completed']) for p in plans], [(plan['id'], True)])
+
+        bad_day = self.client.post(url, json.dumps({'date': '2025-01-07'}), content_type='application/json')
+        self.assertEqual(bad_day.status_code, 400)
+
+    def test_plan_creator_renders_occurrences(self):
+        response = self.client.get(reverse('planner:plan_creator'), {'year': 2025, 'month': 1})
+        self.assertEqual(len(response.context['recurring_plans']), 12)
+        self.assertContains(response, 'id="recurring-plan-list"')
+        self.assertContains(response, '2025-01-08')
+
+        response = self.client.get(reverse('planner:plan_creator'), {'year': 2024, 'month': 12})
+        self.assertNotContains(response, 'id="recurring-plan-list"')
+
+    def test_logs_api_expands_window(self):
+        WorkoutPlan.objects.create(user=self.user, exercise=self.exercise1, sets=1, reps=1, plan_date=datetime.date(2025, 1, 8))
+        data = self.client.get(reverse('planner:api_get_logs'), {'year': 2025, 'month': 1}).json()
+        # Jan 2025 mulai 6 Jan: Sen/Rab/Jum = 12 occurrence + 1 plan tersimpan
+        self.assertEqual(data['total_plans'], 13)
+        self.assertEqual(len(data['plans']), 13)
+        dates = [p['plan_date'] for p in data['plans']]
+        self.assertEqual(dates, sorted(dates))
+        self.assertEqual([p['id'] is None for p in data['plans'][1:3]], [False, True])
+
+    def test_web_log_and_api_totals_match(self):
+        params = {'year': 2025, 'month': 1}
+        api = self.client.get(reverse('planner:api_get_logs'), params).json()
+        web = self.client.get(reverse('workout_log'), params).context
+        self.assertEqual(api['total_plans'], 12)
+        self.assertEqual(web['total_plans_period'], api['total_plans'])
+        self.assertEqual(web['completion_percentage_period'], api['percentage'])
+
+        week = {**params, 'week_start_date': '2025-01-05'}
+        api = self.client.get(reverse('planner:api_get_logs'), week).json()
+        web = self.client.get(reverse('workout_log'), week).context
+        self.assertEqual((api['total_plans'], web['total_plans_period']), (3, 3))
+
+    def test_storage_independent_of_horizon(self):
+        occurrences = expand_recurrences(self.user, self.start, self.start + datetime.timedelta(days=364))
+        # 52 minggu x 3 hari + Senin ke-53
+        self.assertEqual(len(occurrences), 157)
+        self.assertFalse(WorkoutPlan.objects.filter(recurrence__isnull=False).exists())
+
+    def test_create_and_list_recurrences(self):
+        url = reverse('planner:api_recurrences')
+        payload = {'exercise_id': self.exercise1.id, 'sets': 3, 'reps': 12, 'weekdays': ['tue', 'thu'], 'start_date': '2025-02-01'}
+        response = self.client.post(url, json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['weekdays'], ['tue', 'thu'])
+        self.assertEqual(len(self.client.get(url).json()['recurrences']), 2)
+
+        for bad in ({**payload, 'weekdays': []}, {**payload, 'sets': -2}, {**payload, 'end_date': '2025-01-01'}):
+            self.assertEqual(self.client.post(url, json.dumps(bad), content_type='application/json').status_code, 400)
+
+    def test_recurrence_endpoints_require_login(self):
+        self.client.logout()
+        url = reverse('planner:api_recurrences')
+        payload = {'exercise_id': self.exercise1.id, 'sets': 3, 'reps': 12, 'weekdays': ['tue'], 'start_date': '2025-02-01'}
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertEqual(self.client.post(url, json.dumps(payload), content_type='application/json').status_code, 401)
+        response = self.client.post(
+            reverse('planner:api_materialize_occurrence', args=[self.rule.id]),
+            json.dumps({'date': self.start.isoformat()}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(PlanRecurrence.objects.count(), 1)
+        self.assertFalse(WorkoutPlan.objects.filter(recurrence=self.rule).exists())
+
+
+class TestSyncAPI(TestPlannerViews):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('planner:api_sync')
+        # Semua plan fixture dianggap sudah tersinkron sejak sejam lalu
+        WorkoutPlan.objects.update(updated_at=timezone.now() - datetime.timedelta(hours=2))
+        self.token = encode_token(timezone.now() - datetime.timedelta(hours=1))
+
+    def _post(self, payload):
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json')
+
+    def test_initial_sync_returns_everything(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(len(data['plans']), WorkoutPlan.objects.filter(user=self.user).count())
+        self.assertEqual(data['deleted'], [])
+        self.assertTrue(data['token'])
+
+    def test_steady_state_is_empty(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(self.url, {'since': self.token}).json()
+        self.assertEqual((data['plans'], data['deleted']), ([], []))
+        self.assertEqual((data['recurrences'], data['deleted_recurrences']), ([], []))
+        sync_queries = [q['sql'] for q in ctx.captured_queries if 'planner_' in q['sql']]
+        self.assertEqual(len(sync_queries), 3)
+
+    def test_inserted_updated_and_deleted(self):
+        created = WorkoutPlan.objects.create(user=self.user, exercise=self.exercise2, sets=1, reps=1, plan_date=self.today)
+        self.plan_last_month.sets = 9
+        self.plan_last_month.save()
+        deleted_id = self.plan_yesterday_late.id
+        self.plan_yesterday_late.delete()
+        self.other_user_plan.delete()
+
+        data = self.client.get(self.url, {'since': self.token}).json()
+        self.assertEqual(sorted(p['id'] for p in data['plans']), sorted([created.id, self.plan_last_month.id]))
+        self.assertEqual(data['deleted'], [deleted_id])
+
+        # Token baru: tidak ada perubahan lagi setelah jeda overlap
+        PlanTombstone.objects.update(deleted_at=timezone.now() - datetime.timedelta(hours=2))
+        WorkoutPlan.objects.update(updated_at=timezone.now() - datetime.timedelta(hours=2))
+        again = self.client.get(self.url, {'since': data['token']}).json()
+        self.assertEqual((again['plans'], again['deleted']), ([], []))
+
+    def test_offline_completions(self):
+        rule = PlanRecurrence.objects.create(
+            user=self.user, exercise=self.exercise1, sets=3, reps=5,
+            weekdays=parse_weekdays(['mon']), start_date=datetime.date(2025, 1, 6),
+        )
+        completed_at = (timezone.now() - datetime.timedelta(hours=3)).isoformat()
+        data = self._post({'since': self.token, 'completions': [
+            {'id': self.plan_today_incomplete.id, 'description': 'offline', 'completed_at': completed_at},
+            {'recurrence_id': rule.id, 'date': '2025-01-13'},
+            {'id': self.other_user_plan.id},
+        ]}).json()
+
+        self.assertEqual([r['status'] for r in data['completions']], ['completed', 'completed', 'error'])
+        self.plan_today_incomplete.refresh_from_db()
+        self.assertTrue(self.plan_today_incomplete.is_completed)
+        self.assertEqual(self.plan_today_incomplete.completed_at.isoformat(), completed_at)
+        self.assertEqual(
+            sorted(p['id'] for p in data['plans']),
+            sorted([self.plan_today_incomplete.id, data['completions'][1]['id']]),
+        )
+        self.assertFalse(WorkoutPlan.objects.get(id=self.other_user_plan.id).is_completed)
+
+    def test_recurrences_are_synced(self):
+        rule = PlanRecurrence.objects.create(
+            user=self.user, exercise=self.exercise1, sets=3, reps=5,
+            weekdays=parse_weekdays(['mon', 'thu']), start_date=datetime.date(2025, 1, 6),
+        )
+        initial = self.client.get(self.url).json()
+        self.assertEqual([r['id'] for r in initial['recurrences']], [rule.id])
+        self.assertEqual(initial['recurrences'][0]['weekdays'], ['mon', 'thu'])
+
+        # Rule baru/diubah ikut delta; rule yang sudah tersinkron tidak
+        PlanRecurrence.objects.update(updated_at=timezone.now() - datetime.timedelta(hours=2))
+        self.assertEqual(self.client.get(self.url, {'since': self.token}).json()['recurrences'], [])
+        rule.end_date = datetime.date(2025, 3, 31)
+        rule.save()
+        data = self.client.get(self.url, {'since': self.token}).json()
+        self.assertEqual([(r['id'], r['end_date']) for r in data['recurrences']], [(rule.id, '2025-03-31')])
+
+        rule_id = rule.id
+        rule.delete()
+        data = self.client.get(self.url, {'since': self.token}).json()
+        self.assertEqual((data['recurrences'], data['deleted_recurrences']), ([], [rule_id]))
+        self.assertEqual(data['deleted'], [])
+
+    def test_invalid_completion_does_not_materialize(self):
+        rule = PlanRecurrence.objects.create(
+            user=self.user, exercise=self.exercise1, sets=3, reps=5,
+            weekdays=parse_weekdays(['mon']), start_date=datetime.date(2025, 1, 6),
+        )
+        data = self._post({'since': self.token, 'completions': [
+            {'recurrence_id': rule.id, 'date': '2025-01-13', 'completed_at': 'kemarin'},
+        ]}).json()
+
+        self.assertEqual(data['completions'][0]['status'], 'error')
+        self.assertFalse(WorkoutPlan.objects.filter(recurrence=rule).exists())
+        self.assertEqual(data['plans'], [])
+
+    def test_copy_plans_are_synced(self):
+        source = week_start_for(self.today)
+        response = self.client.post(
+            reverse('planner:api_copy_plans'),
+            json.dumps({'period': 'week', 'source': source.isoformat(), 'target': (source + datetime.timedelta(days=7)).isoformat()}),
+            content_type='application/json',
+        )
+        copied = response.json()['copied']
+        self.assertGreater(copied, 0)
+        data = self.client.get(self.url, {'since': self.token}).json()
+        self.assertEqual(len(data['plans']), copied)
+
+    def test_invalid_token(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'bukan-token'}).status_code, 400)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        response = self._post({'completions': [{'id': self.plan_today_incomplete.id}]})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(WorkoutPlan.objects.get(id=self.plan_today_incomplete.id).is_completed)
+
@@ -8,7 +8,13 @@ urlpatterns = [
     path('', views.PlanCreatorView.as_view(),name='plan_creator'),
     path('search-exercises/', views.ExerciseSearchJSONView.as_view(), name='search_exercises'),
     path('api/add-plan/', views.AddPlanAPIView.as_view(), name='api_add_plan'),
+    path('api/add-plans/', views.BulkAddPlanAPIView.as_view(), name='api_add_plans'),
+    path('api/copy-plans/', views.CopyPlansAPIView.as_view(), name='api_copy_plans'),
     path('api/get-plans-for-date/', views.GetPlansForDateAPIView.as_view(), name='get_plans_for_date'),
+    path('api/get-plans-for-range/', views.GetPlansForRangeAPIView.as_view(), name='get_plans_for_range'),
+    path('api/sync/', views.SyncAPIView.as_view(), name='api_sync'),
+    path('api/recurrences/', views.RecurrenceAPIView.as_view(), name='api_recurrences'),
+    path('api/recurrences/<int:recurrence_id>/materialize/', views.MaterializeOccurrenceAPIView.as_view(), name='api_materialize_occurrence'),
     path('log/load-form/<int:plan_id>/', views.load_completion_form, name='load_completion_form'),
     path('log/complete/<int:plan_id>/', views.ajax_complete_log, name='ajax_complete_log'),
     path('api/get-logs/', views.get_workout_logs_api, name='api_get_logs'),
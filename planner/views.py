@@ -1,4 +1,5 @@
 import json
+import hashlib
 import datetime
 import calendar 
 from django.shortcuts import render, get_object_or_404
@@ -9,6 +10,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required 
 from django.views.decorators.http import require_POST 
 from django.utils import timezone 
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
 from django.db.models.functions import ExtractMonth, ExtractYear
 from django.views.decorators.csrf import csrf_exempt  
 from django.utils.decorators import method_decorator 
@@ -16,8 +19,14 @@ from django.contrib.auth.models import User
 from django.conf import settings                     
 
 from howto.models import Exercise
-from .models import WorkoutPlan
+from howto.search import search_exercises
+from .models import PlanBatch, PlanRecurrence, WorkoutPlan, WorkoutStats
 from .forms import LogCompletionForm 
+from .cloning import PERIOD_MONTH, PERIOD_WEEK, copy_plans, copy_ranges
+from .recurrence import expand_recurrences, materialize_occurrence, merge_plans, parse_weekdays, recurrence_to_dict
+from .serializers import PLAN_VALUES, plan_row_to_dict, serialize_plans
+from .sync import SyncError, apply_completions, changes_since, decode_token, encode_token
+from .stats import get_period_stats, is_on_time, month_bounds, period_range, record_plan_created, record_plan_completed, record_plans_created
 
 # --- HELPER FUNCTION ---
 def get_weeks_in_month(year, month):
@@ -42,6 +51,17 @@ def get_weeks_in_month(year, month):
                  })
     return weeks
 
+def get_log_stats(user, year, month, week_start, plan_range):
+    """
+    Statistik log untuk WorkoutLogView & get_workout_logs_api: baris WorkoutStats ditambah
+    occurrence rutinitas yang belum disimpan (dihitung sebagai plan belum selesai).
+    Mengembalikan (stats, occurrences).
+    """
+    stats = dict(get_period_stats(user, year, month, week_start))
+    occurrences = expand_recurrences(user, *plan_range)
+    stats['total_plans'] += len(occurrences)
+    return stats, occurrences
+
 # --- VIEW WEB (Tetap pakai LoginRequiredMixin) ---
 class PlanCreatorView(LoginRequiredMixin, ListView): 
     model = WorkoutPlan
@@ -53,26 +73,29 @@ class PlanCreatorView(LoginRequiredMixin, ListView):
         self.selected_year = self.request.GET.get('year')
         self.selected_month = self.request.GET.get('month')
 
+        month_start = None
         if self.selected_year and self.selected_month:
             try:
-                queryset = queryset.filter(
-                    plan_date__year=int(self.selected_year),
-                    plan_date__month=int(self.selected_month)
-                )
+                month_start = datetime.date(int(self.selected_year), int(self.selected_month), 1)
             except ValueError:
                 pass
-        else:
+        if month_start is None:
              today = timezone.now().date()
              self.selected_year = str(today.year)
              self.selected_month = str(today.month)
-             queryset = queryset.filter(
-                 plan_date__year=today.year,
-                 plan_date__month=today.month
-             )
+             month_start = today.replace(day=1)
+
+        # Filter rentang tanggal (bukan __year/__month) agar index (user, plan_date) terpakai
+        self.month_range = month_bounds(month_start)
+        queryset = queryset.filter(plan_date__range=self.month_range)
         return queryset.order_by('-plan_date', 'is_completed', 'id') 
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['selected_year'] = self.selected_year
+        context['selected_month'] = self.selected_month
+        # Occurrence rutinitas yang belum disimpan, diekspansi untuk bulan yang ditampilkan
+        context['recurring_plans'] = expand_recurrences(self.request.user, *self.month_range)
         return context
 
 class WorkoutLogView(LoginRequiredMixin, ListView): 
@@ -93,7 +116,7 @@ class WorkoutLogView(LoginRequiredMixin, ListView):
         try:
             year = int(self.selected_year) if self.selected_year else current_year
             month = int(self.selected_month) if self.selected_month else current_month
-            if not (1 <= month <= 12):
+            if not (1 <= month <= 12 and datetime.MINYEAR <= year <= datetime.MAXYEAR):
                 month = current_month
                 year = current_year 
         except (ValueError, TypeError):
@@ -107,44 +130,39 @@ class WorkoutLogView(LoginRequiredMixin, ListView):
             try:
                 start_date = datetime.datetime.strptime(self.selected_week_start, '%Y-%m-%d').date()
                 end_date = start_date + datetime.timedelta(days=6)
-                queryset = queryset.filter(
-                    plan_date__year=year,
-                    plan_date__month=month,
-                    plan_date__range=[start_date, end_date]
-                )
+                self.plan_range = period_range(WorkoutStats.PERIOD_WEEK, datetime.date(year, month, 1), start_date)
+                queryset = queryset.filter(plan_date__range=self.plan_range)
                 self.period_start_date = start_date
                 self.period_end_date = end_date
                 self.filter_type = 'week'
             except ValueError:
-                queryset = queryset.filter(plan_date__year=year, plan_date__month=month)
-                self.period_start_date = datetime.date(year, month, 1)
-                self.period_end_date = datetime.date(year, month, calendar.monthrange(year, month)[1])
+                self.period_start_date, self.period_end_date = month_bounds(datetime.date(year, month, 1))
+                self.plan_range = (self.period_start_date, self.period_end_date)
+                queryset = queryset.filter(plan_date__range=self.plan_range)
                 self.filter_type = 'month'
                 self.selected_week_start = None
         else:
-            queryset = queryset.filter(plan_date__year=year, plan_date__month=month)
-            self.period_start_date = datetime.date(year, month, 1)
-            self.period_end_date = datetime.date(year, month, calendar.monthrange(year, month)[1])
+            self.period_start_date, self.period_end_date = month_bounds(datetime.date(year, month, 1))
+            self.plan_range = (self.period_start_date, self.period_end_date)
+            queryset = queryset.filter(plan_date__range=self.plan_range)
             self.filter_type = 'month'
             self.selected_week_start = None 
         return queryset.order_by('plan_date', 'id')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        filtered_plans = context['plans']
 
-        total_plans = filtered_plans.count()
-        completed_plans = filtered_plans.filter(is_completed=True)
-        completed_count = completed_plans.count()
-
-        on_time_completed = 0
-        for plan in completed_plans:
-             if plan.completed_at and plan.completed_at.date() <= plan.plan_date:
-                on_time_completed += 1
+        # Sama dengan get_workout_logs_api: occurrence rutinitas ikut dihitung
+        stats, _ = get_log_stats(
+            self.request.user, self.year_for_context, self.month_for_context,
+            self.period_start_date if self.filter_type == 'week' else None, self.plan_range
+        )
+        total_plans = stats['total_plans']
+        on_time_completed = stats['on_time_completed']
         percentage = (on_time_completed / total_plans) * 100 if total_plans > 0 else 0
 
         context['total_plans_period'] = total_plans
-        context['completed_plans_period'] = completed_count
+        context['completed_plans_period'] = stats['completed_plans']
         context['on_time_completed_period'] = on_time_completed
         context['completion_percentage_period'] = round(percentage, 1)
 
@@ -182,16 +200,10 @@ class ExerciseSearchJSONView(View): # HAPUS LoginRequiredMixin
             return JsonResponse({'exercises': []}, status=200)
             
         try:
-            matching_exercises = Exercise.objects.filter(
-                exercise_name__icontains=query
-            )[:10]
-            
-            exercises_list = []
-            for exercise in matching_exercises:
-                exercises_list.append({
-                    'id': exercise.id,
-                    'name': exercise.exercise_name
-                })
+            exercises_list = [
+                {'id': exercise_id, 'name': name}
+                for exercise_id, name in search_exercises(query, limit=10)
+            ]
             
             return JsonResponse({'exercises': exercises_list})
             
@@ -242,6 +254,7 @@ class AddPlanAPIView(View): # HAPUS LoginRequiredMixin
                 reps=reps,
                 plan_date=plan_date
             )
+            record_plan_created(plan_item)
             
             return JsonResponse({
                 'id': plan_item.id,
@@ -257,6 +270,189 @@ class AddPlanAPIView(View): # HAPUS LoginRequiredMixin
             return JsonResponse({'error': str(e)}, status=500)
 
 
+# Batas item per request bulk (program mingguan biasanya 5 latihan x 7 hari)
+MAX_BULK_PLANS = 200
+
+def _positive_int(value):
+    if isinstance(value, bool):
+        return None
+    # int() memotong pecahan (3.7 -> 3); angka JSON yang bukan bilangan bulat ditolak
+    if isinstance(value, float) and not value.is_integer():
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+def _replay_batch(batch, request_hash):
+    if batch.request_hash != request_hash:
+        return JsonResponse({'error': 'Idempotency-Key sudah dipakai untuk request lain.'}, status=422)
+    response = JsonResponse(batch.response, status=batch.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+@method_decorator(csrf_exempt, name='dispatch')
+class BulkAddPlanAPIView(View):
+    """
+    Membuat banyak WorkoutPlan sekaligus: {"plans": [{exercise_id, sets, reps, plan_date}, ...]}.
+    Semua exercise_id divalidasi dengan satu query IN, plan yang valid disimpan dengan
+    bulk_create dalam satu transaksi, dan hasil dikembalikan per item (sesuai urutan input).
+    Header Idempotency-Key (atau field idempotency_key) membuat retry tidak menduplikasi plan.
+    """
+    def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON data.'}, status=400)
+
+        items = data.get('plans') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return JsonResponse({'error': 'Data tidak lengkap.'}, status=400)
+        if len(items) > MAX_BULK_PLANS:
+            return JsonResponse({'error': f'Maksimal {MAX_BULK_PLANS} plan per request.'}, status=400)
+
+        key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+        if key is not None and (not isinstance(key, str) or len(key) > 255):
+            return JsonResponse({'error': 'Idempotency-Key tidak valid.'}, status=400)
+
+        # Tanpa fallback user dev mode: endpoint ini membaca/mengubah data seluruh akun
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        user = request.user
+
+        request_hash = hashlib.sha256(request.body).hexdigest()
+        if key:
+            batch = PlanBatch.objects.filter(user=user, key=key).first()
+            if batch is not None:
+                return _replay_batch(batch, request_hash)
+
+        try:
+            exercise_ids = {
+                _positive_int(item.get('exercise_id')) for item in items if isinstance(item, dict)
+            }
+            exercise_names = dict(
+                Exercise.objects.filter(id__in=exercise_ids - {None}).values_list('id', 'exercise_name')
+            )
+
+            results, plans = [], []
+            for index, item in enumerate(items):
+                if not isinstance(item, dict) or not all(
+                    item.get(field) for field in ('exercise_id', 'sets', 'reps', 'plan_date')
+                ):
+                    results.append({'index': index, 'status': 'error', 'error': 'Data tidak lengkap.'})
+                    continue
+
+                exercise_id = _positive_int(item['exercise_id'])
+                sets, reps = _positive_int(item['sets']), _positive_int(item['reps'])
+                if exercise_id not in exercise_names:
+                    error = 'Latihan tidak ditemukan.'
+                elif sets is None or reps is None:
+                    error = 'Sets dan Reps harus berupa angka positif.'
+                else:
+                    try:
+                        plan_date = datetime.date.fromisoformat(str(item['plan_date']))
+                        error = None
+                    except ValueError:
+                        error = 'Format tanggal tidak valid.'
+                if error:
+                    results.append({'index': index, 'status': 'error', 'error': error})
+                    continue
+
+                plans.append(WorkoutPlan(
+                    user=user, exercise_id=exercise_id, sets=sets, reps=reps, plan_date=plan_date
+                ))
+                results.append({'index': index, 'status': 'created', 'plan': plans[-1]})
+
+            created = len(plans)
+            payload = {'created': created, 'failed': len(items) - created, 'results': results}
+            status = 201 if created else 400
+
+            with transaction.atomic():
+                WorkoutPlan.objects.bulk_create(plans)
+                record_plans_created(user, plans)
+                for result in results:
+                    plan = result.get('plan')
+                    if plan is not None:
+                        result['plan'] = {
+                            'id': plan.id,
+                            'exercise_id': plan.exercise_id,
+                            'exercise_name': exercise_names[plan.exercise_id],
+                            'sets': plan.sets,
+                            'reps': plan.reps,
+                            'plan_date': plan.plan_date.strftime('%Y-%m-%d'),
+                        }
+                # Hanya batch yang membuat plan yang perlu diingat; error validasi selalu sama
+                if key and created:
+                    PlanBatch.objects.create(
+                        user=user, key=key, request_hash=request_hash,
+                        status_code=status, response=payload,
+                    )
+            return JsonResponse(payload, status=status)
+
+        except IntegrityError:
+            # Retry bersamaan dengan key yang sama sudah lebih dulu commit; transaksi ini di-rollback
+            batch = PlanBatch.objects.filter(user=user, key=key).first() if key else None
+            if batch is not None:
+                return _replay_batch(batch, request_hash)
+            return JsonResponse({'error': 'Gagal menyimpan plan.'}, status=500)
+        except Exception as e:
+            print(f"Error in BulkAddPlanAPIView: {e}")
+            return JsonResponse({'error': str(e)}, status=500)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class CopyPlansAPIView(View):
+    """
+    Salin rutinitas: {"period": "week"|"month", "source": "YYYY-MM-DD", "target": "YYYY-MM-DD"}.
+    Semua plan di periode sumber diduplikasi ke periode target (tanggal digeser) di sisi server
+    dengan satu INSERT ... SELECT; salinan selalu belum selesai dan tanpa catatan.
+    """
+    def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON data.'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'Data tidak lengkap.'}, status=400)
+
+        period = data.get('period')
+        if period not in (PERIOD_WEEK, PERIOD_MONTH):
+            return JsonResponse({'error': "Period harus 'week' atau 'month'."}, status=400)
+        if not data.get('source') or not data.get('target'):
+            return JsonResponse({'error': 'Data tidak lengkap.'}, status=400)
+
+        try:
+            source = datetime.date.fromisoformat(str(data['source']))
+            target = datetime.date.fromisoformat(str(data['target']))
+        except ValueError:
+            return JsonResponse({'error': 'Format tanggal tidak valid.'}, status=400)
+
+        (source_start, source_end), target_start = copy_ranges(period, source, target)
+        if source_start == target_start:
+            return JsonResponse({'error': 'Periode sumber dan target sama.'}, status=400)
+
+        # Tanpa fallback user dev mode: endpoint ini membaca/mengubah data seluruh akun
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        user = request.user
+
+        try:
+            copied, (target_start, target_end) = copy_plans(user, period, source, target)
+        except Exception as e:
+            print(f"Error in CopyPlansAPIView: {e}")
+            return JsonResponse({'error': 'Gagal menyalin rencana.'}, status=500)
+
+        return JsonResponse({
+            'copied': copied,
+            'period': period,
+            'source_start': source_start.strftime('%Y-%m-%d'),
+            'source_end': source_end.strftime('%Y-%m-%d'),
+            'target_start': target_start.strftime('%Y-%m-%d'),
+            'target_end': target_end.strftime('%Y-%m-%d'),
+        }, status=201 if copied else 200)
+
+
 class GetPlansForDateAPIView(View): # HAPUS LoginRequiredMixin
     def get(self, request, *args, **kwargs):
         date_str = request.GET.get('date', None)
@@ -283,27 +479,237 @@ class GetPlansForDateAPIView(View): # HAPUS LoginRequiredMixin
         # --------------------------------------
 
         try:
+            # plan_date sudah tetap; urutan sama dengan Meta.ordering tanpa sort -plan_date
             plans = WorkoutPlan.objects.filter(
                 user=user, 
                 plan_date=plan_date
+            ).order_by('is_completed', 'id')
+
+            # Occurrence rutinitas (belum selesai) setelah plan tersimpan yang belum selesai
+            plans = sorted(
+                [*serialize_plans(plans), *expand_recurrences(user, plan_date, plan_date)],
+                key=lambda plan: plan['is_completed'],
             )
-            
-            plans_list = []
-            for plan_item in plans:
-                plans_list.append({
-                    'id': plan_item.id,
-                    'exercise_name': plan_item.exercise.exercise_name,
-                    # Handle NULL di backend agar Flutter tidak crash
-                    'sets': plan_item.sets if plan_item.sets is not None else 0,
-                    'reps': plan_item.reps if plan_item.reps is not None else 0,
-                })
-                
-            return JsonResponse({'plans': plans_list})
+            return JsonResponse({'plans': plans})
             
         except Exception as e:
             print(f"Error in GetPlansForDateAPIView: {e}")
             return JsonResponse({'error': 'Gagal mengambil data rencana.'}, status=500)
 
+# Rentang maksimal satu request: satu tahun penuh (kalender biasanya hanya meminta 6 minggu)
+MAX_RANGE_DAYS = 366
+
+class GetPlansForRangeAPIView(View):
+    """
+    Plan dalam rentang [start, end] dikelompokkan per tanggal, untuk tampilan kalender
+    dalam satu request. Hanya tanggal yang punya plan yang dikirim.
+    ?include_plans=true menambahkan baris plan lengkap per tanggal.
+    """
+    def get(self, request, *args, **kwargs):
+        start_str = request.GET.get('start')
+        end_str = request.GET.get('end')
+
+        if not start_str or not end_str:
+            return JsonResponse({'error': 'Parameter start dan end wajib diisi.'}, status=400)
+
+        try:
+            start_date = datetime.date.fromisoformat(start_str)
+            end_date = datetime.date.fromisoformat(end_str)
+        except ValueError:
+            return JsonResponse({'error': 'Format tanggal tidak valid.'}, status=400)
+
+        if end_date < start_date:
+            return JsonResponse({'error': 'Tanggal end harus setelah start.'}, status=400)
+        if (end_date - start_date).days >= MAX_RANGE_DAYS:
+            return JsonResponse({'error': f'Rentang maksimal {MAX_RANGE_DAYS} hari.'}, status=400)
+
+        include_plans = request.GET.get('include_plans', '').lower() in ('1', 'true', 'yes')
+
+        # Tanpa fallback user dev mode: endpoint ini membaca/mengubah data seluruh akun
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        user = request.user
+
+        # Satu query range di index (user, plan_date)
+        plans = WorkoutPlan.objects.filter(
+            user=user,
+            plan_date__range=[start_date, end_date]
+        )
+
+        days = {}
+        occurrences = expand_recurrences(user, start_date, end_date)
+        if include_plans:
+            for plan in merge_plans(serialize_plans(plans.order_by('plan_date', 'is_completed', 'id')), occurrences):
+                day = days.setdefault(plan['plan_date'], {'total': 0, 'completed': 0, 'plans': []})
+                day['total'] += 1
+                day['completed'] += plan['is_completed']
+                day['plans'].append(plan)
+        else:
+            summaries = (
+                plans.order_by('plan_date')
+                .values('plan_date')
+                .annotate(total=Count('id'), completed=Count('id', filter=Q(is_completed=True)))
+            )
+            for row in summaries:
+                days[row['plan_date'].strftime('%Y-%m-%d')] = {
+                    'total': row['total'],
+                    'completed': row['completed'],
+                }
+            for occurrence in occurrences:
+                day = days.setdefault(occurrence['plan_date'], {'total': 0, 'completed': 0})
+                day['total'] += 1
+            days = dict(sorted(days.items()))
+
+        return JsonResponse({
+            'start': start_date.strftime('%Y-%m-%d'),
+            'end': end_date.strftime('%Y-%m-%d'),
+            'days': days,
+        })
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RecurrenceAPIView(View):
+    """
+    GET: daftar rutinitas berulang user.
+    POST: {exercise_id, sets, reps, weekdays: ["mon", "wed", "fri"], start_date, end_date?}.
+    Occurrence tidak disimpan; endpoint baca planner mengekspansinya saat diminta.
+    """
+    def _user(self, request):
+        # Tanpa fallback user dev mode: endpoint ini membaca/mengubah data seluruh akun
+        if not request.user.is_authenticated:
+            return None, JsonResponse({'error': 'Authentication required.'}, status=401)
+        return request.user, None
+
+    def get(self, request, *args, **kwargs):
+        user, error = self._user(request)
+        if error:
+            return error
+        rules = PlanRecurrence.objects.filter(user=user).select_related('exercise').order_by('start_date', 'id')
+        return JsonResponse({'recurrences': [recurrence_to_dict(rule) for rule in rules]})
+
+    def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON data.'}, status=400)
+        if not isinstance(data, dict) or not all(
+            data.get(field) for field in ('exercise_id', 'sets', 'reps', 'weekdays', 'start_date')
+        ):
+            return JsonResponse({'error': 'Data tidak lengkap.'}, status=400)
+
+        sets, reps = _positive_int(data['sets']), _positive_int(data['reps'])
+        if sets is None or reps is None:
+            return JsonResponse({'error': 'Sets dan Reps harus berupa angka positif.'}, status=400)
+        try:
+            weekdays = parse_weekdays(data['weekdays'])
+        except ValueError:
+            return JsonResponse({'error': 'Hari tidak valid.'}, status=400)
+        try:
+            start_date = datetime.date.fromisoformat(str(data['start_date']))
+            end_date = datetime.date.fromisoformat(str(data['end_date'])) if data.get('end_date') else None
+        except ValueError:
+            return JsonResponse({'error': 'Format tanggal tidak valid.'}, status=400)
+        if end_date is not None and end_date < start_date:
+            return JsonResponse({'error': 'Tanggal end harus setelah start.'}, status=400)
+
+        user, error = self._user(request)
+        if error:
+            return error
+
+        exercise = Exercise.objects.filter(id=_positive_int(data['exercise_id'])).only('id', 'exercise_name').first()
+        if exercise is None:
+            return JsonResponse({'error': 'Latihan tidak ditemukan.'}, status=404)
+
+        rule = PlanRecurrence.objects.create(
+            user=user, exercise=exercise, sets=sets, reps=reps,
+            weekdays=weekdays, start_date=start_date, end_date=end_date,
+        )
+        return JsonResponse(recurrence_to_dict(rule), status=201)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MaterializeOccurrenceAPIView(View):
+    """
+    Simpan satu occurrence rutinitas sebagai WorkoutPlan: {date, sets?, reps?}.
+    Dipanggil sebelum occurrence diselesaikan (api_complete_log) atau diedit;
+    mengembalikan plan yang sudah ada jika occurrence tersebut pernah disimpan.
+    """
+    def post(self, request, recurrence_id, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON data.'}, status=400)
+        if not isinstance(data, dict) or not data.get('date'):
+            return JsonResponse({'error': 'Tanggal tidak diberikan.'}, status=400)
+        try:
+            day = datetime.date.fromisoformat(str(data['date']))
+        except ValueError:
+            return JsonResponse({'error': 'Format tanggal tidak valid.'}, status=400)
+
+        changes = {}
+        for field in ('sets', 'reps'):
+            if field in data:
+                changes[field] = _positive_int(data[field])
+                if changes[field] is None:
+                    return JsonResponse({'error': 'Sets dan Reps harus berupa angka positif.'}, status=400)
+
+        # Tanpa fallback user dev mode: endpoint ini membaca/mengubah data seluruh akun
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        user = request.user
+
+        rule = get_object_or_404(PlanRecurrence, id=recurrence_id, user=user)
+        try:
+            plan, created = materialize_occurrence(rule, day, **changes)
+        except ValueError:
+            return JsonResponse({'error': 'Tanggal bukan jadwal rutinitas ini.'}, status=400)
+
+        row = WorkoutPlan.objects.filter(pk=plan.pk).values(*PLAN_VALUES).get()
+        return JsonResponse({'plan': plan_row_to_dict(row)}, status=201 if created else 200)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class SyncAPIView(View):
+    """
+    Delta sync untuk client offline-first.
+    GET ?since=<token>: plan & rutinitas yang dibuat/diubah dan id yang dihapus sejak token itu
+    (tanpa since: semua plan & rutinitas, untuk sync awal), plus token baru untuk request berikutnya.
+    POST {"since": token, "completions": [...]}: terapkan completion offline dulu, lalu kirim delta yang sama.
+    """
+    def get(self, request, *args, **kwargs):
+        return self._sync(request, request.GET.get('since'), [])
+
+    def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON data.'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'Data tidak lengkap.'}, status=400)
+
+        completions = data.get('completions') or []
+        if not isinstance(completions, list):
+            return JsonResponse({'error': 'completions harus berupa list.'}, status=400)
+        if len(completions) > MAX_BULK_PLANS:
+            return JsonResponse({'error': f'Maksimal {MAX_BULK_PLANS} completion per request.'}, status=400)
+        return self._sync(request, data.get('since'), completions)
+
+    def _sync(self, request, since_token, completions):
+        try:
+            since = decode_token(since_token) if since_token else None
+        except SyncError:
+            return JsonResponse({'error': 'Token sync tidak valid.'}, status=400)
+
+        # Tanpa fallback user dev mode: endpoint ini membaca/mengubah data seluruh akun
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        user = request.user
+
+        results = apply_completions(user, completions) if completions else []
+        # Token dibuat sebelum membaca perubahan, jadi perubahan selama query ini ikut sync berikutnya
+        token = encode_token(timezone.now())
+        payload = {'token': token, **changes_since(user, since)}
+        if completions:
+            payload['completions'] = results
+        return JsonResponse(payload)
+
 # --- VIEWS WEB AJAX (LOGIN REQUIRED) ---
 
 @login_required
@@ -320,10 +726,13 @@ def ajax_complete_log(request, plan_id):
     form = LogCompletionForm(request.POST, instance=plan)
     if form.is_valid():
         log = form.save(commit=False)
-        if not log.is_completed:
+        newly_completed = not log.is_completed
+        if newly_completed:
             log.is_completed = True
             log.completed_at = timezone.now() 
         log.save()
+        if newly_completed:
+            record_plan_completed(log)
         return JsonResponse({
             "status": "success",
             "message": "Log berhasil disimpan!",
@@ -331,7 +740,7 @@ def ajax_complete_log(request, plan_id):
             "description": log.description,
             "is_completed": log.is_completed,
             "completed_at": log.completed_at.strftime("%d %b %Y, %H:%M") if log.completed_at else None,
-            "on_time": log.completed_at.date() <= log.plan_date if log.completed_at else False
+            "on_time": is_on_time(log)
         }, status=200)
     else:
         return JsonResponse({"status": "error", "message": "Data tidak valid.", "errors": form.errors}, status=400)
@@ -363,12 +772,15 @@ def api_complete_log(request, plan_id):
     # Ambil deskripsi dari POST data
     description = request.POST.get('description', '')
 
-    if not plan.is_completed:
+    newly_completed = not plan.is_completed
+    if newly_completed:
         plan.is_completed = True
         plan.completed_at = timezone.now()
     
     plan.description = description
     plan.save()
+    if newly_completed:
+        record_plan_completed(plan)
 
     return JsonResponse({
         "status": "success",
@@ -390,6 +802,9 @@ def get_workout_logs_api(request):
     try:
         year = int(selected_year) if selected_year else today.year
         month = int(selected_month) if selected_month else today.month
+        if not (1 <= month <= 12 and datetime.MINYEAR <= year <= datetime.MAXYEAR):
+            year = today.year
+            month = today.month
     except ValueError:
         year = today.year
         month = today.month
@@ -406,53 +821,30 @@ def get_workout_logs_api(request):
         return JsonResponse({'error': 'No user'}, status=400)
     # --------------------------------------
 
-    queryset = WorkoutPlan.objects.filter(user=user)
-
     filter_type = 'month'
+    start_date = None
+    plan_range = month_bounds(datetime.date(year, month, 1))
     if selected_year and selected_month and selected_week_start:
         try:
             start_date = datetime.datetime.strptime(selected_week_start, '%Y-%m-%d').date()
-            end_date = start_date + datetime.timedelta(days=6)
-            queryset = queryset.filter(
-                plan_date__year=year,
-                plan_date__month=month,
-                plan_date__range=[start_date, end_date]
-            )
+            plan_range = period_range(WorkoutStats.PERIOD_WEEK, datetime.date(year, month, 1), start_date)
             filter_type = 'week'
         except ValueError:
-            queryset = queryset.filter(plan_date__year=year, plan_date__month=month)
-    else:
-        queryset = queryset.filter(plan_date__year=year, plan_date__month=month)
+            pass
 
-    queryset = queryset.order_by('plan_date', 'id')
+    queryset = WorkoutPlan.objects.filter(user=user, plan_date__range=plan_range).order_by('plan_date', 'id')
 
-    total_plans = queryset.count()
-    completed_plans = queryset.filter(is_completed=True).count()
-    on_time_completed = 0
-    plans_data = []
+    stats, occurrences = get_log_stats(user, year, month, start_date if filter_type == 'week' else None, plan_range)
+    total_plans = stats['total_plans']
+    completed_plans = stats['completed_plans']
+    on_time_completed = stats['on_time_completed']
+    plans_data = merge_plans(serialize_plans(queryset), occurrences)
     
     nama_bulan_id = [
         None, 'Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni',
         'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember'
     ]
 
-    for plan in queryset:
-        if plan.is_completed and plan.completed_at and plan.completed_at.date() <= plan.plan_date:
-            on_time_completed += 1
-            
-        plans_data.append({
-            'id': plan.id,
-            'user': plan.user.id,
-            'exercise_id': plan.exercise.id,
-            'exercise_name': plan.exercise.exercise_name,
-            'sets': plan.sets or 0,
-            'reps': plan.reps or 0,
-            'plan_date': plan.plan_date.strftime('%Y-%m-%d'),
-            'description': plan.description,
-            'is_completed': plan.is_completed,
-            'completed_at': plan.completed_at.strftime('%Y-%m-%d %H:%M:%S') if plan.completed_at else None,
-        })
-
     percentage = (on_time_completed / total_plans) * 100 if total_plans > 0 else 0
 
     month_name = nama_bulan_id[month] if 1 <= month <= 12 else ''
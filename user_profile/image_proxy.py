@@ -0,0 +1,347 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_CONTENT_TYPE = 'image/jpeg'
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class UpstreamError(Exception):
+    """Kegagalan fetch upstream dari client async (membungkus error httpx)."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+def is_proxyable(url):
+    parsed = urlparse(url)
+    return parsed.scheme in ('http', 'https') and bool(parsed.netloc)
+
+
+# --- SESSION HTTP BERSAMA ---
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Satu requests.Session per proses, koneksi keep-alive dipakai ulang antar request."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+# --- CACHE DI DISK (LRU BERDASARKAN UKURAN) ---
+class DiskImageCache:
+    """
+    Menyimpan body gambar + metadata (content type, ETag, Last-Modified) per URL.
+    Waktu akses dicatat lewat mtime file body; jika total ukuran melebihi max_bytes,
+    entry yang paling lama tidak diakses dihapus.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.body', base + '.json'
+
+    def get(self, url):
+        """Metadata entry (dict berisi 'path'), atau None."""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            os.utime(body_path)
+        except (OSError, ValueError):
+            return None
+        meta['path'] = body_path
+        return meta
+
+    def touch(self, url, **changes):
+        """Update metadata (mis. fetched_at setelah revalidasi 304)."""
+        meta = self.get(url)
+        if meta is None:
+            return None
+        meta.update(changes)
+        self._write_meta(url, meta)
+        return meta
+
+    def _write_meta(self, url, meta):
+        _, meta_path = self._paths(url)
+        data = {k: v for k, v in meta.items() if k != 'path'}
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, meta_path)
+
+    def open_temp(self):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        return os.fdopen(fd, 'wb'), tmp
+
+    def commit(self, url, tmp_path, meta):
+        body_path, _ = self._paths(url)
+        os.replace(tmp_path, body_path)
+        self._write_meta(url, meta)
+        self.evict()
+
+    def store(self, url, body, meta):
+        f, tmp = self.open_temp()
+        with f:
+            f.write(body)
+        self.commit(url, tmp, meta)
+
+    def read(self, meta):
+        with open(meta['path'], 'rb') as f:
+            return f.read()
+
+    def discard(self, tmp_path):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+    def evict(self):
+        entries, total = [], 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.body'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for p in (path, path[:-len('.body')] + '.json'):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            total -= size
+
+@lru_cache(maxsize=8)
+def _disk_cache(directory, max_bytes):
+    return DiskImageCache(directory, max_bytes)
+
+def get_cache():
+    """DiskImageCache per (direktori, batas); dibuat sekali, jadi os.makedirs tidak jalan di setiap request."""
+    return _disk_cache(
+        _setting('IMAGE_PROXY_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'gymbuddy-image-proxy')),
+        _setting('IMAGE_PROXY_CACHE_MAX_BYTES', 200 * 1024 * 1024),
+    )
+
+def is_fresh(meta):
+    return time.time() - meta.get('fetched_at', 0) < _setting('IMAGE_PROXY_FRESH_SECONDS', 60 * 60)
+
+
+# --- FETCH UPSTREAM ---
+def max_image_bytes():
+    return _setting('IMAGE_PROXY_MAX_BYTES', 5 * 1024 * 1024)
+
+def conditional_headers(cached):
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    return headers
+
+def fetch(url, cached=None):
+    """
+    Request ke upstream (stream=True), kondisional jika ada entry cache.
+    Mengembalikan response requests; pemanggil wajib menutupnya.
+    """
+    response = get_session().get(
+        url, headers=conditional_headers(cached), stream=True,
+        timeout=_setting('IMAGE_PROXY_TIMEOUT', (3.05, 10)),
+    )
+    if response.status_code == 304:
+        return response
+    try:
+        response.raise_for_status()
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > max_image_bytes():
+            raise ImageTooLarge(f"Image larger than {max_image_bytes()} bytes")
+    except Exception:
+        response.close()
+        raise
+    return response
+
+def response_meta(response):
+    return {
+        'content_type': response.headers.get('Content-Type', DEFAULT_CONTENT_TYPE),
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fetched_at': time.time(),
+    }
+
+def has_content_length(response):
+    length = response.headers.get('Content-Length')
+    return bool(length and length.isdigit())
+
+def read_and_store(url, response, cache):
+    """
+    Baca seluruh body (maks. IMAGE_PROXY_MAX_BYTES) lalu simpan ke cache; mengembalikan (meta, body).
+    Dipakai jika upstream tidak mengirim Content-Length, agar batas ukuran ketahuan sebelum
+    status 200 terkirim ke client.
+    """
+    max_bytes = max_image_bytes()
+    chunks, size = [], 0
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ImageTooLarge(f"Image larger than {max_bytes} bytes")
+            chunks.append(chunk)
+    finally:
+        response.close()
+    meta = response_meta(response)
+    meta['size'] = size
+    body = b"".join(chunks)
+    cache.store(url, body, meta)
+    return meta, body
+
+def stream_and_store(url, response, cache):
+    """
+    Generator chunk body upstream ke client sambil ditulis ke file sementara.
+    Hanya untuk response dengan Content-Length (sudah dicek fetch()); tanpa itu pakai read_and_store.
+    Entry baru disimpan ke cache hanya jika body lengkap.
+    """
+    max_bytes = max_image_bytes()
+    meta = response_meta(response)
+    f, tmp = cache.open_temp()
+    size, complete = 0, False
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                # Upstream mengirim lebih dari Content-Length-nya: putuskan stream (client melihat
+                # body tidak lengkap) daripada mengakhirinya seolah gambar utuh
+                raise ImageTooLarge(f"Image larger than {max_bytes} bytes")
+            f.write(chunk)
+            yield chunk
+        complete = True
+    finally:
+        f.close()
+        response.close()
+        if complete:
+            meta['size'] = size
+            cache.commit(url, tmp, meta)
+        else:
+            cache.discard(tmp)
+
+
+# --- FETCH ASYNC (ASGI) ---
+# httpx hanya dibutuhkan untuk view async; diimport saat pertama dipakai
+_async_clients = {}
+_inflight = {}
+
+def _new_async_client():
+    import httpx
+
+    timeout = _setting('IMAGE_PROXY_TIMEOUT', (3.05, 10))
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(read, connect=connect),
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+        follow_redirects=True,
+    )
+
+def get_async_client():
+    """Satu httpx.AsyncClient (connection pool bersama) per event loop; hanya untuk ASGI."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _new_async_client()
+        # Loop lama sudah tertutup sehingga aclose() tidak bisa dijalankan; lepaskan referensinya
+        for old_loop in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[old_loop]
+        _async_clients[loop] = client
+    return client
+
+async def _download(url, cached, cache, pooled=True):
+    """Fetch upstream, simpan ke cache disk; mengembalikan (meta, body)."""
+    if pooled:
+        return await _download_with(get_async_client(), url, cached, cache)
+    # Tanpa ASGI (async_to_sync di bawah WSGI) tiap request punya event loop baru:
+    # pakai client sekali pakai yang ditutup di loop yang sama, bukan pool per loop
+    async with _new_async_client() as client:
+        return await _download_with(client, url, cached, cache)
+
+async def _download_with(client, url, cached, cache, refetched=False):
+    import httpx
+
+    refetch = False
+    try:
+        async with client.stream('GET', url, headers=conditional_headers(cached)) as response:
+            if response.status_code == 304:
+                if cached:
+                    try:
+                        meta = await asyncio.to_thread(cache.touch, url, fetched_at=time.time()) or cached
+                        return meta, await asyncio.to_thread(cache.read, meta)
+                    except OSError:
+                        pass
+                if refetched:
+                    raise UpstreamError(f"Unexpected 304 for unconditional request to {url}")
+                # Body di-evict saat revalidasi (atau tidak ada entry): unduh ulang tanpa header kondisional
+                refetch = True
+            else:
+                response.raise_for_status()
+                length = response.headers.get('Content-Length')
+                if length and length.isdigit() and int(length) > max_image_bytes():
+                    raise ImageTooLarge(f"Image larger than {max_image_bytes()} bytes")
+
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_image_bytes():
+                        raise ImageTooLarge(f"Image larger than {max_image_bytes()} bytes")
+                    chunks.append(chunk)
+                meta = response_meta(response)
+    except httpx.HTTPError as e:
+        raise UpstreamError(str(e)) from e
+
+    if refetch:
+        return await _download_with(client, url, None, cache, refetched=True)
+
+    body = b"".join(chunks)
+    meta['size'] = size
+    await asyncio.to_thread(cache.store, url, body, meta)
+    return meta, body
+
+async def fetch_coalesced(url, cached, cache, pooled=True):
+    """
+    Request bersamaan untuk URL yang sama menunggu satu fetch upstream yang sama.
+    Fetch tetap selesai (dan tersimpan di cache) walaupun client pertama putus.
+    pooled=False untuk request non-ASGI (client tidak di-cache per event loop).
+    """
+    loop = asyncio.get_running_loop()
+    key = (loop, url)
+    task = _inflight.get(key)
+    if task is None:
+        task = loop.create_task(_download(url, cached, cache, pooled))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
@@ -1,10 +1,20 @@
+import asyncio
+import importlib.util
 import json
-from django.test import Client, TestCase
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from user_profile.forms import ProfileForm
 from .models import Profile
+from . import image_proxy
+from howto.models import Exercise
 
 class ProfileModelTest(TestCase):
     def setUp(self):
@@ -226,4 +236,316 @@ class ProfileFormTest(TestCase):
         }
         form = ProfileForm(data=data)
         self.assertFalse(form.is_valid())
-        self.assertIn('display_name', form.errors)
\ No newline at end of file
+        self.assertIn('display_name', form.errors)
+
+
+class ShowJsonListTest(TestCase):
+    def setUp(self):
+        self.exercises = [
+            Exercise.objects.create(exercise_name=f"Move {i}", main_muscle="Back", equipment="Cable")
+            for i in range(3)
+        ]
+        self.profiles = []
+        for i in range(5):
+            user = User.objects.create_user(username=f"user{i}", password="pass12345")
+            profile = Profile.objects.create(user=user, display_name=f"User {i}")
+            profile.favorite_workouts.set(self.exercises[:i % 4])
+            self.profiles.append(profile)
+        self.url = reverse('user_profile:show_json')
+
+    def get_json(self, *args, **kwargs):
+        response = self.client.get(*args, **kwargs)
+        self.assertTrue(response.streaming)
+        return response, json.loads(b"".join(response.streaming_content))
+
+    def test_query_count_is_constant(self):
+        # profile+user (JOIN) dan favorite_workouts (prefetch)
+        with self.assertNumQueries(2):
+            _, data = self.get_json(self.url)
+        self.assertEqual([row['username'] for row in data], [f"user{i}" for i in range(5)])
+        self.assertEqual(data[3]['favorite_workouts'], [
+            {"id": ex.id, "exercise_name": ex.exercise_name} for ex in self.exercises
+        ])
+        self.assertEqual(set(data[0]), {"id", "username", "display_name", "bio", "profile_picture", "favorite_workouts"})
+
+    def test_keyset_pagination(self):
+        response, data = self.get_json(self.url, {'limit': 2})
+        self.assertEqual(len(data), 2)
+        usernames = [row['username'] for row in data]
+
+        while 'Link' in response:
+            next_url = response['Link'].split(';')[0].strip('<>')
+            response, data = self.get_json(next_url)
+            usernames += [row['username'] for row in data]
+        self.assertEqual(usernames, [f"user{i}" for i in range(5)])
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get(self.url, {'limit': 'x'}).status_code, 400)
+
+
+class StubImageHandler(BaseHTTPRequestHandler):
+    """Server HTTP lokal untuk test proxy_image; mencatat setiap request yang masuk."""
+    IMAGE = b"\x89PNG fake image bytes" * 100
+    ETAG = '"v1"'
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        if self.server.failing:
+            self.send_response(503)
+            self.end_headers()
+        elif self.path == "/avatar.png":
+            if self.headers.get("If-None-Match") == self.ETAG:
+                self.send_response(304)
+                self.send_header("ETag", self.ETAG)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(self.IMAGE)))
+            self.send_header("ETag", self.ETAG)
+            self.end_headers()
+            self.wfile.write(self.IMAGE)
+        elif self.path == "/huge.png":
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(10 * 1024 * 1024))
+            self.end_headers()
+        elif self.path == "/unsized.png":
+            # Tanpa Content-Length: body diakhiri dengan menutup koneksi
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"x" * 8000)
+        elif self.path == "/unsized-small.png":
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"s" * 3000)
+        elif self.path == "/stray-304.png":
+            # 304 pada request pertama walaupun tanpa header kondisional (mis. CDN yang salah konfigurasi)
+            if sum(path == self.path for path, _ in self.server.requests) == 1:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(self.IMAGE)))
+            self.end_headers()
+            self.wfile.write(self.IMAGE)
+        elif self.path == "/slow.png":
+            time.sleep(0.3)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(self.IMAGE)))
+            self.end_headers()
+            self.wfile.write(self.IMAGE)
+        elif self.path.startswith("/img/"):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            self.wfile.write(b"y" * 1000)
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageProxyTestCase(TestCase):
+    """Base test proxy gambar: stub server + direktori cache sementara per test."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubImageHandler)
+        cls.server.requests = []
+        cls.server.failing = False
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.server.failing = False
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        override = override_settings(IMAGE_PROXY_CACHE_DIR=cache_dir, IMAGE_PROXY_MAX_BYTES=5000)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client = Client()
+
+
+class ProxyImageTest(ImageProxyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('user_profile:proxy_image')
+
+    def get(self, path, **headers):
+        response = self.client.get(self.url, {'url': self.base + path}, **headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_caches_image_on_disk(self):
+        response, body = self.get("/avatar.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], "image/png")
+        self.assertEqual(body, StubImageHandler.IMAGE)
+
+        response, body = self.get("/avatar.png")
+        self.assertEqual(body, StubImageHandler.IMAGE)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_revalidates_stale_entry_with_etag(self):
+        self.get("/avatar.png")
+        with override_settings(IMAGE_PROXY_FRESH_SECONDS=0):
+            response, body = self.get("/avatar.png")
+        self.assertEqual(body, StubImageHandler.IMAGE)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.server.requests[1][1].get("If-None-Match"), StubImageHandler.ETAG)
+
+    def test_client_conditional_request(self):
+        self.get("/avatar.png")
+        response, _ = self.get("/avatar.png", HTTP_IF_NONE_MATCH=StubImageHandler.ETAG)
+        self.assertEqual(response.status_code, 304)
+
+    def test_rejects_oversized_images(self):
+        response, _ = self.get("/huge.png")
+        self.assertEqual(response.status_code, 502)
+
+        # Tanpa Content-Length: body di-buffer sampai batas ukuran, 502 (bukan 200 terpotong), tidak disimpan
+        response, body = self.get("/unsized.png")
+        self.assertEqual(response.status_code, 502)
+        self.get("/unsized.png")
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_unsized_image_within_limit(self):
+        response, body = self.get("/unsized-small.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, b"s" * 3000)
+        response, body = self.get("/unsized-small.png")
+        self.assertEqual(body, b"s" * 3000)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_lru_eviction(self):
+        with override_settings(IMAGE_PROXY_CACHE_MAX_BYTES=2500):
+            for name in ("a", "b", "c"):
+                self.get(f"/img/{name}.png")
+            self.get("/img/c.png")
+            self.assertEqual(len(self.server.requests), 3)
+            self.get("/img/a.png")
+            self.assertEqual(len(self.server.requests), 4)
+
+    def _evict_after(self, method):
+        """Patch DiskImageCache.<method> agar body entry dihapus tepat setelah dipanggil (race dengan evict())."""
+        original = getattr(image_proxy.DiskImageCache, method)
+
+        def evicting(cache, url, *args, **kwargs):
+            result = original(cache, url, *args, **kwargs)
+            body_path, _ = cache._paths(url)
+            cache.discard(body_path)
+            return result
+        return mock.patch.object(image_proxy.DiskImageCache, method, evicting)
+
+    def test_fresh_entry_evicted_before_open(self):
+        self.get("/avatar.png")
+        with self._evict_after('get'):
+            response, body = self.get("/avatar.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, StubImageHandler.IMAGE)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertNotIn("If-None-Match", self.server.requests[1][1])
+
+    def test_entry_evicted_during_revalidation(self):
+        self.get("/avatar.png")
+        # Entry di-evict antara revalidasi 304 dan touch(): unduh ulang penuh
+        with mock.patch.object(image_proxy.DiskImageCache, 'touch', return_value=None), \
+                override_settings(IMAGE_PROXY_FRESH_SECONDS=0):
+            response, body = self.get("/avatar.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, StubImageHandler.IMAGE)
+        self.assertEqual(self.server.requests[-2][1].get("If-None-Match"), StubImageHandler.ETAG)
+        self.assertNotIn("If-None-Match", self.server.requests[-1][1])
+
+    def test_serves_stale_copy_when_upstream_fails(self):
+        self.get("/avatar.png")
+        self.server.failing = True
+        with override_settings(IMAGE_PROXY_FRESH_SECONDS=0):
+            response, body = self.get("/avatar.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, StubImageHandler.IMAGE)
+
+        response, _ = self.get("/unknown.png")
+        self.assertEqual(response.status_code, 500)
+
+    def test_invalid_urls(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'url': 'file:///etc/passwd'}).status_code, 400)
+
+
+@skipUnless(importlib.util.find_spec("httpx"), "httpx belum terpasang")
+class AsyncProxyImageTest(ImageProxyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('user_profile:proxy_image_async')
+
+    async def test_fetches_and_caches(self):
+        response = await self.async_client.get(self.url, {'url': self.base + "/avatar.png"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, StubImageHandler.IMAGE)
+        self.assertEqual(response['ETag'], StubImageHandler.ETAG)
+
+        response = await self.async_client.get(self.url, {'url': self.base + "/avatar.png"})
+        self.assertEqual(response.content, StubImageHandler.IMAGE)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_concurrent_requests_share_one_fetch(self):
+        from .views import proxy_image_async
+
+        factory = RequestFactory()
+
+        async def burst():
+            requests_ = [factory.get(self.url, {'url': self.base + "/slow.png"}) for _ in range(100)]
+            return await asyncio.gather(*(proxy_image_async(r) for r in requests_))
+
+        clients_before = dict(image_proxy._async_clients)
+        responses = asyncio.run(burst())
+        self.assertTrue(all(r.status_code == 200 and r.content == StubImageHandler.IMAGE for r in responses))
+        self.assertEqual(len(self.server.requests), 1)
+        # Request non-ASGI memakai client sekali pakai, tidak ada pool yang tertinggal per loop
+        self.assertEqual(image_proxy._async_clients, clients_before)
+
+    async def test_upstream_errors(self):
+        response = await self.async_client.get(self.url, {'url': self.base + "/huge.png"})
+        self.assertEqual(response.status_code, 502)
+        response = await self.async_client.get(self.url, {'url': self.base + "/missing.png"})
+        self.assertEqual(response.status_code, 500)
+
+    async def test_304_without_cache_entry_is_refetched(self):
+        response = await self.async_client.get(self.url, {'url': self.base + "/stray-304.png"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, StubImageHandler.IMAGE)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_cache_is_built_once(self):
+        self.assertIs(image_proxy.get_cache(), image_proxy.get_cache())
+
+    async def test_evicted_body_after_304_is_refetched(self):
+        await self.async_client.get(self.url, {'url': self.base + "/avatar.png"})
+        with mock.patch.object(image_proxy.DiskImageCache, 'read', side_effect=OSError), \
+                override_settings(IMAGE_PROXY_FRESH_SECONDS=0):
+            response = await self.async_client.get(self.url, {'url': self.base + "/avatar.png"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, StubImageHandler.IMAGE)
+        self.assertEqual(self.server.requests[1][1].get("If-None-Match"), StubImageHandler.ETAG)
+        self.assertNotIn("If-None-Match", self.server.requests[2][1])
+
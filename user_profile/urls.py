@@ -13,5 +13,6 @@ urlpatterns = [
     path('create/api/', views.create_profile_api, name='create_profile_api'),
     path('edit/api/', views.edit_profile_api, name='edit_profile_api'),
     path('proxy-image/', views.proxy_image, name='proxy_image'),
+    path('proxy-image/async/', views.proxy_image_async, name='proxy_image_async'),
     path('list-workouts/', views.favorite_workouts_api, name='favorite_workouts_api'),
 ]
\ No newline at end of file
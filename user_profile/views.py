@@ -1,16 +1,25 @@
+import asyncio
 import json
+import time
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST, require_http_methods
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import Http404, HttpResponse, JsonResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 import requests
+from . import image_proxy
 from .forms import ProfileForm
 from .models import Profile
 from django.views.decorators.csrf import csrf_exempt
 from howto.models import Exercise
 from howto.serializers import exercise_to_dict
+from howto.catalog_cache import cache_catalog_response, catalog_etag
+from django.views.decorators.http import etag
 
 
 @login_required
@@ -109,41 +118,74 @@ def delete_profile(request, user_id, username):
         "message": "Profil berhasil dihapus"
     })
 
+PROFILES_PAGE_SIZE = 100
+PROFILES_MAX_PAGE_SIZE = 500
+
+def _profile_queryset():
+    # user lewat JOIN, favorite_workouts satu query IN (...) hanya kolom id/exercise_name
+    return Profile.objects.select_related('user').prefetch_related(
+        Prefetch('favorite_workouts', queryset=Exercise.objects.only('id', 'exercise_name'))
+    )
+
+def _profile_to_dict(profile):
+    return {
+        "id": profile.user.id,
+        "username": profile.user.username,
+        "display_name": profile.display_name,
+        "bio": profile.bio,
+        "profile_picture": profile.profile_picture if profile.profile_picture else None,
+        "favorite_workouts": [
+            {"id": ex.id, "exercise_name": ex.exercise_name} for ex in profile.favorite_workouts.all()
+        ],
+    }
+
+def _stream_json_array(items):
+    encoder = DjangoJSONEncoder()
+    yield "["
+    for i, item in enumerate(items):
+        yield ("," if i else "") + encoder.encode(item)
+    yield "]"
+
 def show_json(request):
+    """
+    Daftar profile (array JSON, di-stream), diurutkan berdasarkan id user.
+    Paginasi keyset: ?limit= (default 100, maks 500) dan ?after=<id terakhir>;
+    URL halaman berikutnya dikirim di header Link (rel="next").
+    """
     try:
-        profile_list = Profile.objects.all()
-    except Profile.DoesNotExist:
-        raise Http404("Profile tidak ditemukan")
-
-    data = [ 
-        {
-            "id": profile.user.id,
-            "username": profile.user.username,
-            "display_name": profile.display_name,
-            "bio": profile.bio,
-            "profile_picture": profile.profile_picture if profile.profile_picture else None,
-            "favorite_workouts": list(profile.favorite_workouts.values("id", "exercise_name")),
-        }
-        for profile in profile_list
-    ]
-    return JsonResponse(data, safe=False)
+        limit = max(1, min(int(request.GET.get('limit', PROFILES_PAGE_SIZE)), PROFILES_MAX_PAGE_SIZE))
+        after = int(request.GET['after']) if request.GET.get('after') else None
+    except ValueError:
+        return JsonResponse({"error": "Invalid pagination parameters"}, status=400)
+
+    profile_list = _profile_queryset().order_by('user_id')
+    if after is not None:
+        profile_list = profile_list.filter(user_id__gt=after)
+
+    # Satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+    profiles = list(profile_list[:limit + 1])
+    has_next = len(profiles) > limit
+    profiles = profiles[:limit]
+
+    response = StreamingHttpResponse(
+        _stream_json_array(_profile_to_dict(profile) for profile in profiles),
+        content_type='application/json',
+    )
+    if has_next:
+        query = request.GET.copy()
+        query['after'] = profiles[-1].user_id
+        query['limit'] = limit
+        response['Link'] = f'<{request.build_absolute_uri(request.path)}?{query.urlencode()}>; rel="next"'
+    return response
 
 
 def show_json_by_id(request, user_id):
     try:
-        profile = Profile.objects.get(user__id=user_id)
+        profile = _profile_queryset().get(user__id=user_id)
     except Profile.DoesNotExist:
         raise Http404("Profile tidak ditemukan")
 
-    data = {
-        "id": profile.user.id,
-        "username": profile.user.username,
-        "display_name": profile.display_name,
-        "bio": profile.bio,
-        "profile_picture": profile.profile_picture if profile.profile_picture else None,
-        "favorite_workouts": list(profile.favorite_workouts.values("id", "exercise_name")),
-    }
-    return JsonResponse(data)
+    return JsonResponse(_profile_to_dict(profile))
 
 @csrf_exempt
 @login_required
@@ -216,25 +258,123 @@ def edit_profile_api(request):
         }
     })
 
+def _proxy_headers(response, meta):
+    if meta.get('etag'):
+        response['ETag'] = meta['etag']
+    if meta.get('last_modified'):
+        response['Last-Modified'] = meta['last_modified']
+    response['Cache-Control'] = f"public, max-age={getattr(settings, 'IMAGE_PROXY_FRESH_SECONDS', 60 * 60)}"
+    return response
+
+def _cached_image_response(request, meta):
+    """Response dari entry cache, atau None jika body-nya sudah di-evict."""
+    etag_value = meta.get('etag')
+    if etag_value and etag_value in request.headers.get('If-None-Match', ''):
+        return _proxy_headers(HttpResponseNotModified(), meta)
+    try:
+        body = open(meta['path'], 'rb')
+    except OSError:
+        return None
+    return _proxy_headers(FileResponse(body, content_type=meta['content_type']), meta)
+
 def proxy_image(request):
     image_url = request.GET.get('url')
     if not image_url:
         return HttpResponse('No URL provided', status=400)
-    
+    if not image_proxy.is_proxyable(image_url):
+        return HttpResponse('Invalid URL', status=400)
+
+    # Gambar disimpan di cache disk; setelah kedaluwarsa direvalidasi dengan ETag/Last-Modified
+    cache = image_proxy.get_cache()
+    cached = cache.get(image_url)
+    if cached is not None and image_proxy.is_fresh(cached):
+        response = _cached_image_response(request, cached)
+        if response is not None:
+            return response
+        # Entry baru saja di-evict
+        cached = None
+
     try:
-        # Fetch image from external source
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        
-        # Return the image with proper content type
-        return HttpResponse(
-            response.content,
-            content_type=response.headers.get('Content-Type', 'image/jpeg')
-        )
-    except requests.RequestException as e:
+        upstream = image_proxy.fetch(image_url, cached)
+        if upstream.status_code == 304:
+            upstream.close()
+            touched = cache.touch(image_url, fetched_at=time.time())
+            response = _cached_image_response(request, touched) if touched else None
+            if response is not None:
+                return response
+            # Body di-evict saat revalidasi: unduh ulang tanpa header kondisional
+            cached = None
+            upstream = image_proxy.fetch(image_url)
+        if not image_proxy.has_content_length(upstream):
+            # Ukuran belum diketahui: buffer dulu agar gambar yang kebesaran jadi 502, bukan 200 terpotong
+            meta, body = image_proxy.read_and_store(image_url, upstream, cache)
+            return _image_bytes_response(request, meta, body)
+    except (requests.RequestException, image_proxy.ImageTooLarge) as e:
+        if cached is not None:
+            # Upstream bermasalah: pakai salinan lama daripada gagal
+            response = _cached_image_response(request, cached)
+            if response is not None:
+                return response
+        if isinstance(e, image_proxy.ImageTooLarge):
+            return HttpResponse(str(e), status=502)
         return HttpResponse(f'Error fetching image: {str(e)}', status=500)
 
+    # Body di-stream ke client sambil ditulis ke cache, tidak di-buffer di memori
+    meta = image_proxy.response_meta(upstream)
+    response = StreamingHttpResponse(
+        image_proxy.stream_and_store(image_url, upstream, cache),
+        content_type=meta['content_type'],
+    )
+    return _proxy_headers(response, meta)
+
+def _image_bytes_response(request, meta, body):
+    etag_value = meta.get('etag')
+    if etag_value and etag_value in request.headers.get('If-None-Match', ''):
+        return _proxy_headers(HttpResponseNotModified(), meta)
+    return _proxy_headers(HttpResponse(body, content_type=meta['content_type']), meta)
+
+async def proxy_image_async(request):
+    """
+    Versi async proxy_image untuk ASGI (httpx.AsyncClient bersama per event loop).
+    Request bersamaan untuk URL yang sama berbagi satu fetch upstream, jadi body
+    dikirim setelah selesai diunduh (gambar dibatasi IMAGE_PROXY_MAX_BYTES).
+    """
+    image_url = request.GET.get('url')
+    if not image_url:
+        return HttpResponse('No URL provided', status=400)
+    if not image_proxy.is_proxyable(image_url):
+        return HttpResponse('Invalid URL', status=400)
+
+    cache = image_proxy.get_cache()
+    cached = await asyncio.to_thread(cache.get, image_url)
+    if cached is not None and image_proxy.is_fresh(cached):
+        try:
+            body = await asyncio.to_thread(cache.read, cached)
+            return _image_bytes_response(request, cached, body)
+        except OSError:
+            # Entry baru saja di-evict
+            cached = None
+
+    try:
+        # Pool httpx per event loop hanya aman di ASGI (loop berumur panjang)
+        pooled = isinstance(request, ASGIRequest)
+        meta, body = await image_proxy.fetch_coalesced(image_url, cached, cache, pooled)
+    except (image_proxy.UpstreamError, image_proxy.ImageTooLarge) as e:
+        if cached is not None:
+            try:
+                body = await asyncio.to_thread(cache.read, cached)
+                return _image_bytes_response(request, cached, body)
+            except OSError:
+                pass
+        if isinstance(e, image_proxy.ImageTooLarge):
+            return HttpResponse(str(e), status=502)
+        return HttpResponse(f'Error fetching image: {str(e)}', status=500)
+
+    return _image_bytes_response(request, meta, body)
+
 # ambil dari fitur howto
+@etag(catalog_etag)
+@cache_catalog_response
 def favorite_workouts_api(request):
     data = list(
         Exercise.objects.values("id", "exercise_name")